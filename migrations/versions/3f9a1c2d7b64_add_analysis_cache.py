@@ -0,0 +1,54 @@
+"""Add analysis cache columns
+
+Revision ID: 3f9a1c2d7b64
+Revises: cfb74efa71cc
+Create Date: 2026-10-17 09:12:41.508312
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9a1c2d7b64'
+down_revision = 'cfb74efa71cc'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('analysis_results') as batch_op:
+        # Columns the AnalysisResult model defines but the initial migration never created
+        batch_op.add_column(sa.Column('analysis_type', sa.String(length=100), nullable=False,
+                                      server_default='content_analysis'))
+        batch_op.add_column(sa.Column('title', sa.String(length=200), nullable=False, server_default=''))
+        # Shared cache entries belong to no user
+        batch_op.add_column(sa.Column('user_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_analysis_results_user_id_users', 'users', ['user_id'], ['id'])
+        batch_op.add_column(sa.Column('cache_key', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('language', sa.String(length=10), nullable=True))
+        batch_op.add_column(sa.Column('pipeline_version', sa.String(length=20), nullable=True))
+        batch_op.add_column(sa.Column('hit_count', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('last_accessed_at', sa.DateTime(), nullable=True))
+        # Cache entries are keyed on content, not on an upload
+        batch_op.alter_column('upload_id', existing_type=sa.Integer(), nullable=True)
+        batch_op.create_index('ix_analysis_results_cache_key', ['cache_key'], unique=True)
+        batch_op.create_index('ix_analysis_results_last_accessed_at', ['last_accessed_at'], unique=False)
+
+
+def downgrade() -> None:
+    # Cache entries cannot be kept once upload_id is required again
+    op.execute("DELETE FROM analysis_results WHERE upload_id IS NULL")
+    with op.batch_alter_table('analysis_results') as batch_op:
+        batch_op.alter_column('upload_id', existing_type=sa.Integer(), nullable=False)
+        batch_op.drop_index('ix_analysis_results_last_accessed_at')
+        batch_op.drop_index('ix_analysis_results_cache_key')
+        batch_op.drop_column('last_accessed_at')
+        batch_op.drop_column('hit_count')
+        batch_op.drop_column('pipeline_version')
+        batch_op.drop_column('language')
+        batch_op.drop_column('cache_key')
+        batch_op.drop_constraint('fk_analysis_results_user_id_users', type_='foreignkey')
+        batch_op.drop_column('user_id')
+        batch_op.drop_column('title')
+        batch_op.drop_column('analysis_type')
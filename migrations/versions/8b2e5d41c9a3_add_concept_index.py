@@ -0,0 +1,64 @@
+"""Add concept index
+
+Revision ID: 8b2e5d41c9a3
+Revises: 3f9a1c2d7b64
+Create Date: 2026-10-17 14:37:05.918246
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b2e5d41c9a3'
+down_revision = '3f9a1c2d7b64'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('concepts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('key', sa.String(length=200), nullable=False),
+    sa.Column('label', sa.String(length=200), nullable=False),
+    sa.Column('language', sa.String(length=10), nullable=True),
+    sa.Column('course', sa.String(length=100), nullable=True),
+    sa.Column('document_count', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'course', 'key', name='uq_concepts_scope_key')
+    )
+    op.create_index('ix_concepts_key', 'concepts', ['key'], unique=False)
+    op.create_table('concept_postings',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('concept_id', sa.Integer(), nullable=False),
+    sa.Column('document_type', sa.String(length=20), nullable=False),
+    sa.Column('document_id', sa.String(length=64), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=True),
+    sa.Column('linked', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['concept_id'], ['concepts.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('concept_id', 'document_type', 'document_id', name='uq_concept_postings_document')
+    )
+    op.create_index('ix_concept_postings_document', 'concept_postings', ['document_type', 'document_id'],
+                    unique=False)
+    op.create_table('concept_cooccurrences',
+    sa.Column('concept_id', sa.Integer(), nullable=False),
+    sa.Column('related_concept_id', sa.Integer(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['concept_id'], ['concepts.id'], ),
+    sa.ForeignKeyConstraint(['related_concept_id'], ['concepts.id'], ),
+    sa.PrimaryKeyConstraint('concept_id', 'related_concept_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('concept_cooccurrences')
+    op.drop_index('ix_concept_postings_document', table_name='concept_postings')
+    op.drop_table('concept_postings')
+    op.drop_index('ix_concepts_key', table_name='concepts')
+    op.drop_table('concepts')
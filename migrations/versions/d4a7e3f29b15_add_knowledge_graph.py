@@ -0,0 +1,68 @@
+"""Add knowledge graph
+
+Revision ID: d4a7e3f29b15
+Revises: 8b2e5d41c9a3
+Create Date: 2026-10-17 16:02:48.377105
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4a7e3f29b15'
+down_revision = '8b2e5d41c9a3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('knowledge_nodes',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('key', sa.String(length=200), nullable=False),
+    sa.Column('label', sa.String(length=200), nullable=False),
+    sa.Column('node_type', sa.String(length=50), nullable=True),
+    sa.Column('definition', sa.Text(), nullable=True),
+    sa.Column('course', sa.String(length=100), nullable=True),
+    sa.Column('mention_count', sa.Integer(), nullable=True),
+    sa.Column('document_count', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'course', 'key', name='uq_knowledge_nodes_scope_key')
+    )
+    op.create_index('ix_knowledge_nodes_key', 'knowledge_nodes', ['key'], unique=False)
+    op.create_table('knowledge_edges',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('source_id', sa.Integer(), nullable=False),
+    sa.Column('target_id', sa.Integer(), nullable=False),
+    sa.Column('relation', sa.String(length=100), nullable=False),
+    sa.Column('weight', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['source_id'], ['knowledge_nodes.id'], ),
+    sa.ForeignKeyConstraint(['target_id'], ['knowledge_nodes.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('source_id', 'target_id', 'relation', name='uq_knowledge_edges_relation')
+    )
+    op.create_index('ix_knowledge_edges_target_id', 'knowledge_edges', ['target_id'], unique=False)
+    op.create_table('knowledge_graph_documents',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('document_type', sa.String(length=20), nullable=False),
+    sa.Column('document_id', sa.String(length=64), nullable=False),
+    sa.Column('course', sa.String(length=100), nullable=True),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('document_type', 'document_id', name='uq_knowledge_graph_documents_document')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('knowledge_graph_documents')
+    op.drop_index('ix_knowledge_edges_target_id', table_name='knowledge_edges')
+    op.drop_table('knowledge_edges')
+    op.drop_index('ix_knowledge_nodes_key', table_name='knowledge_nodes')
+    op.drop_table('knowledge_nodes')
@@ -5,6 +5,9 @@ from flask_migrate import Migrate
 from flask_cors import CORS
 from dotenv import load_dotenv
 import os
+from src.extensions import job_queue
+from src.services.model_registry import model_registry
+from src.services.startup import startup
 
 # Load environment variables
 load_dotenv()
@@ -23,15 +26,36 @@ def create_app(test_config=None):
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
     # Initialize extensions
-    db.init_app(app)
-    migrate.init_app(app, db)
-    CORS(app)
+    with startup.phase('extensions'):
+        db.init_app(app)
+        migrate.init_app(app, db)
+        job_queue.init_app(app)
+        CORS(app)
+
+    # Free memory held by models nobody has used for a while
+    idle_seconds = os.environ.get('MODEL_IDLE_UNLOAD_SECONDS')
+    if idle_seconds:
+        model_registry.start_idle_reaper(float(idle_seconds))
 
     # Initialize routes
-    from src.routes import init_routes
-    init_routes(app)
+    with startup.phase('routes'):
+        from src.routes import init_routes
+        init_routes(app)
+
+    # Register CLI commands
+    from src.cli import init_cli
+    init_cli(app)
+
+    # Build heavy services now, in the background, or on first use
+    with startup.phase('warmup'):
+        startup.init_app(app)
     
     return app
 
-# Create the application instance
-app = create_app()
+def __getattr__(name):
+    """Create the default application on first access rather than at import"""
+    if name == 'app':
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,77 @@
+"""Flask CLI commands"""
+import json
+
+import click
+
+from src.services.inference_backends import BACKENDS, TRANSFORMER_MODELS
+from src.services.startup import DEFAULT_PROFILE_COMMAND, import_times, startup
+
+
+def init_cli(app):
+    """Register the CLI commands on the app"""
+
+    @app.cli.command('startup-report')
+    @click.option('--top', default=20, show_default=True, help='Number of modules and packages to list')
+    @click.option('--command', 'command', default=DEFAULT_PROFILE_COMMAND, show_default=True,
+                  help='Python code whose cold start is profiled')
+    @click.option('--as-json', is_flag=True, help='Print the report as JSON')
+    def startup_report(top, command, as_json):
+        """Break cold-start time down by imported module and init phase"""
+        report = {'imports': import_times(command, top=top), 'startup': startup.report()}
+        if as_json:
+            click.echo(json.dumps(report, indent=2))
+            return
+
+        imports = report['imports']
+        click.echo(f"Cold start: {imports['total_seconds']:.3f}s "
+                   f"({imports['import_seconds']:.3f}s importing modules)")
+        click.echo("\nSlowest imports (cumulative):")
+        for module in imports['modules']:
+            click.echo(f"  {module['cumulative_seconds']:8.3f}s  {module['module']}")
+        click.echo("\nImport time by package (self):")
+        for package in imports['packages']:
+            click.echo(f"  {package['self_seconds']:8.3f}s  {package['package']}")
+        click.echo(f"\nInit phases (startup mode: {report['startup']['mode']}):")
+        for name, seconds in report['startup']['phases'].items():
+            click.echo(f"  {seconds:8.3f}s  {name}")
+        click.echo("\nModel loads:")
+        for model in report['startup']['models']:
+            load = f"{model['load_seconds']:8.3f}s" if model['load_seconds'] is not None else '  not loaded'
+            click.echo(f"  {load}  {model['name']}")
+
+    @app.cli.command('convert-model')
+    @click.argument('name', type=click.Choice(sorted(TRANSFORMER_MODELS)))
+    @click.option('--output', default=None, help='Export directory; defaults to the one the onnx backend loads')
+    def convert_model(name, output):
+        """Export a transformer model to ONNX for the onnx inference backend"""
+        from src.services.inference_backends import convert_model as export
+        click.echo(f"Exported {name} to {export(name, output)}")
+
+    @app.cli.command('benchmark-model')
+    @click.argument('name', type=click.Choice(sorted(TRANSFORMER_MODELS)))
+    @click.option('--backend', 'backends', multiple=True, type=click.Choice(BACKENDS),
+                  help='Backend to compare (repeatable); defaults to all of them')
+    @click.option('--text-file', type=click.File(), default=None,
+                  help='Texts to run, separated by blank lines; defaults to built-in samples')
+    @click.option('--repeat', default=3, show_default=True, help='Times each text is run')
+    @click.option('--as-json', is_flag=True, help='Print the results as JSON')
+    def benchmark_model(name, backends, text_file, repeat, as_json):
+        """Compare the latency and fp32 agreement of a model's inference backends"""
+        from src.services.inference_backends import benchmark
+        texts = None
+        if text_file:
+            texts = [text.strip() for text in text_file.read().split('\n\n') if text.strip()]
+        results = benchmark(name, texts, backends or BACKENDS, repeat)
+        if as_json:
+            click.echo(json.dumps(results, indent=2))
+            return
+
+        click.echo(f"{'backend':8}  {'load':>8}  {'mean':>8}  {'p95':>8}  agreement")
+        for result in results:
+            if 'error' in result:
+                click.echo(f"{result['backend']:8}  {result['error']}")
+                continue
+            latency = result['latency_seconds']
+            agreement = f"{result['agreement']:.3f}" if result['agreement'] is not None else '-'
+            click.echo(f"{result['backend']:8}  {result['load_seconds']:7.2f}s  {latency['mean']:7.3f}s  "
+                       f"{latency['p95']:7.3f}s  {agreement}")
@@ -1,7 +1,11 @@
 """Flask extensions"""
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
+from src.services.job_queue import JobQueue
 
 # Initialize SQLAlchemy
 db = SQLAlchemy()
 migrate = Migrate()
+
+# Background job queue for long-running content processing
+job_queue = JobQueue()
@@ -4,6 +4,8 @@ from src.extensions import db
 from .user import User, AccessibilitySettings
 from .qa import Question, Answer, Tag, QuestionVote, AnswerVote
 from .resource_library import Resource, ResourceCategory, ResourceRating
+from .concept_index import Concept, ConceptPosting, ConceptCooccurrence
+from .knowledge_graph import KnowledgeNode, KnowledgeEdge, KnowledgeGraphDocument
 
 __all__ = [
     'db',
@@ -16,5 +18,11 @@ __all__ = [
     'AnswerVote',
     'Resource',
     'ResourceCategory',
-    'ResourceRating'
+    'ResourceRating',
+    'Concept',
+    'ConceptPosting',
+    'ConceptCooccurrence',
+    'KnowledgeNode',
+    'KnowledgeEdge',
+    'KnowledgeGraphDocument'
 ]
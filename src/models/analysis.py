@@ -13,9 +13,20 @@ class AnalysisResult(db.Model):
     data = db.Column(db.JSON)  # Store analysis data in JSON format
     recommendations = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # Content analysis cache, keyed on a digest of text, language and pipeline version
+    cache_key = db.Column(db.String(64), unique=True, index=True)
+    language = db.Column(db.String(10))
+    pipeline_version = db.Column(db.String(20))
+    concepts = db.Column(db.JSON)
+    difficulty_assessment = db.Column(db.JSON)
+    summaries = db.Column(db.JSON)
+    visualization_paths = db.Column(db.JSON)
+    hit_count = db.Column(db.Integer, default=0)
+    last_accessed_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     
     # Foreign keys
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'))  # Empty for shared cache entries
     study_session_id = db.Column(db.Integer, db.ForeignKey('study_sessions.id'))
     learning_goal_id = db.Column(db.Integer, db.ForeignKey('learning_goals.id'))
     
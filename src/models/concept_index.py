@@ -0,0 +1,64 @@
+"""Concept index models"""
+from datetime import datetime
+from src.extensions import db
+
+class Concept(db.Model):
+    """A normalized concept of one user's documents, optionally within a course"""
+    __tablename__ = 'concepts'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'course', 'key', name='uq_concepts_scope_key'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    key = db.Column(db.String(200), nullable=False, index=True)  # Normalized, lemmatized form
+    label = db.Column(db.String(200), nullable=False)  # Surface form it was first seen with
+    language = db.Column(db.String(10), default='en')
+    course = db.Column(db.String(100))
+    document_count = db.Column(db.Integer, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Foreign keys
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'))  # Empty for anonymous uploads
+
+    # Relationships
+    postings = db.relationship('ConceptPosting', backref='concept', lazy=True, cascade='all, delete-orphan')
+
+    def to_dict(self):
+        """Convert concept to dictionary"""
+        return {
+            'id': self.id,
+            'key': self.key,
+            'label': self.label,
+            'language': self.language,
+            'course': self.course,
+            'user_id': self.user_id,
+            'document_count': self.document_count
+        }
+
+class ConceptPosting(db.Model):
+    """A document mentioning a concept"""
+    __tablename__ = 'concept_postings'
+    __table_args__ = (
+        db.UniqueConstraint('concept_id', 'document_type', 'document_id', name='uq_concept_postings_document'),
+        db.Index('ix_concept_postings_document', 'document_type', 'document_id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    concept_id = db.Column(db.Integer, db.ForeignKey('concepts.id'), nullable=False)
+    document_type = db.Column(db.String(20), nullable=False)  # 'upload', 'resource' or 'question'
+    document_id = db.Column(db.String(64), nullable=False)
+    count = db.Column(db.Integer, default=1)  # Mentions in the document
+    linked = db.Column(db.Boolean, default=False)  # Counted in the co-occurrences of the document
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class ConceptCooccurrence(db.Model):
+    """Number of documents two concepts appear in together, stored in both directions"""
+    __tablename__ = 'concept_cooccurrences'
+
+    concept_id = db.Column(db.Integer, db.ForeignKey('concepts.id'), primary_key=True)
+    related_concept_id = db.Column(db.Integer, db.ForeignKey('concepts.id'), primary_key=True)
+    count = db.Column(db.Integer, default=0)
+
+    # Relationships
+    related_concept = db.relationship('Concept', foreign_keys=[related_concept_id])
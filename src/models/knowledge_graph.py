@@ -0,0 +1,75 @@
+"""Knowledge graph models"""
+from datetime import datetime
+from src.extensions import db
+
+class KnowledgeNode(db.Model):
+    """A concept of a user's knowledge graph, optionally within a course"""
+    __tablename__ = 'knowledge_nodes'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'course', 'key', name='uq_knowledge_nodes_scope_key'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    key = db.Column(db.String(200), nullable=False, index=True)  # Normalized label
+    label = db.Column(db.String(200), nullable=False)
+    node_type = db.Column(db.String(50), default='concept')  # 'term', an entity type or 'concept'
+    definition = db.Column(db.Text)
+    course = db.Column(db.String(100))
+    mention_count = db.Column(db.Integer, default=0)
+    document_count = db.Column(db.Integer, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Foreign keys
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'))  # Empty for anonymous uploads
+
+    def to_dict(self):
+        """Convert node to dictionary"""
+        return {
+            'id': self.id,
+            'key': self.key,
+            'label': self.label,
+            'type': self.node_type,
+            'definition': self.definition,
+            'course': self.course,
+            'mentions': self.mention_count,
+            'documents': self.document_count
+        }
+
+class KnowledgeEdge(db.Model):
+    """A relation between two nodes, weighted by how often it was found"""
+    __tablename__ = 'knowledge_edges'
+    __table_args__ = (
+        db.UniqueConstraint('source_id', 'target_id', 'relation', name='uq_knowledge_edges_relation'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    source_id = db.Column(db.Integer, db.ForeignKey('knowledge_nodes.id'), nullable=False)
+    target_id = db.Column(db.Integer, db.ForeignKey('knowledge_nodes.id'), nullable=False, index=True)
+    relation = db.Column(db.String(100), nullable=False)
+    weight = db.Column(db.Integer, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        """Convert edge to dictionary"""
+        return {
+            'id': self.id,
+            'source': self.source_id,
+            'target': self.target_id,
+            'relation': self.relation,
+            'weight': self.weight
+        }
+
+class KnowledgeGraphDocument(db.Model):
+    """A document already merged into the knowledge graph"""
+    __tablename__ = 'knowledge_graph_documents'
+    __table_args__ = (
+        db.UniqueConstraint('document_type', 'document_id', name='uq_knowledge_graph_documents_document'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    document_type = db.Column(db.String(20), nullable=False)  # 'upload', 'resource' or 'question'
+    document_id = db.Column(db.String(64), nullable=False)
+    course = db.Column(db.String(100))
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -2,6 +2,14 @@
 from src.routes.qa import qa_bp
 from src.routes.resource_library import resource_library_bp
 from src.routes.accessibility import accessibility_bp
+from src.routes.jobs import jobs_bp
+from src.routes.system import system_bp
+from src.routes.uploads import uploads_bp
+from src.routes.summaries import summaries_bp
+from src.routes.concepts import concepts_bp
+from src.routes.knowledge_graph import knowledge_graph_bp
+from src.routes.analysis import analysis_bp
+from src.routes.pages import pages_bp
 from flask import Blueprint, jsonify
 
 # Create a basic blueprint for testing
@@ -18,3 +26,11 @@ def init_routes(app):
     app.register_blueprint(qa_bp, url_prefix='/api')
     app.register_blueprint(resource_library_bp, url_prefix='/api')
     app.register_blueprint(accessibility_bp, url_prefix='/api')
+    app.register_blueprint(jobs_bp, url_prefix='/api')
+    app.register_blueprint(system_bp, url_prefix='/api')
+    app.register_blueprint(uploads_bp, url_prefix='/api')
+    app.register_blueprint(summaries_bp, url_prefix='/api')
+    app.register_blueprint(concepts_bp, url_prefix='/api')
+    app.register_blueprint(knowledge_graph_bp, url_prefix='/api')
+    app.register_blueprint(analysis_bp, url_prefix='/api')
+    app.register_blueprint(pages_bp)
@@ -0,0 +1,94 @@
+"""Upload and text analysis routes"""
+import os
+import uuid
+from flask import Blueprint, jsonify, request, url_for
+from werkzeug.utils import secure_filename
+from src.extensions import job_queue
+from src.routes.auth import auth_service
+from src.services.chunked_upload import UPLOAD_FOLDER as DEFAULT_UPLOAD_FOLDER
+from src.services.file_types import UnsupportedFileType, sniff_stream
+from src.services.workload_pools import PoolSaturated, workload_pools
+
+analysis_bp = Blueprint('analysis', __name__)
+
+# Folder single-request uploads are saved to before processing
+UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER', DEFAULT_UPLOAD_FOLDER)
+
+# Job handlers are referenced by path so importing the routes doesn't load the analysis stack
+UPLOAD_JOB = 'src.services.analysis_pipeline:run_upload_job'
+ANALYZE_JOB = 'src.services.analysis_pipeline:run_analyze_job'
+
+@analysis_bp.route('/upload', methods=['POST'])
+def upload_file():
+    """Accept a file upload and queue it for processing
+
+    Signed-in users' uploads go to their own concept index, under the
+    optional ``course`` form field; anonymous uploads share one.
+    """
+    user_id = None
+    auth_header = request.headers.get('Authorization')
+    if auth_header and auth_header.startswith('Bearer '):
+        try:
+            user_id = auth_service.validate_token(auth_header.split(' ')[1]).id
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 401
+
+    if 'file' not in request.files:
+        return jsonify({"error": "No file provided"}), 400
+
+    file = request.files['file']
+    if file.filename == '':
+        return jsonify({"error": "No file selected"}), 400
+
+    filename = secure_filename(file.filename)
+    try:
+        # Identify the file from its first bytes so unsupported files are never written to disk
+        file_type = sniff_stream(file.stream, filename)
+        workload_pools.check_capacity(file_type.workloads)
+    except UnsupportedFileType as e:
+        return jsonify({"error": str(e)}), 415
+    except PoolSaturated as e:
+        response = jsonify({"error": str(e), "retry_after": e.retry_after})
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response, 503
+
+    try:
+        # Prefix with a unique id so concurrent uploads of the same name don't collide
+        os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+        file_path = os.path.join(UPLOAD_FOLDER, f"{uuid.uuid4().hex}_{filename}")
+
+        # Save the file
+        file.save(file_path)
+
+        # Language hint from the request, used when it cannot be detected from the text
+        language = request.form.get('language') or None
+
+        # Process the file in the background
+        job_id = job_queue.enqueue(UPLOAD_JOB, file_path=file_path, filename=filename, language=language,
+                                   mime_type=file_type.mime_type, user_id=user_id,
+                                   course=request.form.get('course') or None)
+
+        return jsonify(_job_accepted(job_id)), 202
+    except Exception as e:
+        return jsonify({"error": f"An error occurred: {str(e)}"}), 500
+
+@analysis_bp.route('/analyze', methods=['POST'])
+def analyze_text():
+    """Queue analysis of provided text content"""
+    data = request.get_json(silent=True)
+    if not data or 'text' not in data:
+        return jsonify({"error": "No text provided"}), 400
+
+    try:
+        job_id = job_queue.enqueue(ANALYZE_JOB, text=data['text'], language=data.get('language'))
+        return jsonify(_job_accepted(job_id)), 202
+    except Exception as e:
+        return jsonify({"error": f"An error occurred: {str(e)}"}), 500
+
+def _job_accepted(job_id):
+    """Response body for a newly queued job"""
+    return {
+        "job_id": job_id,
+        "status": "queued",
+        "status_url": url_for('jobs.get_job', job_id=job_id)
+    }
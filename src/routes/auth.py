@@ -1,3 +1,4 @@
+from functools import wraps
 from flask import Blueprint, request, jsonify
 from src.services.auth_service import AuthService
 
@@ -37,6 +38,7 @@ def login():
 
 def auth_required(f):
     """Decorator to require authentication"""
+    @wraps(f)
     def decorated(*args, **kwargs):
         auth_header = request.headers.get('Authorization')
         
@@ -0,0 +1,37 @@
+"""Concept index routes"""
+from flask import Blueprint, jsonify, request
+from src.routes.auth import auth_required
+from src.services.concept_index import DOCUMENT_TYPES, concept_index
+
+concepts_bp = Blueprint('concepts', __name__)
+
+@concepts_bp.route('/concepts/<path:term>/documents', methods=['GET'])
+@auth_required
+def concept_documents(current_user, term):
+    """List the current user's uploads, resources and questions that mention a concept"""
+    document_type = request.args.get('type')
+    if document_type is not None and document_type not in DOCUMENT_TYPES:
+        return jsonify({'error': f"type must be one of {', '.join(DOCUMENT_TYPES)}"}), 400
+
+    documents = concept_index.documents_for(
+        term,
+        user_id=current_user.id,
+        course=request.args.get('course'),
+        document_type=document_type,
+        language=request.args.get('language', 'en'),
+        limit=request.args.get('limit', 20, type=int)
+    )
+    return jsonify({'term': term, 'documents': documents}), 200
+
+@concepts_bp.route('/concepts/<path:term>/related', methods=['GET'])
+@auth_required
+def related_concepts(current_user, term):
+    """List the concepts found together with a concept in the current user's documents"""
+    related = concept_index.related_concepts(
+        term,
+        user_id=current_user.id,
+        course=request.args.get('course'),
+        language=request.args.get('language', 'en'),
+        limit=request.args.get('limit', 10, type=int)
+    )
+    return jsonify({'term': term, 'related': related}), 200
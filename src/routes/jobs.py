@@ -0,0 +1,43 @@
+"""Background job routes"""
+import os
+import time
+from flask import Blueprint, jsonify
+from src.extensions import job_queue
+from src.routes.sse import event_stream
+from src.services.job_queue import FAILED, FINISHED
+
+jobs_bp = Blueprint('jobs', __name__)
+
+# How often an event stream checks its job for progress
+EVENTS_POLL_SECONDS = float(os.environ.get('JOB_EVENTS_POLL_SECONDS', 0.5))
+
+@jobs_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Get the state, per-stage progress and result of a job"""
+    job = job_queue.get_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job), 200
+
+@jobs_bp.route('/jobs/<job_id>/events', methods=['GET'])
+def stream_job_events(job_id):
+    """Stream a job's progress and partial results as server-sent events until it ends"""
+    if job_queue.get_job(job_id) is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return event_stream(_job_events(job_id))
+
+def _job_events(job_id):
+    """A ``progress`` event whenever the job's stages change, then ``finished`` or ``failed``"""
+    previous = None
+    while True:
+        job = job_queue.get_job(job_id)
+        if job is None:
+            return
+        if job['state'] in (FINISHED, FAILED):
+            yield job['state'], job
+            return
+        snapshot = (job['state'], job['stages'])
+        if snapshot != previous:
+            previous = snapshot
+            yield 'progress', {key: job[key] for key in ('id', 'state', 'stages', 'progress')}
+        time.sleep(EVENTS_POLL_SECONDS)
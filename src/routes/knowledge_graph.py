@@ -0,0 +1,30 @@
+"""Knowledge graph routes"""
+from flask import Blueprint, jsonify, request
+from src.routes.auth import auth_required
+from src.services.knowledge_graph_store import knowledge_graph_store
+
+knowledge_graph_bp = Blueprint('knowledge_graph', __name__)
+
+# Largest page of nodes a client may ask for
+MAX_PER_PAGE = 200
+
+@knowledge_graph_bp.route('/knowledge-graph/<path:term>', methods=['GET'])
+@auth_required
+def concept_neighbourhood(current_user, term):
+    """Page through the current user's knowledge graph around a concept"""
+    depth = request.args.get('depth', 1, type=int)
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', 50, type=int)
+    if depth < 0 or page < 1 or not 1 <= per_page <= MAX_PER_PAGE:
+        return jsonify({'error': f"depth and page must be positive and per_page at most {MAX_PER_PAGE}"}), 400
+
+    neighbourhood = knowledge_graph_store.neighbourhood(
+        term,
+        user_id=current_user.id,
+        course=request.args.get('course'),
+        depth=depth,
+        page=page,
+        per_page=per_page,
+        language=request.args.get('language', 'en')
+    )
+    return jsonify(neighbourhood), 200
@@ -0,0 +1,15 @@
+"""Page and uploaded file routes"""
+from flask import Blueprint, render_template, send_from_directory
+from src.routes import analysis
+
+pages_bp = Blueprint('pages', __name__)
+
+@pages_bp.route('/')
+def index():
+    """Render the upload page"""
+    return render_template('upload.html')
+
+@pages_bp.route('/uploads/<filename>')
+def uploaded_file(filename):
+    """Serve uploaded files"""
+    return send_from_directory(analysis.UPLOAD_FOLDER, filename)
@@ -0,0 +1,16 @@
+"""Server-sent event responses"""
+import json
+from flask import Response, stream_with_context
+
+def format_event(event, data):
+    """One server-sent event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def event_stream(events):
+    """Stream ``(event, data)`` pairs to the client as they are produced"""
+    return Response(
+        stream_with_context(format_event(event, data) for event, data in events),
+        mimetype='text/event-stream',
+        # Proxies must pass each event on instead of buffering the response
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
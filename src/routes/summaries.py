@@ -0,0 +1,25 @@
+"""Summary routes"""
+from flask import Blueprint, jsonify, request
+from src.routes.sse import event_stream
+from src.services.language_detector import language_detector
+
+summaries_bp = Blueprint('summaries', __name__)
+
+@summaries_bp.route('/summaries/stream', methods=['POST'])
+def stream_summary():
+    """Stream each chunk's summary and the bullet points as server-sent events as soon as they are ready"""
+    data = request.get_json(silent=True) or {}
+    text = data.get('text', '')
+    if not text.strip():
+        return jsonify({'error': 'No text provided'}), 400
+
+    try:
+        max_length = int(data.get('max_length', 150))
+        min_length = int(data.get('min_length', 50))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'max_length and min_length must be integers'}), 400
+
+    from src.services.analysis_pipeline import get_pipeline
+    language = language_detector.detect(text, data.get('language')).language
+    summarizer = get_pipeline().summarizer
+    return event_stream(summarizer.iter_summary(text, language, max_length, min_length))
@@ -0,0 +1,53 @@
+"""System status routes"""
+import math
+from flask import Blueprint, jsonify, request
+from src.routes.auth import auth_required
+from src.services.model_registry import model_registry
+from src.services.startup import startup
+from src.services.workload_pools import workload_pools
+
+system_bp = Blueprint('system', __name__)
+
+@system_bp.route('/system/cache', methods=['GET'])
+def get_cache_stats():
+    """Get analysis cache size and hit/miss counters"""
+    from src.services.analysis_pipeline import analysis_cache
+    return jsonify(analysis_cache.stats()), 200
+
+@system_bp.route('/system/models', methods=['GET'])
+def get_model_memory():
+    """Get load state and resident memory of each shared model"""
+    return jsonify(model_registry.memory_report()), 200
+
+@system_bp.route('/system/models/unload', methods=['POST'])
+@auth_required
+def unload_models(current_user):
+    """Unload one model by name, or every model idle for longer than idle_seconds"""
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Request body must be a JSON object'}), 400
+    if 'name' in data:
+        if not isinstance(data['name'], str):
+            return jsonify({'error': 'name must be a string'}), 400
+        unloaded = [data['name']] if model_registry.unload(data['name']) else []
+        return jsonify({'unloaded': unloaded}), 200
+
+    if 'idle_seconds' not in data:
+        return jsonify({'error': 'name or idle_seconds is required'}), 400
+    try:
+        idle_seconds = float(data['idle_seconds'])
+        if isinstance(data['idle_seconds'], bool) or not math.isfinite(idle_seconds) or idle_seconds < 0:
+            raise ValueError
+    except (TypeError, ValueError):
+        return jsonify({'error': 'idle_seconds must be a non-negative number'}), 400
+    return jsonify({'unloaded': model_registry.unload_idle(idle_seconds)}), 200
+
+@system_bp.route('/system/startup', methods=['GET'])
+def get_startup_report():
+    """Get startup phase timings, warm-up state and model load times"""
+    return jsonify(startup.report()), 200
+
+@system_bp.route('/system/pools', methods=['GET'])
+def get_pool_stats():
+    """Get queue depth, queue wait and processing time of each file-processing pool"""
+    return jsonify(workload_pools.stats()), 200
@@ -0,0 +1,122 @@
+"""Resumable chunked upload routes"""
+from flask import Blueprint, jsonify, request, url_for
+from src.extensions import job_queue
+from src.routes.auth import auth_service
+from src.services.chunked_upload import ChunkedUploadService, ChecksumMismatch, OffsetMismatch, UploadNotFound
+from src.services.file_types import UnsupportedFileType, get_file_type
+from src.services.workload_pools import PoolSaturated, workload_pools
+
+uploads_bp = Blueprint('uploads', __name__)
+chunked_upload_service = ChunkedUploadService()
+
+# Referenced by path so the analysis stack is only imported by the job workers
+UPLOAD_JOB = 'src.services.analysis_pipeline:run_upload_job'
+
+@uploads_bp.route('/uploads', methods=['POST'])
+def init_upload():
+    """Start a chunked upload"""
+    data = request.get_json(silent=True) or {}
+
+    try:
+        size = data.get('size')
+        session = chunked_upload_service.init(
+            filename=data.get('filename'),
+            size=int(size) if size is not None else None,
+            language=data.get('language'),
+            checksum=data.get('checksum')
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    session['upload_url'] = url_for('uploads.append_chunk', upload_id=session['upload_id'])
+    return jsonify(session), 201
+
+@uploads_bp.route('/uploads/<upload_id>', methods=['PATCH'])
+def append_chunk(upload_id):
+    """Append the request body at the offset given in the Upload-Offset header"""
+    offset = request.headers.get('Upload-Offset', type=int)
+    if offset is None:
+        return jsonify({'error': 'Upload-Offset header is required'}), 400
+    if request.content_length and request.content_length > chunked_upload_service.max_chunk_size:
+        return jsonify({'error': 'Chunk too large'}), 413
+
+    try:
+        session = chunked_upload_service.append(
+            upload_id, offset, request.stream, chunk_checksum=request.headers.get('Upload-Checksum'))
+    except UploadNotFound as e:
+        return jsonify({'error': str(e)}), 404
+    except OffsetMismatch as e:
+        # The client resumes from the offset the server actually has
+        return jsonify({'error': str(e), 'offset': e.expected}), 409
+    except ChecksumMismatch as e:
+        return jsonify({'error': str(e)}), 422
+    except UnsupportedFileType as e:
+        return jsonify({'error': str(e)}), 415
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(session), 200
+
+@uploads_bp.route('/uploads/<upload_id>', methods=['GET'])
+def get_upload(upload_id):
+    """Get the offset an interrupted upload should resume from"""
+    try:
+        return jsonify(chunked_upload_service.status(upload_id)), 200
+    except UploadNotFound as e:
+        return jsonify({'error': str(e)}), 404
+
+@uploads_bp.route('/uploads/<upload_id>/finalize', methods=['POST'])
+def finalize_upload(upload_id):
+    """Complete an upload and queue the file for processing
+
+    Signed-in users' uploads go to their own concept index, under the
+    optional ``course`` of the request; anonymous uploads share one.
+    """
+    data = request.get_json(silent=True) or {}
+    user_id = None
+    auth_header = request.headers.get('Authorization')
+    if auth_header and auth_header.startswith('Bearer '):
+        try:
+            user_id = auth_service.validate_token(auth_header.split(' ')[1]).id
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 401
+
+    try:
+        # Check capacity first so a busy server leaves the upload intact for a later retry
+        session = chunked_upload_service.status(upload_id)
+        if session['mime_type']:
+            workload_pools.check_capacity(get_file_type(session['mime_type'], session['filename']).workloads)
+        upload = chunked_upload_service.finalize(upload_id, checksum=data.get('checksum'))
+    except PoolSaturated as e:
+        return _busy(e)
+    except UploadNotFound as e:
+        return jsonify({'error': str(e)}), 404
+    except ChecksumMismatch as e:
+        return jsonify({'error': str(e)}), 422
+    except UnsupportedFileType as e:
+        return jsonify({'error': str(e)}), 415
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    job_id = job_queue.enqueue(UPLOAD_JOB, file_path=upload['file_path'], filename=upload['filename'],
+                               language=data.get('language', upload['language']), mime_type=upload['mime_type'],
+                               user_id=user_id, course=data.get('course'))
+    return jsonify({
+        'job_id': job_id,
+        'status': 'queued',
+        'status_url': url_for('jobs.get_job', job_id=job_id),
+        'checksum': upload['checksum']
+    }), 202
+
+@uploads_bp.route('/uploads/<upload_id>', methods=['DELETE'])
+def abort_upload(upload_id):
+    """Cancel an upload"""
+    try:
+        chunked_upload_service.abort(upload_id)
+    except UploadNotFound as e:
+        return jsonify({'error': str(e)}), 404
+    return '', 204
+
+def _busy(error):
+    response = jsonify({'error': str(error), 'retry_after': error.retry_after})
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response, 503
@@ -0,0 +1,177 @@
+"""Content-addressed cache for analysis pipeline results"""
+import hashlib
+import os
+import re
+import threading
+import unicodedata
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from sqlalchemy.exc import IntegrityError
+
+from src.extensions import db
+from src.models.analysis import AnalysisResult
+
+CACHE_ANALYSIS_TYPE = 'content_analysis'
+
+
+class AnalysisCache:
+    """Persistent cache of analysis results with LRU and TTL eviction
+
+    Entries live in the ``analysis_results`` table and are keyed on a SHA-256
+    digest of the normalized text, the language and the pipeline version, so
+    identical uploads are reused across workers and restarts.
+    """
+
+    def __init__(self, pipeline_version: str, max_entries: Optional[int] = None,
+                 ttl_seconds: Optional[int] = None, visualizations_folder: Optional[str] = None):
+        self.pipeline_version = pipeline_version
+        self.max_entries = max_entries if max_entries is not None else int(
+            os.environ.get('ANALYSIS_CACHE_MAX_ENTRIES', 1000))
+        self.ttl = timedelta(seconds=ttl_seconds if ttl_seconds is not None else int(
+            os.environ.get('ANALYSIS_CACHE_TTL', 30 * 24 * 3600)))
+        self.visualizations_folder = visualizations_folder
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def normalize_text(text: str) -> str:
+        """Normalize unicode and whitespace so trivially different copies share a key"""
+        text = unicodedata.normalize('NFC', text)
+        return re.sub(r'\s+', ' ', text).strip()
+
+    def make_key(self, text: str, language: str, variant: str = '') -> str:
+        """Stable digest of the normalized text, language and pipeline version
+
+        ``variant`` separates results computed differently from the same
+        text, such as windows of a larger document analyzed without
+        visualizations.
+        """
+        digest = hashlib.sha256()
+        digest.update(f"{self.pipeline_version}\0{language}\0".encode('utf-8'))
+        if variant:
+            digest.update(f"{variant}\0".encode('utf-8'))
+        digest.update(self.normalize_text(text).encode('utf-8'))
+        return digest.hexdigest()
+
+    def combine_keys(self, keys: List[str], language: str) -> str:
+        """Key of a document analyzed window by window, derived from its window keys"""
+        digest = hashlib.sha256()
+        digest.update(f"{self.pipeline_version}\0{language}\0document\0".encode('utf-8'))
+        for key in keys:
+            digest.update(key.encode('ascii'))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached result for a key, or None on a miss"""
+        entry = AnalysisResult.query.filter_by(cache_key=key).first()
+        if entry is not None and (self._is_expired(entry) or not self._visualizations_exist(entry)):
+            self._delete(entry)
+            db.session.commit()
+            entry = None
+
+        if entry is None:
+            self._count('misses')
+            return None
+
+        entry.hit_count = (entry.hit_count or 0) + 1
+        entry.last_accessed_at = datetime.utcnow()
+        db.session.commit()
+        self._count('hits')
+        return {
+            'concepts': entry.concepts,
+            'visualizations': entry.visualization_paths,
+            'difficulty_assessment': entry.difficulty_assessment,
+            'summaries': entry.summaries
+        }
+
+    def set(self, key: str, language: str, result: Dict[str, Any], title: str = 'Text Analysis'):
+        """Store a pipeline result and evict entries beyond the configured limits"""
+        entry = AnalysisResult.query.filter_by(cache_key=key).first()
+        if entry is None:
+            entry = AnalysisResult(
+                cache_key=key,
+                analysis_type=CACHE_ANALYSIS_TYPE,
+                hit_count=0
+            )
+            db.session.add(entry)
+
+        entry.title = title[:200]
+        entry.language = language
+        entry.pipeline_version = self.pipeline_version
+        entry.concepts = result.get('concepts')
+        entry.difficulty_assessment = result.get('difficulty_assessment')
+        entry.summaries = result.get('summaries')
+        entry.visualization_paths = result.get('visualizations')
+        entry.last_accessed_at = datetime.utcnow()
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Another worker stored the same key first; its result is equivalent
+            db.session.rollback()
+            return
+
+        self.evict()
+
+    def evict(self) -> int:
+        """Drop expired entries, then the least recently used ones over the size limit"""
+        query = AnalysisResult.query.filter_by(analysis_type=CACHE_ANALYSIS_TYPE)
+        expired = query.filter(AnalysisResult.created_at < datetime.utcnow() - self.ttl).all()
+        for entry in expired:
+            self._delete(entry)
+
+        db.session.flush()
+
+        removed = len(expired)
+        overflow = query.count() - self.max_entries
+        if overflow > 0:
+            stale = query.order_by(AnalysisResult.last_accessed_at.asc()).limit(overflow).all()
+            for entry in stale:
+                self._delete(entry)
+            removed += len(stale)
+
+        db.session.commit()
+        self._count('evictions', removed)
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for this process and the size of the shared cache"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'entries': AnalysisResult.query.filter_by(analysis_type=CACHE_ANALYSIS_TYPE).count(),
+            'total_hits': db.session.query(db.func.sum(AnalysisResult.hit_count)).filter(
+                AnalysisResult.analysis_type == CACHE_ANALYSIS_TYPE).scalar() or 0,
+            'max_entries': self.max_entries,
+            'ttl_seconds': int(self.ttl.total_seconds()),
+            'pipeline_version': self.pipeline_version
+        }
+
+    def _is_expired(self, entry) -> bool:
+        return entry.pipeline_version != self.pipeline_version or \
+            entry.created_at < datetime.utcnow() - self.ttl
+
+    def _visualizations_exist(self, entry) -> bool:
+        if not self.visualizations_folder:
+            return True
+        return all(os.path.exists(self._visualization_file(path))
+                   for path in (entry.visualization_paths or {}).values() if path)
+
+    def _visualization_file(self, url_path):
+        return os.path.join(self.visualizations_folder, os.path.basename(url_path))
+
+    def _delete(self, entry):
+        if self.visualizations_folder:
+            for path in filter(None, (entry.visualization_paths or {}).values()):
+                file_path = self._visualization_file(path)
+                if os.path.exists(file_path):
+                    os.remove(file_path)
+        db.session.delete(entry)
+
+    def _count(self, counter, amount=1):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + amount)
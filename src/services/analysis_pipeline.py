@@ -0,0 +1,410 @@
+"""Content analysis pipeline run by the upload and analyze jobs"""
+import logging
+import os
+from functools import lru_cache, partial
+from itertools import chain
+
+from src.extensions import db
+from src.services import file_processor
+from src.services.file_types import detect_file_type, get_file_type
+from src.services.analysis_cache import AnalysisCache
+from src.services.analyzed_document import AnalyzedDocument
+from src.services.pipeline_orchestrator import PipelineOrchestrator, Stage
+from src.services.concept_extractor import ConceptExtractor
+from src.services.concept_index import concept_index
+from src.services.knowledge_graph_store import knowledge_graph_store
+from src.services.visualizer import Visualizer
+from src.services.difficulty_assessor import DifficultyAssessor
+from src.services.language_detector import language_detector as default_language_detector, summarize_detections
+from src.services.summarizer import Summarizer
+
+logger = logging.getLogger(__name__)
+
+VISUALIZATIONS_FOLDER = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'static', 'visualizations'
+)
+
+# Bump whenever a change to the services alters their output, to invalidate cached results
+PIPELINE_VERSION = '5'
+
+# Largest piece of a document analyzed in one pass; longer documents are analyzed window by window
+ANALYSIS_WINDOW_CHARS = int(os.environ.get('ANALYSIS_WINDOW_CHARS', 100000))
+
+# Shared by every pipeline in the process so hit/miss counters are aggregated
+analysis_cache = AnalysisCache(PIPELINE_VERSION, visualizations_folder=VISUALIZATIONS_FOLDER)
+
+
+class AnalysisPipeline:
+    def __init__(self, concept_extractor=None, visualizer=None, difficulty_assessor=None,
+                 summarizer=None, visualizations_folder=VISUALIZATIONS_FOLDER, cache=None, orchestrator=None,
+                 window_chars=ANALYSIS_WINDOW_CHARS, language_detector=None):
+        self.concept_extractor = concept_extractor or ConceptExtractor()
+        self.visualizer = visualizer or Visualizer()
+        self.difficulty_assessor = difficulty_assessor or DifficultyAssessor()
+        self.summarizer = summarizer or Summarizer()
+        self.visualizations_folder = visualizations_folder
+        os.makedirs(self.visualizations_folder, exist_ok=True)
+        self.cache = cache or analysis_cache
+        self.orchestrator = orchestrator or PipelineOrchestrator()
+        self.window_chars = window_chars
+        self.language_detector = language_detector or default_language_detector
+
+    def analyze(self, text, language=None, title='Text Analysis', job=None):
+        """Run concept extraction, visualization, difficulty and summaries over a text
+
+        The text is routed to the models of the language detected in it;
+        ``language`` is only used when detection is unsure. A text mixing
+        languages is analyzed one language run at a time. Results are served
+        from the analysis cache when the same text was already analyzed in
+        this language by the current pipeline version.
+        """
+        segments = self.language_detector.segments(text, language)
+        if len(segments) > 1:
+            return self._analyze_windows(segments, title, job)
+
+        detection = segments[0][1]
+        result = self._analyze_cached(self.cache.make_key(text, detection.language), text, detection.language,
+                                      title, job)
+        result['language'] = summarize_detections([(len(segment), detection) for segment, detection in segments])
+        return result
+
+    def analyze_stream(self, chunks, language=None, title='Text Analysis', job=None):
+        """Analyze a document delivered as an iterable of text chunks
+
+        Chunks are grouped into windows of at most ``window_chars``
+        characters that are analyzed one after the other, so memory stays
+        bounded by the window size instead of the document size. A document
+        that fits in a single window is analyzed exactly like ``analyze``;
+        the results of longer ones are merged and visualized as a whole.
+        Each window is routed to the models of its own language.
+        """
+        windows = iter_windows(chunks, self.window_chars)
+        first = next(windows, '')
+        second = next(windows, None)
+        if second is None:
+            return self.analyze(first, language, title, job)
+
+        segments = (segment for window in chain([first, second], windows)
+                    for segment in self.language_detector.segments(window, language))
+        return self._analyze_windows(segments, title, job)
+
+    def _analyze_windows(self, segments, title, job):
+        """Analyze ``(text, detection)`` windows one after the other and merge their results"""
+        window_results = []
+        detections = []
+        for window, detection in segments:
+            key = self.cache.make_key(window, detection.language, variant='window')
+            window_results.append((len(window), self._analyze_cached(
+                key, window, detection.language, title, job, render=False)))
+            detections.append((len(window), detection))
+        report = summarize_detections(detections)
+        language = report['language']
+
+        cache_key = self.cache.combine_keys([r['cache']['key'] for _, r in window_results], language)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            cached['cache'] = {'key': cache_key, 'hit': True, 'windows': len(window_results)}
+            cached['language'] = report
+            return cached
+
+        result = self._merge_windows(window_results, language, title, f"analysis_{cache_key[:32]}")
+        if 'errors' not in result:
+            self._cache_set(cache_key, language, result, title)
+        result['cache'] = {'key': cache_key, 'hit': False, 'windows': len(window_results)}
+        result['language'] = report
+        return result
+
+    def _analyze_cached(self, cache_key, text, language, title, job, render=True):
+        """Serve a result from the cache, or run the stages and cache their result"""
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            cached['cache'] = {'key': cache_key, 'hit': True}
+            return cached
+
+        result = self._run(text, language, title, f"analysis_{cache_key[:32]}", job, render)
+        if 'errors' not in result:
+            # Partial results are returned but never cached
+            self._cache_set(cache_key, language, result, title)
+        result['cache'] = {'key': cache_key, 'hit': False}
+        return result
+
+    def _cache_get(self, cache_key):
+        """Cached result for a key; an unavailable cache counts as a miss"""
+        try:
+            return self.cache.get(cache_key)
+        except Exception:
+            logger.exception("Could not read analysis cache entry %s", cache_key)
+            _rollback_cache_session()
+            return None
+
+    def _cache_set(self, cache_key, language, result, title):
+        """Cache a result; a failure to store it does not fail the analysis"""
+        try:
+            self.cache.set(cache_key, language, result, title)
+        except Exception:
+            logger.exception("Could not store analysis cache entry %s", cache_key)
+            _rollback_cache_session()
+
+    def _merge_windows(self, window_results, language, title, viz_prefix):
+        """Combine per-window results and render visualizations for the whole document"""
+        errors = {}
+        for index, (_, result) in enumerate(window_results):
+            for stage_name, error in result.get('errors', {}).items():
+                errors[f"window_{index}.{stage_name}"] = error
+
+        concepts = self.concept_extractor.merge_concepts(
+            [r['concepts'] for _, r in window_results if r['concepts']])
+        assessed = [(length, r['difficulty_assessment']) for length, r in window_results
+                    if r['difficulty_assessment']]
+        difficulty = self.difficulty_assessor.combine_assessments(
+            [a for _, a in assessed], [length for length, _ in assessed]) if assessed else None
+        summaries = self.summarizer.combine_summaries([r['summaries'] for _, r in window_results], language)
+
+        visualizations = {'mind_map': None, 'knowledge_graph': None}
+        for name, render, args in (
+                ('mind_map', self.render_mind_map, (title, f"{viz_prefix}_mindmap.html")),
+                ('knowledge_graph', self.render_knowledge_graph, (f"{viz_prefix}_knowledge_graph.html",))):
+            try:
+                render(concepts, *args)
+                visualizations[name] = f"/static/visualizations/{args[-1]}"
+            except Exception as e:
+                errors[name] = str(e) or e.__class__.__name__
+
+        result = {
+            'concepts': concepts,
+            'visualizations': visualizations,
+            'difficulty_assessment': difficulty,
+            'summaries': summaries
+        }
+        if errors:
+            result['errors'] = errors
+        return result
+
+    def _run(self, text, language, title, viz_prefix, job, render=True):
+        """Fan the independent stages out over the orchestrator's worker pool"""
+        viz_filename = f"{viz_prefix}_mindmap.html"
+        graph_filename = f"{viz_prefix}_knowledge_graph.html"
+        stage = self._stage_callable
+
+        if self.orchestrator.executor_type == 'process':
+            # Parsed documents don't cross process boundaries; each worker parses the text itself
+            stages = []
+            document_stage = {'args': (text, language)}
+            document_method = self._document_stage_callable
+        else:
+            # Parse once and share the document between the stages that need it
+            stages = [Stage('parse', self.parse, (text, language))]
+            document_stage = {'depends_on': 'parse'}
+            document_method = stage
+
+        stages.append(Stage('concepts', document_method('extract_concepts'), **document_stage))
+        if render:
+            stages += [
+                Stage('mind_map', stage('render_mind_map'), (title, viz_filename), depends_on='concepts'),
+                Stage('knowledge_graph', stage('render_knowledge_graph'), (graph_filename,), depends_on='concepts')
+            ]
+        summarize_paragraph = stage('summarize_paragraph')
+        if job and self.orchestrator.executor_type != 'process':
+            # Publish each chunk's summary on the job as soon as it is ready
+            summarize_paragraph = partial(summarize_paragraph,
+                                          on_chunk=partial(job.add_partial_result, 'paragraph_summary'))
+        stages += [
+            Stage('difficulty', document_method('assess_difficulty'), **document_stage),
+            Stage('paragraph_summary', summarize_paragraph, (text, language)),
+            Stage('bullet_points', document_method('summarize_bullet_points'), **document_stage)
+        ]
+        if job:
+            job.declare_stages([s.name for s in stages])
+        results, errors = self.orchestrator.run(stages, job=job)
+
+        result = {
+            'concepts': results.get('concepts'),
+            'visualizations': {
+                'mind_map': f"/static/visualizations/{viz_filename}" if 'mind_map' in results else None,
+                'knowledge_graph': f"/static/visualizations/{graph_filename}" if 'knowledge_graph' in results else None
+            },
+            'difficulty_assessment': results.get('difficulty'),
+            'summaries': {
+                'paragraph': results.get('paragraph_summary'),
+                'bullet_points': results.get('bullet_points')
+            }
+        }
+        if errors:
+            result['errors'] = errors
+        return result
+
+    def _stage_callable(self, method):
+        """Stage function for the configured pool; process workers use their own pipeline"""
+        if self.orchestrator.executor_type == 'process':
+            return partial(_call_pipeline_method, method)
+        return getattr(self, method)
+
+    def _document_stage_callable(self, method):
+        """Process pool stage function that parses the text before calling a document method"""
+        return partial(_call_pipeline_document_method, method)
+
+    def parse(self, text, language):
+        return AnalyzedDocument.parse(text, language)
+
+    def extract_concepts(self, document):
+        return self.concept_extractor.extract_concepts_from_document(document)
+
+    def render_mind_map(self, concepts, title, filename):
+        mind_map = self.visualizer.create_mind_map(concepts, title)
+        self.visualizer.save_visualization(mind_map, os.path.join(self.visualizations_folder, filename))
+
+    def render_knowledge_graph(self, concepts, filename):
+        graph = self.concept_extractor.generate_knowledge_graph(concepts)
+        graph_viz = self.visualizer.create_knowledge_graph(graph)
+        self.visualizer.save_visualization(graph_viz, os.path.join(self.visualizations_folder, filename))
+
+    def assess_difficulty(self, document):
+        return self.difficulty_assessor.assess_document(document)
+
+    def summarize_paragraph(self, text, language, on_chunk=None):
+        return self.summarizer.generate_summary(text, language, summary_type='paragraph', on_chunk=on_chunk)
+
+    def summarize_bullet_points(self, document):
+        return self.summarizer.generate_summary_from_document(document, summary_type='bullet_points')
+
+
+_pipeline = None
+
+
+def get_pipeline():
+    """Return the process-wide pipeline, building its services on first use"""
+    global _pipeline
+    if _pipeline is None:
+        _pipeline = AnalysisPipeline()
+    return _pipeline
+
+
+def iter_windows(chunks, max_chars):
+    """Group text chunks into newline-joined windows of at most ``max_chars`` characters"""
+    window = []
+    size = 0
+    for chunk in chunks:
+        # Chunks longer than a window are split at the last space that fits
+        while len(chunk) > max_chars:
+            cut = chunk.rfind(' ', 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            if window:
+                yield '\n'.join(window)
+                window, size = [], 0
+            yield chunk[:cut]
+            chunk = chunk[cut:].lstrip()
+
+        if window and size + len(chunk) > max_chars:
+            yield '\n'.join(window)
+            window, size = [], 0
+        window.append(chunk)
+        size += len(chunk) + 1
+    if window:
+        yield '\n'.join(window)
+
+
+def run_upload_job(job, file_path, filename, language=None, mime_type=None, user_id=None, course=None):
+    """Job handler: process an uploaded file and analyze its text content
+
+    ``mime_type`` is the type sniffed from the upload stream, so the file is
+    not sniffed again. Text documents are streamed into the pipeline as they
+    are extracted, so the whole document is analyzed without ever being held
+    in memory at once. Audio and video transcripts are published segment by
+    segment on the job as they are recognized. The concepts of a text
+    document are added to the concept index of ``user_id`` and ``course``
+    under the job id.
+    """
+    try:
+        job.declare_stages(['extract'])
+        file_type = get_file_type(mime_type, filename) if mime_type else detect_file_type(file_path)
+        category = file_type.category
+        if category in ('audio', 'video'):
+            process = file_processor.process_audio if category == 'audio' else file_processor.process_video
+            with job.stage('extract'):
+                return process(file_path, on_segment=partial(job.add_partial_result, 'extract'))
+        if category != 'text':
+            with job.stage('extract'):
+                return file_processor.process_file(file_path, file_type)
+
+        stats = file_processor.ExtractionStats()
+        preview = []
+        preview_length = 0
+
+        def chunks():
+            nonlocal preview_length
+            for chunk in file_processor.iter_text(
+                    file_path, stats, on_progress=lambda p: job.set_progress('extract', p), file_type=file_type):
+                if preview_length < file_processor.PREVIEW_LENGTH:
+                    preview.append(chunk)
+                    preview_length += len(chunk) + 1
+                yield chunk
+
+        with job.stage('extract'):
+            basename = os.path.splitext(filename)[0]
+            analysis = get_pipeline().analyze_stream(chunks(), language, title=basename, job=job)
+
+        result = {
+            'type': 'text',
+            'content': '\n'.join(preview)[:file_processor.PREVIEW_LENGTH],
+            'length': stats.characters,
+            'extraction': stats.to_dict()
+        }
+        result.update(analysis)
+        _index_concepts('upload', job.id, result, user_id, course)
+        return result
+    finally:
+        # Clean up the uploaded file after processing
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+
+def run_analyze_job(job, text, language=None):
+    """Job handler: analyze raw text submitted to /api/analyze"""
+    return get_pipeline().analyze(text, language, job=job)
+
+
+def run_index_job(job, document_type, document_id, text, language=None, user_id=None, course=None):
+    """Job handler: extract the concepts of a library resource or question into the concept index and graph"""
+    pipeline = get_pipeline()
+    language = pipeline.language_detector.detect(text, language).language
+    concepts = pipeline.extract_concepts(pipeline.parse(text, language))
+    indexed = concept_index.index_document(document_type, document_id, concepts, user_id, course, language)
+    knowledge_graph_store.merge_document(document_type, document_id, concepts, user_id, course, language)
+    return {'document_type': document_type, 'document_id': str(document_id), 'concepts': indexed}
+
+
+def _index_concepts(document_type, document_id, result, user_id, course):
+    """Add the concepts of an analysis to the index and graph; a failure there does not fail the analysis"""
+    if not result.get('concepts'):
+        return
+    for store, add in ((concept_index, concept_index.index_document),
+                       (knowledge_graph_store, knowledge_graph_store.merge_document)):
+        try:
+            add(document_type, document_id, result['concepts'], user_id, course, result['language']['language'])
+        except Exception:
+            store.db.rollback()
+            logger.exception("Could not index the concepts of %s %s", document_type, document_id)
+
+
+def _rollback_cache_session():
+    """Discard a cache transaction left broken by a failed read or write"""
+    try:
+        db.session.rollback()
+    except Exception:
+        logger.debug("No cache session to roll back", exc_info=True)
+
+
+def _call_pipeline_method(method, *args):
+    """Entry point for stages running in a process pool worker"""
+    return getattr(get_pipeline(), method)(*args)
+
+
+def _call_pipeline_document_method(method, text, language, *args):
+    """Process pool entry point for stages that need the parsed document"""
+    return getattr(get_pipeline(), method)(_parse_in_worker(text, language), *args)
+
+
+@lru_cache(maxsize=2)
+def _parse_in_worker(text, language):
+    """Parse once per worker process even when it runs several stages of one text"""
+    return AnalyzedDocument.parse(text, language)
@@ -0,0 +1,62 @@
+"""A text parsed once with SpaCy and shared by the analysis services"""
+from collections import Counter
+from functools import cached_property
+
+from src.services.model_registry import model_registry
+
+
+def load_nlp(language='en'):
+    """Shared SpaCy pipeline for a language"""
+    return model_registry.for_language('spacy', language)
+
+
+class AnalyzedDocument:
+    """Parsed text with the views the analysis services need
+
+    Parsing dominates the cost of analysis, so the pipeline parses each text
+    once and hands the same document to every service. Derived views are
+    computed on first access and then reused.
+    """
+
+    def __init__(self, text, language, doc, nlp=None):
+        self.text = text
+        self.language = language
+        self.doc = doc
+        self.nlp = nlp
+
+    @classmethod
+    def parse(cls, text, language='en', nlp=None):
+        """Parse a text with the given SpaCy pipeline, or the default one for the language"""
+        nlp = nlp or load_nlp(language)
+        return cls(text, language, nlp(text), nlp)
+
+    @cached_property
+    def sentences(self):
+        """Sentence spans of the document"""
+        return list(self.doc.sents)
+
+    @cached_property
+    def sentence_texts(self):
+        """Stripped text of each sentence"""
+        return [sent.text.strip() for sent in self.sentences]
+
+    @cached_property
+    def tokens(self):
+        """All tokens of the document"""
+        return list(self.doc)
+
+    @cached_property
+    def words(self):
+        """Lowercased alphabetic tokens"""
+        return [token.text.lower() for token in self.tokens if token.is_alpha]
+
+    @cached_property
+    def term_matches(self):
+        """Technical terms, acronyms, suffix terms and definitions, found in one pass"""
+        from src.services.term_matcher import match_terms
+        return match_terms(self.doc, self.language, self.nlp)
+
+    @cached_property
+    def word_frequencies(self):
+        """Occurrence count of each lowercased word"""
+        return Counter(self.words)
@@ -0,0 +1,282 @@
+"""Resumable chunked uploads written straight to disk"""
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Any, BinaryIO, Dict, Optional
+
+from werkzeug.utils import secure_filename
+
+from src.services.file_types import SNIFF_BYTES, UnsupportedFileType, allowed_file, sniff
+
+UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'uploads')
+
+# Size of the blocks copied from the request stream to disk
+COPY_BLOCK_SIZE = 64 * 1024
+
+# Least time between two sweeps for expired uploads
+CLEANUP_INTERVAL = 300
+
+
+class UploadNotFound(ValueError):
+    """Raised for an unknown or expired upload id"""
+
+
+class OffsetMismatch(ValueError):
+    """Raised when a chunk does not start where the upload currently ends"""
+
+    def __init__(self, expected):
+        super().__init__(f"Chunk must start at offset {expected}")
+        self.expected = expected
+
+
+class ChecksumMismatch(ValueError):
+    """Raised when received data does not match the checksum sent with it"""
+
+
+class ChunkedUploadService:
+    """Receive a file in chunks that can be retried and resumed
+
+    Chunks are copied from the request stream to a partial file in fixed-size
+    blocks, so memory use does not depend on the chunk or file size. A
+    running SHA-256 of the whole file is updated as chunks arrive. Session
+    metadata lives in a JSON file next to the partial file, so any worker
+    process can continue an upload. Starting an upload also deletes the
+    uploads that received nothing within the session TTL.
+    """
+
+    def __init__(self, upload_folder: Optional[str] = None, max_chunk_size: Optional[int] = None,
+                 session_ttl: Optional[float] = None):
+        self.upload_folder = upload_folder or os.environ.get('UPLOAD_FOLDER', UPLOAD_FOLDER)
+        self.max_chunk_size = max_chunk_size or int(os.environ.get('UPLOAD_CHUNK_SIZE', 8 * 1024 * 1024))
+        self.session_ttl = session_ttl or float(os.environ.get('UPLOAD_SESSION_TTL', 24 * 3600))
+        self._hashers: Dict[str, Any] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+        self._next_cleanup = 0.0
+
+    @property
+    def sessions_folder(self):
+        return os.path.join(self.upload_folder, 'chunked')
+
+    def init(self, filename: str, size: Optional[int] = None, language: Optional[str] = None,
+             checksum: Optional[str] = None) -> Dict[str, Any]:
+        """Start an upload and return its session"""
+        filename = secure_filename(filename or '')
+        if not filename:
+            raise ValueError("No file selected")
+        if not allowed_file(filename):
+            raise ValueError("File type not supported")
+        if size is not None and size < 0:
+            raise ValueError("File size cannot be negative")
+
+        if time.monotonic() >= self._next_cleanup:
+            self._next_cleanup = time.monotonic() + min(CLEANUP_INTERVAL, self.session_ttl)
+            self.cleanup_stale()
+
+        os.makedirs(self.sessions_folder, exist_ok=True)
+        session = {
+            'upload_id': uuid.uuid4().hex,
+            'filename': filename,
+            'size': size,
+            'language': language,
+            'checksum': checksum.lower() if checksum else None,
+            'mime_type': None,
+            'offset': 0,
+            'created_at': time.time(),
+            'updated_at': time.time()
+        }
+        open(self._part_path(session['upload_id']), 'wb').close()
+        self._save(session)
+        self._hashers[session['upload_id']] = (0, hashlib.sha256())
+        return self._public(session)
+
+    def append(self, upload_id: str, offset: int, stream: BinaryIO,
+               chunk_checksum: Optional[str] = None) -> Dict[str, Any]:
+        """Write a chunk read from ``stream`` at ``offset`` and return the updated session
+
+        A chunk whose checksum does not match is discarded, leaving the
+        upload at its previous offset so the chunk can be sent again. The
+        first chunk is sniffed before it is written, so an unsupported file
+        is rejected with ``UnsupportedFileType`` after its first few bytes
+        and its upload is deleted.
+        """
+        with self._lock(upload_id):
+            session = self._load(upload_id)
+            if offset != session['offset']:
+                raise OffsetMismatch(session['offset'])
+
+            chunk_hash = hashlib.sha256()
+            running = self._running_hash(session).copy()
+            written = 0
+            try:
+                with open(self._part_path(upload_id), 'r+b') as f:
+                    f.seek(offset)
+                    try:
+                        while True:
+                            block = stream.read(COPY_BLOCK_SIZE)
+                            if not block:
+                                break
+                            if offset == 0 and written == 0:
+                                session['mime_type'] = sniff(block, session['filename']).mime_type
+                            written += len(block)
+                            if written > self.max_chunk_size:
+                                raise ValueError(f"Chunk exceeds the maximum size of {self.max_chunk_size} bytes")
+                            if session['size'] is not None and offset + written > session['size']:
+                                raise ValueError("Chunk extends past the declared file size")
+                            f.write(block)
+                            chunk_hash.update(block)
+                            running.update(block)
+
+                        if chunk_checksum and chunk_hash.hexdigest() != chunk_checksum.lower():
+                            raise ChecksumMismatch("Chunk checksum does not match the data received")
+                    except BaseException:
+                        # Drop the partial chunk, including on client disconnects
+                        f.truncate(offset)
+                        raise
+                    f.truncate(offset + written)
+            except UnsupportedFileType:
+                # The file can never become supported, so nothing is kept for a retry
+                self._remove(upload_id)
+                raise
+
+            session['offset'] = offset + written
+            self._hashers[upload_id] = (session['offset'], running)
+            session['updated_at'] = time.time()
+            self._save(session)
+            return self._public(session)
+
+    def status(self, upload_id: str) -> Dict[str, Any]:
+        """Return the session of an upload, including the offset to resume from"""
+        return self._public(self._load(upload_id))
+
+    def finalize(self, upload_id: str, checksum: Optional[str] = None) -> Dict[str, Any]:
+        """Complete an upload and move the file to the upload folder
+
+        Returns the session with ``file_path`` and ``checksum`` set; the
+        file is then ready to be handed to processing.
+        """
+        with self._lock(upload_id):
+            session = self._load(upload_id)
+            if session['size'] is not None and session['offset'] != session['size']:
+                raise ValueError(f"Upload incomplete: received {session['offset']} of {session['size']} bytes")
+
+            digest = self._running_hash(session).hexdigest()
+            expected = (checksum or session['checksum'] or '').lower()
+            if expected and digest != expected:
+                raise ChecksumMismatch("File checksum does not match the data received")
+
+            mime_type = session.get('mime_type')
+            if mime_type is None:
+                # Nothing was sniffed yet, e.g. the file is empty
+                with open(self._part_path(upload_id), 'rb') as f:
+                    mime_type = sniff(f.read(SNIFF_BYTES), session['filename']).mime_type
+
+            # Prefix with a unique id so concurrent uploads of the same name don't collide
+            file_path = os.path.join(self.upload_folder, f"{uuid.uuid4().hex}_{session['filename']}")
+            os.replace(self._part_path(upload_id), file_path)
+            self._discard(upload_id)
+            return dict(self._public(session), file_path=file_path, checksum=digest, mime_type=mime_type)
+
+    def abort(self, upload_id: str):
+        """Cancel an upload and delete what was received"""
+        with self._lock(upload_id):
+            self._load(upload_id)
+            self._remove(upload_id)
+
+    def cleanup_stale(self) -> int:
+        """Delete uploads that have not received data within the session TTL
+
+        Partial files left without their session, e.g. by a crash, are
+        deleted once they are as old.
+        """
+        if not os.path.isdir(self.sessions_folder):
+            return 0
+        removed = 0
+        cutoff = time.time() - self.session_ttl
+        for name in os.listdir(self.sessions_folder):
+            path = os.path.join(self.sessions_folder, name)
+            try:
+                if os.path.getmtime(path) >= cutoff:
+                    continue
+                if name.endswith('.json'):
+                    self.abort(name[:-len('.json')])
+                    removed += 1
+                elif name.endswith('.part') and not os.path.exists(path[:-len('.part')] + '.json'):
+                    os.remove(path)
+            except (FileNotFoundError, UploadNotFound):
+                # Finalized or removed by another request meanwhile
+                pass
+        return removed
+
+    def _running_hash(self, session):
+        """SHA-256 of the data received so far
+
+        The hash is rebuilt from disk when this process does not have it for
+        the current offset, e.g. after a restart or when another worker
+        process received the previous chunk.
+        """
+        hashed_offset, hasher = self._hashers.get(session['upload_id'], (None, None))
+        if hashed_offset != session['offset']:
+            hasher = hashlib.sha256()
+            with open(self._part_path(session['upload_id']), 'rb') as f:
+                remaining = session['offset']
+                while remaining > 0:
+                    block = f.read(min(COPY_BLOCK_SIZE, remaining))
+                    if not block:
+                        break
+                    hasher.update(block)
+                    remaining -= len(block)
+            self._hashers[session['upload_id']] = (session['offset'], hasher)
+        return hasher
+
+    def _lock(self, upload_id):
+        with self._locks_lock:
+            return self._locks.setdefault(upload_id, threading.Lock())
+
+    def _load(self, upload_id):
+        if not upload_id.isalnum():
+            raise UploadNotFound("Upload not found")
+        try:
+            with open(self._session_path(upload_id)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise UploadNotFound("Upload not found")
+
+    def _save(self, session):
+        path = self._session_path(session['upload_id'])
+        with open(path + '.tmp', 'w') as f:
+            json.dump(session, f)
+        os.replace(path + '.tmp', path)
+
+    def _remove(self, upload_id):
+        part_path = self._part_path(upload_id)
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        self._discard(upload_id)
+
+    def _discard(self, upload_id):
+        os.remove(self._session_path(upload_id))
+        self._hashers.pop(upload_id, None)
+        with self._locks_lock:
+            self._locks.pop(upload_id, None)
+
+    def _session_path(self, upload_id):
+        return os.path.join(self.sessions_folder, f"{upload_id}.json")
+
+    def _part_path(self, upload_id):
+        return os.path.join(self.sessions_folder, f"{upload_id}.part")
+
+    def _public(self, session):
+        return {
+            'upload_id': session['upload_id'],
+            'filename': session['filename'],
+            'language': session['language'],
+            'size': session['size'],
+            'offset': session['offset'],
+            'mime_type': session.get('mime_type'),
+            'complete': session['size'] is not None and session['offset'] == session['size'],
+            'chunk_size': self.max_chunk_size
+        }
@@ -1,63 +1,39 @@
-from transformers import pipeline
-import spacy
-import re
 from collections import defaultdict
 import networkx as nx
+from src.services.analyzed_document import AnalyzedDocument
+from src.services.entity_recognizer import entity_recognizer
 
 class ConceptExtractor:
-    def __init__(self):
-        self.ner_pipeline_en = None
-        self.ner_pipeline_ro = None
-        self.nlp_en = None
-        self.nlp_ro = None
-
-    def _load_models(self, language='en'):
-        """Load models lazily when needed"""
-        if language == 'en' and not self.ner_pipeline_en:
-            self.ner_pipeline_en = pipeline("ner", model="dbmdz/bert-large-cased-finetuned-conll03-english")
-            self.nlp_en = spacy.load("en_core_web_sm")
-        elif language == 'ro' and not self.ner_pipeline_ro:
-            self.ner_pipeline_ro = pipeline("ner", model="xlm-roberta-base")
-            self.nlp_ro = spacy.load("xx_ent_wiki_sm")
-
     def extract_concepts(self, text, language='en'):
         """Extract key concepts from text"""
-        # Load models if not already loaded
-        self._load_models(language)
-
-        # Choose appropriate models based on language
-        ner_pipeline = self.ner_pipeline_en if language == 'en' else self.ner_pipeline_ro
-        nlp = self.nlp_en if language == 'en' else self.nlp_ro
-
-        # Process text with SpaCy
-        doc = nlp(text)
+        return self.extract_concepts_from_document(AnalyzedDocument.parse(text, language))
 
+    def extract_concepts_from_document(self, document):
+        """Extract key concepts from an already parsed document"""
         # Extract different types of concepts
         concepts = {
-            'terms': self._extract_key_terms(doc),
-            'entities': self._process_named_entities(ner_pipeline(text)),
-            'definitions': self._extract_definitions(text),
-            'relationships': self._extract_relationships(doc)
+            'terms': self._extract_key_terms(document),
+            'entities': self._process_named_entities(entity_recognizer.recognize(document)),
+            'definitions': document.term_matches['definitions'],
+            'relationships': self._extract_relationships(document.doc)
         }
 
         return concepts
 
-    def _extract_key_terms(self, doc):
+    def _extract_key_terms(self, document):
         """Extract key terms using linguistic patterns"""
         key_terms = []
         
         # Extract noun phrases
-        for chunk in doc.noun_chunks:
+        for chunk in document.doc.noun_chunks:
             if len(chunk.text.split()) <= 3:  # Limit to phrases of 3 words or less
                 key_terms.append({
                     'term': chunk.text,
                     'type': 'noun_phrase'
                 })
 
-        # Extract technical terms (words with specific patterns)
-        technical_pattern = re.compile(r'\b[A-Z][a-z]+(?:[A-Z][a-z]+)*\b')  # CamelCase words
-        technical_terms = technical_pattern.findall(doc.text)
-        for term in technical_terms:
+        # Extract technical terms (capitalized and CamelCase words)
+        for term in document.term_matches['technical']:
             key_terms.append({
                 'term': term,
                 'type': 'technical'
@@ -66,42 +42,27 @@ class ConceptExtractor:
         return key_terms
 
     def _process_named_entities(self, entities):
-        """Process named entities from the NER pipeline"""
+        """Group the recognized entities by type"""
         processed_entities = defaultdict(list)
         
         for entity in entities:
-            processed_entities[entity['entity']].append({
-                'text': entity['word'],
-                'score': entity['score']
+            processed_entities[entity['type']].append({
+                'text': entity['text'],
+                'score': entity['score'],
+                'count': entity['count']
             })
 
         return dict(processed_entities)
 
-    def _extract_definitions(self, text):
-        """Extract definitions using pattern matching"""
-        definition_patterns = [
-            r'(?P<term>[^.]*?)\s+(?:is|are|refers to|means)\s+(?P<definition>[^.]*\.)',
-            r'(?P<term>[^.]*?)\s+(?:can be defined as|is defined as)\s+(?P<definition>[^.]*\.)'
-        ]
-
-        definitions = []
-        for pattern in definition_patterns:
-            matches = re.finditer(pattern, text)
-            for match in matches:
-                definitions.append({
-                    'term': match.group('term').strip(),
-                    'definition': match.group('definition').strip()
-                })
-
-        return definitions
-
     def _extract_relationships(self, doc):
         """Extract relationships between concepts"""
-        graph = nx.DiGraph()
+        # Nodes and edges are collected in plain dicts; graphs are built only when rendered
+        nodes = {}
+        edges = {}
 
         # Add nodes for each named entity
         for ent in doc.ents:
-            graph.add_node(ent.text, type=ent.label_)
+            nodes[ent.text] = ent.label_
 
         # Add edges for subject-verb-object relationships
         for token in doc:
@@ -113,18 +74,59 @@ class ConceptExtractor:
                 for child in token.head.children:
                     if child.dep_ in ["dobj", "pobj"]:
                         obj = child.text
-                        graph.add_edge(subject, obj, relation=verb)
+                        nodes.setdefault(subject, 'concept')
+                        nodes.setdefault(obj, 'concept')
+                        edges[(subject, obj)] = verb
 
-        # Convert graph to dictionary format
         relationships = {
-            'nodes': [{'id': node, 'type': data.get('type', 'concept')} 
-                     for node, data in graph.nodes(data=True)],
-            'edges': [{'source': u, 'target': v, 'relation': data['relation']} 
-                     for u, v, data in graph.edges(data=True)]
+            'nodes': [{'id': node, 'type': node_type} for node, node_type in nodes.items()],
+            'edges': [{'source': source, 'target': target, 'relation': relation}
+                      for (source, target), relation in edges.items()]
         }
 
         return relationships
 
+    def merge_concepts(self, concepts_list):
+        """Merge the concepts extracted from consecutive windows of one document"""
+        merged = {
+            'terms': [],
+            'entities': defaultdict(list),
+            'definitions': [],
+            'relationships': {'nodes': [], 'edges': []}
+        }
+        seen = set()
+        merged_entities = {}
+
+        def add(items, key, item):
+            if key not in seen:
+                seen.add(key)
+                items.append(item)
+
+        for concepts in concepts_list:
+            for term in concepts['terms']:
+                add(merged['terms'], ('term', term['type'], term['term'].lower()), term)
+            for entity_type, entities in concepts['entities'].items():
+                for entity in entities:
+                    key = (entity_type, entity['text'].lower())
+                    if key in merged_entities:
+                        # Mentions in several windows add up
+                        known = merged_entities[key]
+                        known['count'] = known.get('count', 1) + entity.get('count', 1)
+                        known['score'] = max(known['score'], entity['score'])
+                    else:
+                        merged_entities[key] = dict(entity)
+                        merged['entities'][entity_type].append(merged_entities[key])
+            for definition in concepts['definitions']:
+                add(merged['definitions'], ('definition', definition['term'].lower()), definition)
+            for node in concepts['relationships']['nodes']:
+                add(merged['relationships']['nodes'], ('node', node['id']), node)
+            for edge in concepts['relationships']['edges']:
+                add(merged['relationships']['edges'],
+                    ('edge', edge['source'], edge['target'], edge['relation']), edge)
+
+        merged['entities'] = dict(merged['entities'])
+        return merged
+
     def generate_knowledge_graph(self, concepts):
         """Generate a knowledge graph from extracted concepts"""
         graph = nx.DiGraph()
@@ -0,0 +1,257 @@
+"""Persistent index of the concepts mentioned across a user's documents"""
+import logging
+import os
+import re
+import unicodedata
+from collections import Counter
+from functools import lru_cache
+from itertools import permutations
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import desc, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased
+
+from src.extensions import db, job_queue
+from src.models.concept_index import Concept, ConceptCooccurrence, ConceptPosting
+
+logger = logging.getLogger(__name__)
+
+DOCUMENT_TYPES = ('upload', 'resource', 'question')
+
+# Referenced by path so queueing a document does not import the analysis stack
+INDEX_JOB = 'src.services.analysis_pipeline:run_index_job'
+
+# Most mentioned concepts of a document whose co-occurrences are counted; n concepts give n(n-1) pairs
+MAX_LINKED_CONCEPTS = int(os.environ.get('CONCEPT_INDEX_MAX_LINKED', 50))
+
+# Leading words dropped from concept keys
+DETERMINERS = {
+    'en': {'a', 'an', 'the', 'this', 'that', 'these', 'those', 'its', 'their', 'his', 'her', 'our', 'my',
+           'your', 'some', 'any', 'each', 'every'},
+    'ro': {'un', 'o', 'niște', 'acest', 'această', 'acești', 'aceste', 'acel', 'acea', 'cel', 'cea', 'cei', 'cele'}
+}
+
+# Noun phrases that are never concepts on their own
+PRONOUNS = {
+    'en': {'i', 'you', 'he', 'she', 'it', 'we', 'they', 'me', 'him', 'us', 'them', 'which', 'who', 'what'},
+    'ro': {'eu', 'tu', 'el', 'ea', 'noi', 'voi', 'ei', 'ele', 'care', 'ce', 'cine'}
+}
+
+# Largest number of bound parameters put in one IN clause
+_IN_BATCH = 500
+
+_NON_WORD = re.compile(r'[^\w\s]+')
+_LETTER = re.compile(r'[^\W\d_]')
+# Romanian text often carries the cedilla forms of ș and ț
+_CEDILLAS = str.maketrans('şţŞŢ', 'șțȘȚ')
+
+
+@lru_cache(maxsize=8192)
+def concept_key(text: str, language: str = 'en') -> str:
+    """Normalized form a concept is indexed and looked up by
+
+    Case, punctuation, hyphens and leading determiners are dropped and, in
+    English, the last word is singularized, so "The cell-cycles" and "cell
+    cycle" share a key. The rules need no model, so lookups never run NLP.
+    An empty key means the text is not a concept.
+    """
+    text = unicodedata.normalize('NFKC', text).translate(_CEDILLAS).lower()
+    words = _NON_WORD.sub(' ', text).split()
+    determiners = DETERMINERS.get(language, set())
+    while words and words[0] in determiners:
+        words.pop(0)
+    if not words or not _LETTER.search(' '.join(words)):
+        return ''
+    if len(words) == 1 and words[0] in PRONOUNS.get(language, set()):
+        return ''
+    if language == 'en':
+        words[-1] = _singular(words[-1])
+    return ' '.join(words)[:200]
+
+
+def document_concepts(concepts: Dict[str, Any], language: str = 'en') -> Dict[str, Tuple[str, int]]:
+    """Label and number of mentions of each concept key of a ``ConceptExtractor`` result"""
+    mentions = Counter()
+    labels = {}
+
+    def add(text, count=1):
+        key = concept_key(text, language)
+        if key:
+            mentions[key] += count
+            labels.setdefault(key, ' '.join(text.split())[:200])
+
+    for term in concepts.get('terms', []):
+        add(term['term'])
+    for entities in concepts.get('entities', {}).values():
+        for entity in entities:
+            add(entity['text'], entity.get('count', 1))
+    for definition in concepts.get('definitions', []):
+        add(definition['term'])
+    return {key: (labels[key], count) for key, count in mentions.items()}
+
+
+class ConceptIndex:
+    """Posting lists and co-occurrence counts of concepts, per user and per course
+
+    Every concept key of a user (and course) has one row listing the
+    uploads, resources and questions that mention it. Two concepts
+    co-occur once for each document among whose ``max_linked`` most
+    mentioned concepts both appear. Indexing a document updates only the
+    rows of its own concepts, and indexing it again replaces its previous
+    postings, so the index stays current without ever being rebuilt.
+    """
+
+    def __init__(self, db_session=None, max_linked: int = MAX_LINKED_CONCEPTS):
+        self._db = db_session
+        self.max_linked = max_linked
+
+    @property
+    def db(self):
+        return self._db or db.session
+
+    def index_document(self, document_type: str, document_id, concepts: Dict[str, Any],
+                       user_id: Optional[int] = None, course: Optional[str] = None,
+                       language: str = 'en') -> int:
+        """Add or replace the concepts of a document and return how many were indexed
+
+        Indexing that collides with a concurrent job adding the same
+        concepts, co-occurrences or document is rolled back and tried once
+        more against the rows that job stored. A second collision is rolled
+        back and reported as 0 concepts indexed.
+        """
+        if document_type not in DOCUMENT_TYPES:
+            raise ValueError(f"Unknown document type: {document_type}")
+        document_id = str(document_id)
+        try:
+            return self._index(document_type, document_id, concepts, user_id, course, language)
+        except IntegrityError:
+            self.db.rollback()
+        try:
+            return self._index(document_type, document_id, concepts, user_id, course, language)
+        except IntegrityError:
+            self.db.rollback()
+            logger.warning("Concept indexing of %s %s collided twice, skipped", document_type, document_id)
+            return 0
+
+    def _index(self, document_type, document_id, concepts, user_id, course, language):
+        self._remove(document_type, document_id)
+
+        mentions = document_concepts(concepts, language)
+        known = {}
+        keys = list(mentions)
+        for start in range(0, len(keys), _IN_BATCH):
+            for concept in self._scoped(user_id, course).filter(Concept.key.in_(keys[start:start + _IN_BATCH])):
+                known[concept.key] = concept
+
+        linked = set(sorted(mentions, key=lambda key: (-mentions[key][1], key))[:self.max_linked])
+        for key, (label, count) in mentions.items():
+            concept = known.get(key)
+            if concept is None:
+                concept = known[key] = Concept(key=key, label=label, language=language, user_id=user_id,
+                                               course=course, document_count=0)
+                self.db.add(concept)
+            concept.document_count += 1
+            concept.postings.append(ConceptPosting(document_type=document_type, document_id=document_id,
+                                                   count=count, linked=key in linked))
+        self.db.flush()
+
+        self._add_cooccurrences([known[key].id for key in linked], 1)
+        self.db.commit()
+        return len(mentions)
+
+    def remove_document(self, document_type: str, document_id) -> bool:
+        """Drop a document from the index; False if it was not indexed"""
+        removed = self._remove(document_type, str(document_id))
+        self.db.commit()
+        return removed
+
+    def documents_for(self, term: str, user_id: Optional[int] = None, course: Optional[str] = None,
+                      document_type: Optional[str] = None, language: str = 'en',
+                      limit: int = 20) -> List[Dict[str, Any]]:
+        """Documents mentioning a concept, most mentions first"""
+        count = func.sum(ConceptPosting.count).label('count')
+        query = self.db.query(ConceptPosting.document_type, ConceptPosting.document_id, count) \
+            .join(Concept, ConceptPosting.concept_id == Concept.id) \
+            .filter(Concept.key == concept_key(term, language), Concept.user_id == user_id)
+        if course is not None:
+            query = query.filter(Concept.course == course)
+        if document_type is not None:
+            query = query.filter(ConceptPosting.document_type == document_type)
+        rows = query.group_by(ConceptPosting.document_type, ConceptPosting.document_id) \
+            .order_by(desc(count), ConceptPosting.document_id).limit(limit)
+        return [{'document_type': row.document_type, 'document_id': row.document_id, 'count': int(row.count)}
+                for row in rows]
+
+    def related_concepts(self, term: str, user_id: Optional[int] = None, course: Optional[str] = None,
+                         language: str = 'en', limit: int = 10) -> List[Dict[str, Any]]:
+        """Concepts appearing in the most documents together with a concept"""
+        related = aliased(Concept)
+        count = func.sum(ConceptCooccurrence.count).label('count')
+        query = self.db.query(related.key, func.min(related.label).label('label'), count,
+                              func.sum(related.document_count).label('document_count')) \
+            .join(ConceptCooccurrence, ConceptCooccurrence.related_concept_id == related.id) \
+            .join(Concept, ConceptCooccurrence.concept_id == Concept.id) \
+            .filter(Concept.key == concept_key(term, language), Concept.user_id == user_id)
+        if course is not None:
+            query = query.filter(Concept.course == course)
+        rows = query.group_by(related.key).order_by(desc(count), related.key).limit(limit)
+        return [{'key': row.key, 'label': row.label, 'count': int(row.count),
+                 'document_count': int(row.document_count)} for row in rows]
+
+    def _scoped(self, user_id, course):
+        # Comparing to None renders IS NULL, which is how anonymous uploads are scoped
+        return self.db.query(Concept).filter(Concept.user_id == user_id, Concept.course == course)
+
+    def _remove(self, document_type, document_id):
+        postings = self.db.query(ConceptPosting).filter_by(
+            document_type=document_type, document_id=document_id).all()
+        if not postings:
+            return False
+        self._add_cooccurrences([posting.concept_id for posting in postings if posting.linked], -1)
+        for posting in postings:
+            concept = posting.concept
+            concept.postings.remove(posting)
+            concept.document_count -= 1
+            if concept.document_count <= 0:
+                self.db.delete(concept)
+        self.db.flush()
+        return True
+
+    def _add_cooccurrences(self, concept_ids, delta):
+        if len(concept_ids) < 2:
+            return
+        pairs = {(row.concept_id, row.related_concept_id): row for row in self.db.query(ConceptCooccurrence).filter(
+            ConceptCooccurrence.concept_id.in_(concept_ids), ConceptCooccurrence.related_concept_id.in_(concept_ids))}
+        for concept_id, related_id in permutations(concept_ids, 2):
+            row = pairs.get((concept_id, related_id))
+            if row is None:
+                if delta > 0:
+                    self.db.add(ConceptCooccurrence(concept_id=concept_id, related_concept_id=related_id, count=delta))
+                continue
+            row.count += delta
+            if row.count <= 0:
+                self.db.delete(row)
+        self.db.flush()
+
+
+def queue_document(document_type: str, document_id, text: str, language: Optional[str] = None,
+                   user_id: Optional[int] = None, course: Optional[str] = None) -> str:
+    """Queue the concept extraction and indexing of a library document and return the job id"""
+    return job_queue.enqueue(INDEX_JOB, document_type=document_type, document_id=str(document_id), text=text,
+                             language=language, user_id=user_id, course=course)
+
+
+def _singular(word):
+    if len(word) <= 3 or not word.endswith('s'):
+        return word
+    if word.endswith('ies') and len(word) > 4:
+        return word[:-3] + 'y'
+    if word.endswith(('sses', 'shes', 'ches', 'xes', 'zes')):
+        return word[:-2]
+    if word.endswith(('ss', 'us', 'is')):
+        return word
+    return word[:-1]
+
+
+concept_index = ConceptIndex()
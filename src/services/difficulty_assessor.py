@@ -1,43 +1,27 @@
-import spacy
 import textstat
-from collections import Counter
 from sklearn.feature_extraction.text import TfidfVectorizer
 import numpy as np
+from src.services.analyzed_document import AnalyzedDocument
 
 class DifficultyAssessor:
     def __init__(self):
-        # Load SpaCy models for both languages
-        self.nlp_en = spacy.load('en_core_web_sm')
-        self.nlp_ro = spacy.load('xx_ent_wiki_sm')  # Multilingual model for Romanian
-        
         # Initialize TF-IDF vectorizer
         self.tfidf = TfidfVectorizer(max_features=1000)
-        
-        # Technical term patterns
-        self.technical_patterns = {
-            'en': [
-                r'\b[A-Z][a-z]+(?:[A-Z][a-z]+)*\b',  # CamelCase
-                r'\b[A-Z]{2,}\b',  # Acronyms
-                r'\b\w+(?:ology|ization|isation|ment)\b'  # Words with technical suffixes
-            ],
-            'ro': [
-                r'\b[A-Z][a-z]+(?:[A-Z][a-z]+)*\b',
-                r'\b[A-Z]{2,}\b',
-                r'\b\w+(?:ologie|izare|ment)\b'
-            ]
-        }
 
     def assess_difficulty(self, text, language='en'):
         """Assess the difficulty of a text and return a comprehensive analysis"""
-        # Choose appropriate NLP model
-        nlp = self.nlp_en if language == 'en' else self.nlp_ro
-        doc = nlp(text)
+        return self.assess_document(AnalyzedDocument.parse(text, language))
+
+    def assess_document(self, document):
+        """Assess the difficulty of an already parsed document"""
+        doc = document.doc
+        language = document.language
 
         # Calculate various metrics
         metrics = {
             'linguistic_complexity': self._calculate_linguistic_complexity(doc, language),
             'concept_density': self._calculate_concept_density(doc),
-            'technical_complexity': self._calculate_technical_complexity(text, language),
+            'technical_complexity': self._calculate_technical_complexity(document),
             'prerequisite_concepts': self._identify_prerequisites(doc)
         }
 
@@ -50,6 +34,31 @@ class DifficultyAssessor:
             'recommendations': self._generate_recommendations(metrics, difficulty_level)
         }
 
+    def combine_assessments(self, assessments, weights):
+        """Combine the assessments of consecutive windows of one document
+
+        Scores are averaged weighted by window length, so the result matches
+        what one pass over the whole document would roughly report.
+        """
+        total = float(sum(weights)) or 1.0
+        metrics = {}
+        for name, values in assessments[0]['metrics'].items():
+            if name == 'prerequisite_concepts':
+                metrics[name] = [p for a in assessments for p in a['metrics'][name]]
+            else:
+                metrics[name] = {
+                    field: sum(a['metrics'][name][field] * w for a, w in zip(assessments, weights)) / total
+                    for field in values
+                }
+
+        difficulty_level = self._determine_difficulty_level(metrics)
+
+        return {
+            'difficulty_level': difficulty_level,
+            'metrics': metrics,
+            'recommendations': self._generate_recommendations(metrics, difficulty_level)
+        }
+
     def _calculate_linguistic_complexity(self, doc, language):
         """Calculate linguistic complexity based on various factors"""
         # Basic metrics
@@ -95,21 +104,20 @@ class DifficultyAssessor:
             )
         }
 
-    def _calculate_technical_complexity(self, text, language):
+    def _calculate_technical_complexity(self, document):
         """Calculate the complexity based on technical terms and vocabulary"""
-        # Get word frequencies
-        words = [token.text.lower() for token in self.nlp_en(text) if token.is_alpha]
-        word_freq = Counter(words)
+        # Get word frequencies from the shared parse
+        words = document.words
+        word_freq = document.word_frequencies
         
         # Calculate vocabulary richness
         vocab_richness = len(word_freq) / len(words)
         
         # Count technical terms
-        technical_terms = []
-        for pattern in self.technical_patterns[language]:
-            technical_terms.extend(re.findall(pattern, text))
+        matches = document.term_matches
+        technical_terms = len(matches['technical']) + len(matches['acronyms']) + len(matches['suffix_terms'])
         
-        technical_density = len(technical_terms) / len(words) * 100
+        technical_density = technical_terms / len(words) * 100
 
         return {
             'vocab_richness': vocab_richness,
@@ -0,0 +1,100 @@
+"""Named entity recognition over long documents in batched sentence windows"""
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.services.model_registry import model_registry
+from src.services.text_chunker import SentenceChunker, tokenizer_budget, tokenizer_counter
+
+
+class EntityRecognizer:
+    """Run the NER model over windows of whole sentences and aggregate the entities
+
+    A document is cut into windows of consecutive sentences filling the
+    model's input (``window_tokens``, by default the tokenizer's limit), so
+    no text is truncated and the cost grows linearly with its length. Each
+    window starts with the trailing sentences of the previous one, up to
+    ``stride_tokens``, so entities keep their context at window boundaries.
+    Windows go through the model ``batch_size`` at a time.
+
+    Word pieces are merged into entity spans by the pipeline; spans seen in
+    two overlapping windows are counted once, and each distinct entity is
+    reported once with its number of mentions.
+    """
+
+    def __init__(self, batch_size: Optional[int] = None, window_tokens: Optional[int] = None,
+                 stride_tokens: Optional[int] = None):
+        self.batch_size = batch_size or int(os.environ.get('NER_BATCH_SIZE', 8))
+        self.window_tokens = window_tokens or int(os.environ.get('NER_WINDOW_TOKENS', 0)) or None
+        self.stride_tokens = stride_tokens if stride_tokens is not None else int(
+            os.environ.get('NER_STRIDE_TOKENS', 32))
+
+    def recognize(self, document) -> List[Dict[str, Any]]:
+        """Distinct entities of a parsed document, most mentioned first"""
+        if not document.text.strip():
+            return []
+        ner_pipeline = model_registry.for_language('ner', document.language)
+        tokenizer = model_registry.for_language('ner-tokenizer', document.language)
+
+        windows = self.windows(document, tokenizer)
+        outputs = ner_pipeline([document.text[start:end] for start, end in windows],
+                               batch_size=self.batch_size, aggregation_strategy='simple')
+        return aggregate_entities(document.text, windows, outputs)
+
+    def windows(self, document, tokenizer) -> List[Tuple[int, int]]:
+        """Character ranges of the document's sentence windows"""
+        count_tokens = tokenizer_counter(tokenizer)
+        budget = min(self.window_tokens or tokenizer_budget(tokenizer), tokenizer_budget(tokenizer))
+        sentences = document.sentences
+
+        spans = []
+        for sentence, tokens in zip(sentences, count_tokens([sentence.text for sentence in sentences])):
+            if tokens <= budget:
+                spans.append((sentence.start_char, sentence.end_char, tokens))
+                continue
+            # A sentence longer than the model's input is cut between words
+            words = list(sentence)
+            sizes = count_tokens([word.text for word in words])
+            for start, end, _ in SentenceChunker(count_tokens, budget).pack(sizes):
+                last = words[end - 1]
+                spans.append((words[start].idx, last.idx + len(last), sum(sizes[start:end])))
+
+        chunker = SentenceChunker(count_tokens, budget, min(self.stride_tokens, budget - 1))
+        return [(spans[start][0], spans[end - 1][1])
+                for start, end, _ in chunker.pack([tokens for _, _, tokens in spans])]
+
+
+def aggregate_entities(text: str, windows: List[Tuple[int, int]], outputs) -> List[Dict[str, Any]]:
+    """Merge the pipeline's per-window entity spans into distinct entities with mention counts"""
+    if windows and outputs and isinstance(outputs[0], dict):
+        # A single input gives a flat list of entities
+        outputs = [outputs]
+
+    mentions: Dict[Tuple[int, int], Dict[str, Any]] = {}
+    for (offset, _), entities in zip(windows, outputs):
+        for entity in entities:
+            span = (offset + entity['start'], offset + entity['end'])
+            score = float(entity['score'])
+            if span not in mentions or score > mentions[span]['score']:
+                mentions[span] = {'type': entity['entity_group'], 'score': score}
+
+    distinct: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    for (start, end), mention in sorted(mentions.items()):
+        surface = ' '.join(text[start:end].split())
+        key = (mention['type'], surface.lower())
+        if key not in distinct:
+            distinct[key] = {'text': surface, 'type': mention['type'], 'count': 0, 'score': 0.0,
+                             'first_offset': start, '_total': 0.0}
+        entity = distinct[key]
+        entity['count'] += 1
+        entity['score'] = max(entity['score'], mention['score'])
+        entity['_total'] += mention['score']
+
+    entities = []
+    for entity in distinct.values():
+        entity['mean_score'] = entity.pop('_total') / entity['count']
+        entities.append(entity)
+    entities.sort(key=lambda entity: (-entity['count'], entity['first_offset']))
+    return entities
+
+
+entity_recognizer = EntityRecognizer()
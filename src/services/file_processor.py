@@ -1,135 +1,307 @@
-import os
-from werkzeug.utils import secure_filename
-import magic
-import pytesseract
+import io
+import posixpath
+import time
+import zipfile
+from html.parser import HTMLParser
+from urllib.parse import unquote
+from xml.etree import ElementTree
 from PIL import Image
-import speech_recognition as sr
-from pdf2image import convert_from_path
 import docx
 import PyPDF2
-import mimetypes
-
-ALLOWED_EXTENSIONS = {
-    'text': {'txt', 'doc', 'docx', 'pdf'},
-    'image': {'png', 'jpg', 'jpeg'},
-    'audio': {'mp3', 'wav', 'm4a'},
-    'video': {'mp4', 'avi', 'mov'}
-}
-
-def allowed_file(filename, file_type=None):
-    """Check if file extension is allowed"""
-    ext = filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
-    if file_type:
-        return ext in ALLOWED_EXTENSIONS[file_type]
-    return any(ext in extensions for extensions in ALLOWED_EXTENSIONS.values())
-
-def process_file(file_path):
-    """Process uploaded file based on its type"""
-    filename = os.path.basename(file_path)
-    if not allowed_file(filename):
-        raise ValueError("File type not supported")
-
-    # Detect file type using python-magic
-    mime = magic.Magic(mime=True)
-    file_type = mime.from_file(file_path)
-
-    if file_type.startswith('text') or filename.endswith(('.doc', '.docx', '.pdf')):
-        return process_text(file_path)
-    elif file_type.startswith('image'):
+from src.services.ocr import page_ocr
+from src.services.transcription import TranscriptionError, transcriber
+from src.services.video_processor import video_processor
+from src.services.file_types import detect_file_type
+from src.services.workload_pools import workload_pools
+
+# Length of the text preview returned for text documents
+PREVIEW_LENGTH = 1000
+
+# Upper bound on the characters buffered per chunk when streaming plain text
+TEXT_BLOCK_SIZE = 64 * 1024
+
+class ExtractionStats:
+    """Page counts and throughput of a streaming text extraction"""
+
+    def __init__(self):
+        self.pages = 0
+        self.ocr_pages = 0
+        self.total_pages = None
+        self.paragraphs = 0
+        self.characters = 0
+        self.seconds = 0.0
+
+    def to_dict(self):
+        return {
+            'pages': self.pages,
+            'ocr_pages': self.ocr_pages,
+            'total_pages': self.total_pages,
+            'paragraphs': self.paragraphs,
+            'characters': self.characters,
+            'seconds': self.seconds,
+            'pages_per_second': self.pages / self.seconds if self.seconds else None,
+            'chars_per_second': self.characters / self.seconds if self.seconds else None
+        }
+
+def process_file(file_path, file_type=None):
+    """Process uploaded file based on its type
+
+    ``file_type`` is the type sniffed when the file was uploaded; the file
+    is only sniffed again when it is not given.
+    """
+    file_type = file_type or detect_file_type(file_path)
+    if file_type.category == 'text':
+        return process_text(file_path, file_type)
+    elif file_type.category == 'image':
         return process_image(file_path)
-    elif file_type.startswith('audio'):
+    elif file_type.category == 'audio':
         return process_audio(file_path)
-    elif file_type.startswith('video'):
+    elif file_type.category == 'video':
         return process_video(file_path)
-    else:
-        raise ValueError(f"Unsupported file type: {file_type}")
 
-def process_text(file_path):
-    """Process text files"""
-    ext = os.path.splitext(file_path)[1].lower()
-    content = ""
+def process_text(file_path, file_type=None):
+    """Process text files
+
+    The document is streamed, so only the preview is held in memory.
+    """
+    stats = ExtractionStats()
+    preview = ''
 
     try:
-        if ext == '.txt':
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-        elif ext == '.docx':
-            doc = docx.Document(file_path)
-            content = '\n'.join([paragraph.text for paragraph in doc.paragraphs])
-        elif ext == '.pdf':
-            with open(file_path, 'rb') as f:
-                pdf_reader = PyPDF2.PdfReader(f)
-                content = '\n'.join([page.extract_text() for page in pdf_reader.pages])
-        
+        for chunk in iter_text(file_path, stats, file_type=file_type):
+            if len(preview) < PREVIEW_LENGTH:
+                preview = (preview + '\n' + chunk if preview else chunk)[:PREVIEW_LENGTH]
+
         return {
             "type": "text",
-            "content": content[:1000],  # Return first 1000 chars for preview
-            "length": len(content)
+            "content": preview,  # First 1000 chars for preview
+            "length": stats.characters,
+            "extraction": stats.to_dict()
         }
     except Exception as e:
         raise ValueError(f"Error processing text file: {str(e)}")
 
+def iter_text(file_path, stats=None, on_progress=None, file_type=None):
+    """Yield the text of a document incrementally
+
+    The extractor registered for the document's type reads it in pieces
+    (PDFs page by page, DOCX, HTML and plain text paragraph by paragraph),
+    so memory use does not grow with the document. ``stats`` collects page
+    counts and extraction throughput; ``on_progress`` receives the fraction
+    of pages read when the page count is known up front.
+    """
+    stats = stats if stats is not None else ExtractionStats()
+    file_type = file_type or detect_file_type(file_path)
+    if file_type.extractor is None:
+        return
+    chunks = file_type.extractor(file_path, stats)
+    pool = workload_pools.get('text')
+
+    while True:
+        # Extraction runs on the bounded text pool, in batches so the hand-off stays cheap
+        batch, seconds, exhausted = pool.submit(_next_batch, chunks, stats).result()
+        # Only time spent extracting counts towards throughput, not queueing or the consumer's work
+        stats.seconds += seconds
+
+        for chunk, pages in batch:
+            stats.characters += len(chunk)
+            if on_progress and stats.total_pages:
+                on_progress(pages / stats.total_pages)
+            if chunk.strip():
+                yield chunk
+        if exhausted:
+            break
+
+def _next_batch(chunks, stats):
+    """Pull chunks until about ``TEXT_BLOCK_SIZE`` characters are extracted
+
+    Returns ``(chunk, pages read)`` pairs, the time spent and whether the
+    extractor is exhausted.
+    """
+    started = time.perf_counter()
+    batch = []
+    size = 0
+    for chunk in chunks:
+        batch.append((chunk, stats.pages))
+        size += len(chunk)
+        if size >= TEXT_BLOCK_SIZE:
+            return batch, time.perf_counter() - started, False
+    return batch, time.perf_counter() - started, True
+
+def extract_pdf(file_path, stats):
+    with open(file_path, 'rb') as f:
+        pdf_reader = PyPDF2.PdfReader(f)
+        stats.total_pages = len(pdf_reader.pages)
+        text_layers = (page.extract_text() or '' for page in pdf_reader.pages)
+        # Scanned pages without a text layer are OCRed in parallel
+        for text, ocr_used in page_ocr.iter_pdf(file_path, text_layers):
+            stats.pages += 1
+            stats.ocr_pages += ocr_used
+            yield text
+
+def extract_docx(file_path, stats):
+    doc = docx.Document(file_path)
+    for paragraph in doc.paragraphs:
+        stats.paragraphs += 1
+        yield paragraph.text
+
+def extract_plain_text(file_path, stats):
+    with open(file_path, 'r', encoding='utf-8') as f:
+        lines = []
+        size = 0
+        # Bounded reads so a file without line breaks is still streamed
+        for line in iter(lambda: f.readline(TEXT_BLOCK_SIZE), ''):
+            if line.strip():
+                lines.append(line)
+                size += len(line)
+            if lines and (not line.strip() or size >= TEXT_BLOCK_SIZE):
+                stats.paragraphs += 1
+                yield ''.join(lines).rstrip('\n')
+                lines = []
+                size = 0
+        if lines:
+            stats.paragraphs += 1
+            yield ''.join(lines).rstrip('\n')
+
+def extract_html(file_path, stats):
+    with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+        yield from _iter_html_paragraphs(iter(lambda: f.read(TEXT_BLOCK_SIZE), ''), stats)
+
+def extract_epub(file_path, stats):
+    """Yield the paragraphs of an EPUB book, chapter by chapter in reading order"""
+    with zipfile.ZipFile(file_path) as book:
+        chapters = _epub_spine(book)
+        stats.total_pages = len(chapters)
+        for name in chapters:
+            with book.open(name) as f:
+                chapter = io.TextIOWrapper(f, encoding='utf-8', errors='replace')
+                yield from _iter_html_paragraphs(iter(lambda: chapter.read(TEXT_BLOCK_SIZE), ''), stats)
+            stats.pages += 1
+
+def _epub_spine(book):
+    """Names of the chapter documents of an EPUB, in reading order"""
+    container = ElementTree.fromstring(book.read('META-INF/container.xml'))
+    rootfile = container.find('.//{urn:oasis:names:tc:opendocument:xmlns:container}rootfile').get('full-path')
+    package = ElementTree.fromstring(book.read(rootfile))
+    ns = {'opf': 'http://www.idpf.org/2007/opf'}
+    base = posixpath.dirname(rootfile)
+    manifest = {item.get('id'): item.get('href') for item in package.iterfind('opf:manifest/opf:item', ns)}
+    return [posixpath.normpath(posixpath.join(base, unquote(manifest[ref.get('idref')])))
+            for ref in package.iterfind('opf:spine/opf:itemref', ns) if ref.get('idref') in manifest]
+
+class _HTMLTextParser(HTMLParser):
+    """Collect the visible text of an HTML document, one paragraph per block element"""
+
+    BLOCK_TAGS = {
+        'address', 'article', 'aside', 'blockquote', 'br', 'dd', 'div', 'dl', 'dt', 'figcaption',
+        'footer', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr', 'li', 'main', 'nav', 'ol', 'p',
+        'pre', 'section', 'table', 'td', 'th', 'title', 'tr', 'ul'
+    }
+    SKIPPED_TAGS = {'script', 'style', 'noscript', 'template'}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.paragraphs = []
+        self._parts = []
+        self._size = 0
+        self._skipping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIPPED_TAGS:
+            self._skipping += 1
+        elif tag in self.BLOCK_TAGS:
+            self._flush()
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIPPED_TAGS:
+            self._skipping = max(0, self._skipping - 1)
+        elif tag in self.BLOCK_TAGS:
+            self._flush()
+
+    def handle_data(self, data):
+        if self._skipping:
+            return
+        self._parts.append(data)
+        self._size += len(data)
+        if self._size >= TEXT_BLOCK_SIZE:
+            self._flush()
+
+    def close(self):
+        super().close()
+        self._flush()
+
+    def _flush(self):
+        text = ' '.join(''.join(self._parts).split())
+        self._parts = []
+        self._size = 0
+        if text:
+            self.paragraphs.append(text)
+
+def _iter_html_paragraphs(blocks, stats):
+    """Parse HTML fed in blocks, yielding each paragraph once it is complete"""
+    parser = _HTMLTextParser()
+    for block in blocks:
+        parser.feed(block)
+        yield from _drain_paragraphs(parser, stats)
+    parser.close()
+    yield from _drain_paragraphs(parser, stats)
+
+def _drain_paragraphs(parser, stats):
+    paragraphs, parser.paragraphs = parser.paragraphs, []
+    for paragraph in paragraphs:
+        stats.paragraphs += 1
+        yield paragraph
+
 def process_image(file_path):
-    """Process image files using OCR"""
+    """Process image files using OCR
+
+    Every frame of a multi-page image (such as a scanned TIFF) is OCRed,
+    in parallel when there is more than one.
+    """
     try:
-        image = Image.open(file_path)
-        text = pytesseract.image_to_string(image, lang='eng+ron')  # Support both English and Romanian
+        with Image.open(file_path) as image:
+            dimensions = image.size
+            pages = getattr(image, 'n_frames', 1)
+        text = '\n'.join(page_ocr.iter_image(file_path))
         return {
             "type": "image",
             "text_content": text,
-            "dimensions": image.size
+            "dimensions": dimensions,
+            "pages": pages
         }
     except Exception as e:
         raise ValueError(f"Error processing image: {str(e)}")
 
-def process_audio(file_path):
-    """Process audio files"""
-    recognizer = sr.Recognizer()
-    
+def process_audio(file_path, language=None, on_segment=None):
+    """Process audio files
+
+    The recording is split on silence and transcribed segment by segment;
+    the language is detected once when it is not given. ``on_segment``
+    receives each timestamped segment as soon as it is transcribed.
+    """
     try:
-        # Convert audio to WAV if necessary
-        if not file_path.lower().endswith('.wav'):
-            # TODO: Implement audio format conversion
-            pass
-
-        with sr.AudioFile(file_path) as source:
-            audio = recognizer.record(source)
-            try:
-                # Try both English and Romanian
-                text_en = recognizer.recognize_google(audio, language='en-US')
-                text_ro = recognizer.recognize_google(audio, language='ro-RO')
-                
-                return {
-                    "type": "audio",
-                    "transcription": {
-                        "english": text_en,
-                        "romanian": text_ro
-                    }
-                }
-            except sr.UnknownValueError:
-                return {
-                    "type": "audio",
-                    "error": "Could not understand audio"
-                }
-            except sr.RequestError:
-                return {
-                    "type": "audio",
-                    "error": "Could not request results"
-                }
+        return transcriber.transcribe(file_path, language, on_segment=on_segment)
+    except TranscriptionError as e:
+        return {
+            "type": "audio",
+            "error": str(e)
+        }
     except Exception as e:
         raise ValueError(f"Error processing audio: {str(e)}")
 
-def process_video(file_path):
-    """Process video files"""
+def process_video(file_path, language=None, on_segment=None):
+    """Process video files
+
+    Distinct slides are OCRed and the audio track is transcribed; see
+    ``VideoProcessor``. ``on_segment`` receives transcript segments as they
+    are recognized.
+    """
     try:
-        # TODO: Implement video processing with frame extraction and audio transcription
+        return video_processor.process(file_path, language, on_segment=on_segment)
+    except TranscriptionError as e:
         return {
             "type": "video",
-            "status": "Video processing not yet implemented",
-            "file_info": {
-                "size": os.path.getsize(file_path),
-                "path": os.path.basename(file_path)
-            }
+            "error": str(e)
         }
     except Exception as e:
         raise ValueError(f"Error processing video: {str(e)}")
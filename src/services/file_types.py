@@ -0,0 +1,182 @@
+"""Upload file types: MIME sniffing and the registry of supported formats"""
+import importlib
+import os
+import threading
+from typing import BinaryIO, Callable, Iterable, Iterator, List, Optional, Union
+
+# Bytes read from the start of a file to identify its type
+SNIFF_BYTES = 2048
+
+CATEGORIES = ('text', 'image', 'audio', 'video')
+
+# Workload pools a file of each category keeps busy while it is processed
+CATEGORY_WORKLOADS = {
+    'text': ('text',),
+    'image': ('ocr',),
+    'audio': ('audio',),
+    'video': ('audio', 'ocr')
+}
+
+
+class UnsupportedFileType(ValueError):
+    """Raised when the content of a file is not a format that can be processed"""
+
+    def __init__(self, mime_type):
+        super().__init__(f"Unsupported file type: {mime_type}")
+        self.mime_type = mime_type
+
+
+class FileType:
+    """A supported format and the extractor that reads its text
+
+    ``mime_types`` are accepted whatever the file is called. ``generic_mime_types``
+    are what libmagic reports when it cannot tell the format apart from its
+    container (a DOCX is a ZIP archive, an HTML fragment is plain text); they
+    are only accepted together with one of the format's ``extensions``. A
+    trailing ``/*`` matches any subtype.
+
+    ``extractor`` is only used for text documents: a callable, or a
+    ``'module:function'`` path imported on first use, taking
+    ``(file_path, stats)`` and yielding chunks of text. ``workloads`` names
+    the worker pools processing the format uses, so uploads can be turned
+    away while those pools are saturated.
+    """
+
+    def __init__(self, name: str, category: str, mime_types: Iterable[str], extensions: Iterable[str],
+                 extractor: Union[str, Callable, None] = None, generic_mime_types: Iterable[str] = (),
+                 workloads: Optional[Iterable[str]] = None):
+        if category not in CATEGORIES:
+            raise ValueError(f"Unknown file category: {category}")
+        self.name = name
+        self.category = category
+        self.mime_types = tuple(mime_types)
+        self.extensions = frozenset(ext.lower() for ext in extensions)
+        self.generic_mime_types = tuple(generic_mime_types)
+        self.workloads = tuple(workloads) if workloads is not None else CATEGORY_WORKLOADS[category]
+        self._extractor = extractor
+
+    @property
+    def mime_type(self) -> str:
+        return self.mime_types[0]
+
+    @property
+    def extractor(self) -> Optional[Callable[..., Iterator[str]]]:
+        if isinstance(self._extractor, str):
+            module_name, qualname = self._extractor.split(':', 1)
+            target = importlib.import_module(module_name)
+            for attr in qualname.split('.'):
+                target = getattr(target, attr)
+            self._extractor = target
+        return self._extractor
+
+    def matches(self, mime_type: str, ext: str) -> bool:
+        if mime_type in self.mime_types:
+            return True
+        return ext in self.extensions and any(_mime_matches(mime_type, generic)
+                                              for generic in self.generic_mime_types)
+
+
+_registry: List[FileType] = []
+
+
+def register_file_type(file_type: FileType) -> FileType:
+    """Make a format acceptable for upload; later registrations take precedence"""
+    _registry.insert(0, file_type)
+    return file_type
+
+
+def registered_file_types() -> List[FileType]:
+    return list(_registry)
+
+
+def get_file_type(mime_type: str, filename: str = '') -> FileType:
+    """The registered format for a sniffed MIME type and the file's name
+
+    When several formats accept the MIME type, the one owning the file's
+    extension wins, then one claiming the MIME type outright.
+    """
+    ext = _extension(filename)
+    candidates = [t for t in _registry if t.matches(mime_type, ext)]
+    if not candidates:
+        raise UnsupportedFileType(mime_type)
+    candidates.sort(key=lambda t: (ext not in t.extensions, mime_type not in t.mime_types))
+    return candidates[0]
+
+
+_local = threading.local()
+
+
+def _magic():
+    """libmagic handle of the current thread; handles are not safe to share between threads"""
+    handle = getattr(_local, 'magic', None)
+    if handle is None:
+        import magic
+        handle = _local.magic = magic.Magic(mime=True)
+    return handle
+
+
+def sniff(head: bytes, filename: str = '') -> FileType:
+    """Identify a file from its first bytes (``SNIFF_BYTES`` are enough)"""
+    if not head:
+        raise UnsupportedFileType('application/x-empty')
+    return get_file_type(_magic().from_buffer(head[:SNIFF_BYTES]), filename)
+
+
+def sniff_stream(stream: BinaryIO, filename: str = '') -> FileType:
+    """Identify an upload from the start of its stream, then rewind the stream"""
+    position = stream.tell()
+    head = stream.read(SNIFF_BYTES)
+    stream.seek(position)
+    return sniff(head, filename)
+
+
+def detect_file_type(file_path: str) -> FileType:
+    """Identify a file on disk from its first bytes"""
+    with open(file_path, 'rb') as f:
+        return sniff(f.read(SNIFF_BYTES), os.path.basename(file_path))
+
+
+def allowed_file(filename, file_type=None):
+    """Check if file extension is allowed"""
+    ext = _extension(filename)
+    return any(ext in t.extensions for t in _registry if file_type is None or t.category == file_type)
+
+
+def _extension(filename):
+    return filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
+
+
+def _mime_matches(mime_type, pattern):
+    if pattern.endswith('/*'):
+        return mime_type.startswith(pattern[:-1])
+    return mime_type == pattern
+
+
+_EXTRACTORS = 'src.services.file_processor'
+
+for _file_type in [
+    FileType('text', 'text', ['text/plain'], ['txt'], f'{_EXTRACTORS}:extract_plain_text',
+             generic_mime_types=['text/*']),
+    # Scanned pages are OCRed
+    FileType('pdf', 'text', ['application/pdf'], ['pdf'], f'{_EXTRACTORS}:extract_pdf', workloads=['text', 'ocr']),
+    FileType('docx', 'text', ['application/vnd.openxmlformats-officedocument.wordprocessingml.document'],
+             ['docx'], f'{_EXTRACTORS}:extract_docx',
+             generic_mime_types=['application/zip', 'application/octet-stream']),
+    # Legacy Word documents are accepted but no text is extracted from them
+    FileType('doc', 'text', ['application/msword'], ['doc'],
+             generic_mime_types=['application/CDFV2', 'application/x-ole-storage']),
+    FileType('html', 'text', ['text/html', 'application/xhtml+xml'], ['html', 'htm', 'xhtml'],
+             f'{_EXTRACTORS}:extract_html', generic_mime_types=['text/plain', 'text/xml']),
+    FileType('epub', 'text', ['application/epub+zip'], ['epub'], f'{_EXTRACTORS}:extract_epub',
+             generic_mime_types=['application/zip']),
+    FileType('png', 'image', ['image/png'], ['png']),
+    FileType('jpeg', 'image', ['image/jpeg'], ['jpg', 'jpeg']),
+    FileType('tiff', 'image', ['image/tiff'], ['tif', 'tiff']),
+    FileType('mp3', 'audio', ['audio/mpeg'], ['mp3'], generic_mime_types=['application/octet-stream']),
+    FileType('wav', 'audio', ['audio/x-wav', 'audio/wav', 'audio/vnd.wave'], ['wav']),
+    FileType('m4a', 'audio', ['audio/x-m4a', 'audio/mp4'], ['m4a'], generic_mime_types=['video/mp4']),
+    FileType('mp4', 'video', ['video/mp4'], ['mp4']),
+    FileType('avi', 'video', ['video/x-msvideo'], ['avi']),
+    FileType('mov', 'video', ['video/quicktime'], ['mov']),
+]:
+    register_file_type(_file_type)
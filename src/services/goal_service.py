@@ -4,10 +4,18 @@ from sqlalchemy.orm.session import Session
 
 from src.models import LearningGoal, GoalType, User
 from src import db
+from src.services.concept_index import ConceptIndex, concept_key
+from src.services.topic_clusterer import EncoderNotReady, TopicClusterer, topic_clusterer as default_topic_clusterer
+
+# Concepts from the user's documents added to each suggested topic cluster
+RELATED_TOPICS_PER_CLUSTER = 5
 
 class GoalService:
-    def __init__(self, db_session: Session = None):
+    def __init__(self, db_session: Session = None, concept_index: ConceptIndex = None,
+                 topic_clusterer: TopicClusterer = None):
         self.db = db_session or db.session
+        self.concept_index = concept_index or ConceptIndex(db_session)
+        self.topic_clusterer = topic_clusterer or default_topic_clusterer
 
     def create_goal(self, user_id: int, goal_data: Dict[str, Any]) -> LearningGoal:
         """Create a new learning goal for a user."""
@@ -102,8 +110,8 @@ class GoalService:
             })
 
         # Suggest topic mastery goals for related concepts
-        topic_clusters = self._cluster_related_topics(learning_progress)
-        for cluster in topic_clusters[:3]:  # Suggest up to 3 topic clusters
+        topic_clusters = self._cluster_related_topics(learning_progress, limit=3)
+        for cluster in topic_clusters:  # Suggest up to 3 topic clusters
             suggestions.append({
                 'goal_type': GoalType.TOPIC_MASTERY.value,
                 'title': f'Master {cluster["main_topic"]}',
@@ -117,23 +125,42 @@ class GoalService:
 
         return suggestions
 
-    def _cluster_related_topics(self, learning_progress: List[Any]) -> List[Dict[str, Any]]:
-        """Helper method to cluster related topics based on learning progress."""
-        # This is a placeholder implementation
-        # TODO: Implement actual topic clustering using NLP and graph analysis
+    def _cluster_related_topics(
+        self,
+        learning_progress: List[Any],
+        limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Helper method to cluster topics by meaning, largest cluster first, with the concepts they co-occur with.
+
+        Until the topic embedding model has loaded, each topic is a cluster of its own.
+        """
+        if not learning_progress:
+            return []
+
+        names = {}
+        for progress in learning_progress:
+            names.setdefault(concept_key(progress.concept_name), progress.concept_name)
+        user_id = learning_progress[0].user_id
+
+        # Embeddings are cached per user, so only topics new since the last call are embedded
+        try:
+            groups = self.topic_clusterer.clusters(user_id, [progress.concept_name for progress in learning_progress])
+        except EncoderNotReady:
+            groups = [[key] for key in names if key]
         clusters = []
-        seen_topics = set()
+        seen_topics = set(names)
         
-        for progress in learning_progress:
-            if progress.concept_name in seen_topics:
-                continue
-                
+        for keys in groups[:limit]:
+            main_topic = names[keys[0]]
+            related = [concept for concept in self.concept_index.related_concepts(
+                main_topic, user_id=user_id, limit=RELATED_TOPICS_PER_CLUSTER)
+                if concept['key'] not in seen_topics]
             cluster = {
-                'main_topic': progress.concept_name,
-                'related_topics': [progress.concept_name],  # In real impl, find related topics
-                'prerequisites': []  # In real impl, identify prerequisites
+                'main_topic': main_topic,
+                'related_topics': [names[key] for key in keys] + [concept['label'] for concept in related],
+                'prerequisites': []  # Prerequisites are not tracked by the index
             }
             clusters.append(cluster)
-            seen_topics.add(progress.concept_name)
+            seen_topics.update(concept['key'] for concept in related)
             
         return clusters
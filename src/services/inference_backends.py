@@ -0,0 +1,183 @@
+"""CPU inference backends for the transformer models: fp32, dynamic int8 and ONNX Runtime"""
+import os
+import re
+import time
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional
+
+BACKENDS = ('fp32', 'int8', 'onnx')
+
+# Transformer models of the registry: name -> (pipeline task, Hugging Face model)
+TRANSFORMER_MODELS = {
+    'ner:en': ('ner', 'dbmdz/bert-large-cased-finetuned-conll03-english'),
+    'ner:ro': ('ner', 'xlm-roberta-base'),
+    'summarization:en': ('summarization', 'facebook/bart-large-cnn'),
+    'summarization:ro': ('summarization', 'facebook/mbart-large-cc25'),
+}
+
+# Texts the benchmark runs when none are given
+SAMPLE_TEXTS = [
+    "Mitosis is the process by which a eukaryotic cell divides its nucleus into two identical nuclei. "
+    "It is divided into prophase, metaphase, anaphase and telophase. During prophase the chromatin "
+    "condenses into chromosomes, and in metaphase the chromosomes line up at the equator of the spindle. "
+    "Cytokinesis then splits the cytoplasm, producing two daughter cells with the same genetic material.",
+    "The French Revolution began in 1789 when the Estates-General met at Versailles. Louis XVI faced a "
+    "financial crisis after France's involvement in the American War of Independence. The storming of "
+    "the Bastille in Paris on 14 July became a symbol of the revolution, which ended the absolute "
+    "monarchy and led to the rise of Napoleon Bonaparte.",
+    "Supply and demand determine prices in a competitive market. When demand for a good rises while "
+    "supply stays the same, its price increases until the quantity demanded equals the quantity "
+    "supplied. Economists such as Alfred Marshall described this equilibrium with intersecting supply "
+    "and demand curves, a model still taught in introductory economics courses.",
+]
+
+
+def model_backend(name: str) -> str:
+    """Backend configured for a registry model: its ``MODEL_BACKENDS`` entry, else ``MODEL_BACKEND``"""
+    backends = _parse_backends(os.environ.get('MODEL_BACKENDS', ''))
+    backend = backends.get(name, os.environ.get('MODEL_BACKEND', 'fp32'))
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend for {name}: {backend}")
+    return backend
+
+
+def onnx_model_dir(name: str) -> str:
+    """Directory the ONNX export of a registry model is written to and loaded from"""
+    return os.path.join(os.environ.get('ONNX_MODEL_DIR', 'models/onnx'), re.sub(r'[^\w.-]', '_', name))
+
+
+def load_pipeline(name: str, backend: Optional[str] = None):
+    """Hugging Face pipeline of a registry model running on the given or configured backend
+
+    ``int8`` quantizes the weights of the linear layers to 8-bit integers
+    when the model is loaded; activations are quantized on the fly. ``onnx``
+    runs a graph exported beforehand with ``flask convert-model``.
+    """
+    from transformers import AutoTokenizer, pipeline
+
+    task, model_name = TRANSFORMER_MODELS[name]
+    backend = backend or model_backend(name)
+    if backend == 'fp32':
+        return pipeline(task, model=model_name)
+
+    if backend == 'int8':
+        import torch
+        model = _auto_model_class(task).from_pretrained(model_name)
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        return pipeline(task, model=model, tokenizer=AutoTokenizer.from_pretrained(model_name))
+
+    export_dir = onnx_model_dir(name)
+    if not os.path.isdir(export_dir):
+        raise FileNotFoundError(f"No ONNX export of {name} in {export_dir}; run `flask convert-model {name}`")
+    model = _ort_model_class(task).from_pretrained(export_dir)
+    return pipeline(task, model=model, tokenizer=AutoTokenizer.from_pretrained(export_dir))
+
+
+def convert_model(name: str, output_dir: Optional[str] = None) -> str:
+    """Export a registry model to ONNX, with its tokenizer, and return the export directory"""
+    from transformers import AutoTokenizer
+
+    task, model_name = TRANSFORMER_MODELS[name]
+    output_dir = output_dir or onnx_model_dir(name)
+    model = _ort_model_class(task).from_pretrained(model_name, export=True)
+    model.save_pretrained(output_dir)
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(output_dir)
+    return output_dir
+
+
+def benchmark(name: str, texts: Optional[List[str]] = None, backends: Iterable[str] = BACKENDS,
+              repeat: int = 1) -> List[Dict[str, Any]]:
+    """Latency of each backend on the texts, and how closely its output matches fp32
+
+    Agreement is the mean unigram F1 of each summary against the fp32
+    summary, or the F1 of the recognized entities against the fp32 ones.
+    """
+    task, _ = TRANSFORMER_MODELS[name]
+    texts = texts or SAMPLE_TEXTS
+    backends = list(backends)
+    if 'fp32' not in backends:
+        # The reference outputs come from the full precision model
+        backends.insert(0, 'fp32')
+
+    reference = None
+    results = []
+    for backend in backends:
+        started = time.perf_counter()
+        try:
+            model = load_pipeline(name, backend)
+        except (FileNotFoundError, ImportError) as e:
+            results.append({'backend': backend, 'error': str(e)})
+            continue
+        load_seconds = time.perf_counter() - started
+
+        # The first call pays for lazy initialization and is not timed
+        model(texts[0])
+        latencies = []
+        outputs = []
+        for _ in range(repeat):
+            outputs = []
+            for text in texts:
+                started = time.perf_counter()
+                outputs.append(model(text))
+                latencies.append(time.perf_counter() - started)
+        outputs = [_comparable_output(task, output) for output in outputs]
+        if backend == 'fp32':
+            reference = outputs
+
+        results.append({
+            'backend': backend,
+            'load_seconds': load_seconds,
+            'latency_seconds': _latency_summary(latencies),
+            'agreement': sum(_f1(output, expected) for output, expected in zip(outputs, reference)) / len(texts)
+            if reference is not None else None
+        })
+        del model
+    return results
+
+
+def _auto_model_class(task):
+    import transformers
+    return transformers.AutoModelForSeq2SeqLM if task == 'summarization' else \
+        transformers.AutoModelForTokenClassification
+
+
+def _ort_model_class(task):
+    from optimum import onnxruntime
+    return onnxruntime.ORTModelForSeq2SeqLM if task == 'summarization' else \
+        onnxruntime.ORTModelForTokenClassification
+
+
+def _comparable_output(task, output):
+    """The parts of a pipeline output two backends should agree on"""
+    if task == 'summarization':
+        return output[0]['summary_text'].lower().split()
+    return [(entity.get('entity_group') or entity.get('entity'), entity['word']) for entity in output]
+
+
+def _f1(predicted, expected):
+    if not predicted and not expected:
+        return 1.0
+    overlap = sum((Counter(predicted) & Counter(expected)).values())
+    if not overlap:
+        return 0.0
+    precision = overlap / len(predicted)
+    recall = overlap / len(expected)
+    return 2 * precision * recall / (precision + recall)
+
+
+def _latency_summary(latencies):
+    ordered = sorted(latencies)
+    return {
+        'mean': sum(ordered) / len(ordered),
+        'p50': ordered[len(ordered) // 2],
+        'p95': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    }
+
+
+def _parse_backends(value: str) -> Dict[str, str]:
+    """Parse ``model=backend,model=backend`` into a backend mapping"""
+    backends = {}
+    for item in filter(None, (part.strip() for part in value.split(','))):
+        name, backend = item.split('=', 1)
+        backends[name.strip()] = backend.strip()
+    return backends
@@ -0,0 +1,393 @@
+"""SQLite-backed job queue with a local worker pool"""
+import importlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    func TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    state TEXT NOT NULL,
+    stages TEXT NOT NULL DEFAULT '[]',
+    result TEXT,
+    error TEXT,
+    worker TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    updated_at REAL NOT NULL,
+    heartbeat_at REAL
+);
+CREATE INDEX IF NOT EXISTS ix_jobs_state_created ON jobs (state, created_at);
+"""
+
+# Columns added after the first release, created on databases that predate them
+ADDED_COLUMNS = {'heartbeat_at': 'REAL'}
+
+# How often a worker records that it is still running its job
+HEARTBEAT_SECONDS = float(os.environ.get('JOB_HEARTBEAT_SECONDS', 30))
+
+# A running job whose worker missed heartbeats for this long is put back in the queue
+STALE_SECONDS = float(os.environ.get('JOB_STALE_SECONDS', 300))
+
+# How long finished and failed jobs are kept
+RETENTION_SECONDS = float(os.environ.get('JOB_RETENTION_SECONDS', 7 * 24 * 3600))
+
+# Least time between two sweeps for stale and expired jobs
+MAINTENANCE_INTERVAL = 60
+
+QUEUED = 'queued'
+RUNNING = 'running'
+FINISHED = 'finished'
+FAILED = 'failed'
+
+
+class JobContext:
+    """Handle passed to a running job so it can report per-stage progress"""
+
+    def __init__(self, queue, job_id):
+        self.queue = queue
+        self.id = job_id
+
+    def declare_stages(self, names: List[str]):
+        """Register the stages up front so clients can see what is pending"""
+        def declare(stages):
+            known = {stage['name'] for stage in stages}
+            stages.extend(_new_stage(name) for name in names if name not in known)
+        self.queue._modify_stages(self.id, declare)
+
+    def set_progress(self, name: str, progress: float):
+        """Update the completion fraction (0-1) of a running stage"""
+        self._update_stage(name, progress=max(0.0, min(1.0, progress)))
+
+    def add_partial_result(self, name: str, item: Any):
+        """Publish a piece of a stage's output before the job finishes"""
+        def add(stages):
+            for stage in stages:
+                if stage['name'] == name:
+                    stage.setdefault('partial_results', []).append(item)
+                    return
+            stages.append(dict(_new_stage(name), partial_results=[item]))
+        self.queue._modify_stages(self.id, add)
+
+    @contextmanager
+    def stage(self, name: str):
+        """Mark a stage as running for the duration of the block"""
+        self._update_stage(name, state=RUNNING, started_at=time.time(), progress=0.0)
+        try:
+            yield self
+        except Exception as e:
+            self._update_stage(name, state=FAILED, finished_at=time.time(), error=str(e))
+            raise
+        self._update_stage(name, state=FINISHED, finished_at=time.time(), progress=1.0)
+
+    def _update_stage(self, name, **changes):
+        def update(stages):
+            for stage in stages:
+                if stage['name'] == name:
+                    break
+            else:
+                stage = _new_stage(name)
+                stages.append(stage)
+            stage.update(changes)
+        self.queue._modify_stages(self.id, update)
+
+
+class JobQueue:
+    """Persistent job queue that needs no external broker
+
+    Jobs are stored in a SQLite file, so any process sharing the file can
+    enqueue work or report on it. Each process runs its own pool of worker
+    threads that claim queued jobs atomically and execute them. A worker
+    records a heartbeat while it runs a job, so a job is only requeued once
+    its worker stopped beating, however long its stages take. The workers
+    also purge finished jobs older than the retention period.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, num_workers: Optional[int] = None,
+                 poll_interval: float = 0.5, app=None):
+        self.db_path = db_path
+        self.num_workers = num_workers
+        self.poll_interval = poll_interval
+        self.app = None
+        self._handlers: Dict[str, Callable] = {}
+        self._local = threading.local()
+        self._workers: List[threading.Thread] = []
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._start_lock = threading.Lock()
+        self._schema_ready = False
+        self._next_maintenance = 0.0
+        self._maintenance_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Configure the queue from the Flask app config"""
+        self.app = app
+        if self.db_path is None:
+            self.db_path = app.config.get('JOB_QUEUE_PATH') or os.environ.get(
+                'JOB_QUEUE_PATH', os.path.join(app.instance_path, 'jobs.db'))
+        if self.num_workers is None:
+            self.num_workers = int(app.config.get('JOB_WORKERS') or os.environ.get('JOB_WORKERS', 2))
+        app.extensions['job_queue'] = self
+
+    def enqueue(self, func: Union[Callable, str], **payload) -> str:
+        """Queue ``func(job, **payload)`` for background execution and return the job id
+
+        ``func`` may also be given as a ``"module:function"`` path, so callers
+        don't have to import a heavy handler module just to queue work for it.
+        """
+        if isinstance(func, str):
+            func_path = func
+        else:
+            func_path = f"{func.__module__}:{func.__qualname__}"
+            self._handlers[func_path] = func
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, func, payload, state, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, func_path, json.dumps(payload), QUEUED, now, now)
+            )
+        self.start()
+        self._wakeup.set()
+        return job_id
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return the public state of a job, or None if it does not exist"""
+        row = self._connection().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+
+        stages = json.loads(row['stages'])
+        finished = sum(1 for stage in stages if stage['state'] in (FINISHED, FAILED))
+        return {
+            'id': row['id'],
+            'state': row['state'],
+            'stages': stages,
+            'progress': 1.0 if row['state'] == FINISHED else (finished / len(stages) if stages else 0.0),
+            'result': json.loads(row['result']) if row['result'] else None,
+            'error': row['error'],
+            'created_at': row['created_at'],
+            'started_at': row['started_at'],
+            'finished_at': row['finished_at']
+        }
+
+    def start(self):
+        """Start the worker threads for this process if they are not running"""
+        with self._start_lock:
+            self._workers = [worker for worker in self._workers if worker.is_alive()]
+            if self._workers:
+                return
+            self._stopping.clear()
+            self.requeue_stale_jobs()
+            for i in range(self.num_workers or 1):
+                worker = threading.Thread(target=self._work, name=f'job-worker-{i}', daemon=True)
+                worker.start()
+                self._workers.append(worker)
+
+    def stop(self, timeout: Optional[float] = None):
+        """Signal the workers to exit once their current job completes"""
+        self._stopping.set()
+        self._wakeup.set()
+        for worker in self._workers:
+            worker.join(timeout)
+        self._workers = []
+
+    def run_pending(self) -> int:
+        """Execute queued jobs on the calling thread until none are left"""
+        count = 0
+        while self._run_next():
+            count += 1
+        return count
+
+    def requeue_stale_jobs(self, max_age: Optional[float] = None) -> int:
+        """Put jobs whose worker stopped sending heartbeats back in the queue"""
+        if max_age is None:
+            max_age = STALE_SECONDS
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET state = ?, worker = NULL, heartbeat_at = NULL, updated_at = ? "
+                "WHERE state = ? AND COALESCE(heartbeat_at, started_at, updated_at) < ?",
+                (QUEUED, time.time(), RUNNING, time.time() - max_age)
+            )
+            return cursor.rowcount
+
+    def purge_finished_jobs(self, max_age: Optional[float] = None) -> int:
+        """Delete finished and failed jobs that ended more than ``max_age`` seconds ago"""
+        if max_age is None:
+            max_age = RETENTION_SECONDS
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "DELETE FROM jobs WHERE state IN (?, ?) AND finished_at < ?",
+                (FINISHED, FAILED, time.time() - max_age)
+            )
+            return cursor.rowcount
+
+    def _maintain(self):
+        """Requeue stale jobs and purge expired ones, at most once per maintenance interval"""
+        with self._maintenance_lock:
+            if time.monotonic() < self._next_maintenance:
+                return
+            self._next_maintenance = time.monotonic() + MAINTENANCE_INTERVAL
+        self.requeue_stale_jobs()
+        self.purge_finished_jobs()
+
+    def _work(self):
+        while not self._stopping.is_set():
+            try:
+                self._maintain()
+                ran = self._run_next()
+            except Exception:
+                logger.exception("Job worker crashed while claiming a job")
+                ran = False
+            if not ran:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+
+    def _run_next(self) -> bool:
+        job = self._claim()
+        if job is None:
+            return False
+
+        context = JobContext(self, job['id'])
+        done = threading.Event()
+        heartbeat = threading.Thread(target=self._beat, args=(job['id'], done), name=f"job-heartbeat-{job['id']}",
+                                     daemon=True)
+        heartbeat.start()
+        try:
+            handler = self._resolve(job['func'])
+            if self.app is not None:
+                with self.app.app_context():
+                    result = handler(context, **json.loads(job['payload']))
+            else:
+                result = handler(context, **json.loads(job['payload']))
+            self._finish(job['id'], FINISHED, result=json.dumps(result))
+        except Exception as e:
+            logger.exception("Job %s failed", job['id'])
+            self._finish(job['id'], FAILED, error=str(e))
+        finally:
+            done.set()
+            heartbeat.join()
+        return True
+
+    def _beat(self, job_id, done):
+        """Record a heartbeat for a running job until ``done`` is set"""
+        while not done.wait(HEARTBEAT_SECONDS):
+            try:
+                with self._transaction() as conn:
+                    conn.execute("UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND state = ?",
+                                 (time.time(), job_id, RUNNING))
+            except sqlite3.Error:
+                logger.exception("Failed to record the heartbeat of job %s", job_id)
+
+    def _claim(self) -> Optional[sqlite3.Row]:
+        worker = f"{os.getpid()}:{threading.get_ident()}"
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE state = ? ORDER BY created_at LIMIT 1", (QUEUED,)
+            ).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            conn.execute(
+                "UPDATE jobs SET state = ?, worker = ?, started_at = ?, updated_at = ?, heartbeat_at = ? "
+                "WHERE id = ?",
+                (RUNNING, worker, now, now, now, row['id'])
+            )
+            return row
+
+    def _finish(self, job_id, state, result=None, error=None):
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET state = ?, result = ?, error = ?, finished_at = ?, updated_at = ? "
+                "WHERE id = ?",
+                (state, result, error, now, now, job_id)
+            )
+
+    def _resolve(self, func_path: str) -> Callable:
+        if func_path not in self._handlers:
+            module_name, qualname = func_path.split(':', 1)
+            target = importlib.import_module(module_name)
+            for attr in qualname.split('.'):
+                target = getattr(target, attr)
+            self._handlers[func_path] = target
+        return self._handlers[func_path]
+
+    def _modify_stages(self, job_id, modify: Callable[[List[Dict[str, Any]]], None]):
+        """Apply ``modify`` to a job's stage list atomically
+
+        Stages of one job may be updated from several threads at once, so the
+        read and write happen inside a single write transaction.
+        """
+        with self._transaction() as conn:
+            row = conn.execute("SELECT stages FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return
+            stages = json.loads(row['stages'])
+            modify(stages)
+            conn.execute(
+                "UPDATE jobs SET stages = ?, updated_at = ? WHERE id = ?",
+                (json.dumps(stages), time.time(), job_id)
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, creating the database on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            if self.db_path is None:
+                raise RuntimeError("JobQueue has no database path; call init_app() first")
+            directory = os.path.dirname(os.path.abspath(self.db_path))
+            os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            if not self._schema_ready:
+                conn.executescript(SCHEMA)
+                columns = {column['name'] for column in conn.execute("PRAGMA table_info(jobs)")}
+                for name, column_type in ADDED_COLUMNS.items():
+                    if name not in columns:
+                        try:
+                            conn.execute(f"ALTER TABLE jobs ADD COLUMN {name} {column_type}")
+                        except sqlite3.OperationalError as e:
+                            # Another process added it first
+                            if 'duplicate column' not in str(e):
+                                raise
+                self._schema_ready = True
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+
+def _new_stage(name):
+    return {
+        'name': name,
+        'state': QUEUED,
+        'progress': 0.0,
+        'started_at': None,
+        'finished_at': None,
+        'error': None
+    }
@@ -0,0 +1,264 @@
+"""Persistent knowledge graph merged incrementally from the concepts of each processed document"""
+import logging
+import os
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import networkx as nx
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+
+from src.extensions import db
+from src.models.knowledge_graph import KnowledgeEdge, KnowledgeGraphDocument, KnowledgeNode
+from src.services.concept_index import DOCUMENT_TYPES, concept_key
+
+logger = logging.getLogger(__name__)
+
+# Deepest neighbourhood a query may ask for
+MAX_DEPTH = int(os.environ.get('KNOWLEDGE_GRAPH_MAX_DEPTH', 3))
+
+# Largest number of bound parameters put in one IN clause
+_IN_BATCH = 500
+
+
+class KnowledgeGraphStore:
+    """Nodes and weighted edges of each user's knowledge graph, per course
+
+    Nodes are keyed by the normalized label of their concept (see
+    ``concept_key``), so a concept found in several documents is a single
+    node. Merging a document adds to the mention and document counts of its
+    nodes and to the weights of its relations, touching no other rows, and
+    a document is only merged once. Queries read the stored graph, so a
+    whole semester of uploads can be explored without processing any of
+    them again.
+    """
+
+    def __init__(self, db_session=None, max_depth: int = MAX_DEPTH):
+        self._db = db_session
+        self.max_depth = max_depth
+
+    @property
+    def db(self):
+        return self._db or db.session
+
+    def merge_document(self, document_type: str, document_id, concepts: Dict[str, Any],
+                       user_id: Optional[int] = None, course: Optional[str] = None,
+                       language: str = 'en') -> bool:
+        """Merge the concepts and relations of a document into the graph; False if it was merged before
+
+        A merge that collides with a concurrent one, of the same document
+        or of one adding the same nodes or relations, is rolled back and
+        tried once more against the rows that merge stored. A second
+        collision is rolled back and reported as False.
+        """
+        if document_type not in DOCUMENT_TYPES:
+            raise ValueError(f"Unknown document type: {document_type}")
+        document_id = str(document_id)
+        try:
+            return self._merge(document_type, document_id, concepts, user_id, course, language)
+        except IntegrityError:
+            self.db.rollback()
+        try:
+            return self._merge(document_type, document_id, concepts, user_id, course, language)
+        except IntegrityError:
+            self.db.rollback()
+            logger.warning("Knowledge graph merge of %s %s collided twice, skipped", document_type, document_id)
+            return False
+
+    def _merge(self, document_type, document_id, concepts, user_id, course, language):
+        if self._is_merged(document_type, document_id):
+            return False
+        # Claimed first, so a concurrent merge of the same document fails before touching the graph
+        self.db.add(KnowledgeGraphDocument(document_type=document_type, document_id=document_id,
+                                           user_id=user_id, course=course))
+        self.db.flush()
+
+        nodes, edges = document_graph(concepts, language)
+        stored = {}
+        keys = list(nodes)
+        for batch in _batches(keys):
+            for node in self.db.query(KnowledgeNode).filter(
+                    KnowledgeNode.user_id == user_id, KnowledgeNode.course == course, KnowledgeNode.key.in_(batch)):
+                stored[node.key] = node
+
+        for key, found in nodes.items():
+            node = stored.get(key)
+            if node is None:
+                node = stored[key] = KnowledgeNode(key=key, label=found['label'], node_type=found['type'],
+                                                   course=course, user_id=user_id, mention_count=0,
+                                                   document_count=0)
+                self.db.add(node)
+            elif node.node_type == 'concept':
+                node.node_type = found['type']
+            if found['definition'] and not node.definition:
+                node.definition = found['definition']
+            node.mention_count += found['mentions']
+            node.document_count += 1
+        self.db.flush()
+
+        ids = {key: node.id for key, node in stored.items()}
+        wanted = {(ids[source], ids[target], relation): count for (source, target, relation), count in edges.items()}
+        known = {}
+        # Filtering on sources alone keeps every IN clause within one batch
+        for batch in _batches(list({source_id for source_id, _, _ in wanted})):
+            for edge in self.db.query(KnowledgeEdge).filter(KnowledgeEdge.source_id.in_(batch)):
+                edge_key = (edge.source_id, edge.target_id, edge.relation)
+                if edge_key in wanted:
+                    known[edge_key] = edge
+        for edge_key, count in wanted.items():
+            edge = known.get(edge_key)
+            if edge is None:
+                source_id, target_id, relation = edge_key
+                edge = known[edge_key] = KnowledgeEdge(source_id=source_id, target_id=target_id,
+                                                       relation=relation, weight=0)
+                self.db.add(edge)
+            edge.weight += count
+
+        self.db.commit()
+        return True
+
+    def _is_merged(self, document_type, document_id):
+        return self.db.query(KnowledgeGraphDocument.id).filter_by(
+            document_type=document_type, document_id=document_id).first() is not None
+
+    def neighbourhood(self, term: str, user_id: Optional[int] = None, course: Optional[str] = None,
+                      depth: int = 1, page: int = 1, per_page: int = 50, language: str = 'en') -> Dict[str, Any]:
+        """Nodes within ``depth`` relations of a concept, a page at a time
+
+        Relations are followed in both directions. Nodes come nearest
+        first, then most documented first, each with its ``distance`` from
+        the concept; the edges returned link the nodes of the page to the
+        rest of the neighbourhood. Without a course, the concept's node in
+        every course of the user is a starting point.
+        """
+        depth = max(0, min(depth, self.max_depth))
+        page = max(page, 1)
+        distances = self._distances(self._centers(term, user_id, course, language), depth)
+        ordered = self._order(distances)
+        page_ids = ordered[(page - 1) * per_page:page * per_page]
+
+        nodes = {node.id: node for node in self._load(KnowledgeNode, KnowledgeNode.id, page_ids)}
+        edges = []
+        if page_ids:
+            edges = [edge for edge in self.db.query(KnowledgeEdge).filter(or_(
+                KnowledgeEdge.source_id.in_(page_ids), KnowledgeEdge.target_id.in_(page_ids)))
+                if edge.source_id in distances and edge.target_id in distances]
+        return {
+            'term': term,
+            'depth': depth,
+            'page': page,
+            'per_page': per_page,
+            'total': len(ordered),
+            'nodes': [dict(nodes[node_id].to_dict(), distance=distances[node_id]) for node_id in page_ids],
+            'edges': [edge.to_dict() for edge in edges]
+        }
+
+    def to_networkx(self, term: Optional[str] = None, user_id: Optional[int] = None,
+                    course: Optional[str] = None, depth: int = 1, language: str = 'en') -> nx.MultiDiGraph:
+        """Export the neighbourhood of a concept, or without ``term`` the whole graph, to NetworkX
+
+        Nodes are the stored node ids with the label, type, definition and
+        counts as attributes; each relation between two nodes is an edge
+        keyed by the relation.
+        """
+        if term is None:
+            query = self.db.query(KnowledgeNode.id).filter(KnowledgeNode.user_id == user_id)
+            if course is not None:
+                query = query.filter(KnowledgeNode.course == course)
+            node_ids = [node_id for node_id, in query]
+        else:
+            depth = max(0, min(depth, self.max_depth))
+            node_ids = list(self._distances(self._centers(term, user_id, course, language), depth))
+
+        graph = nx.MultiDiGraph()
+        for node in self._load(KnowledgeNode, KnowledgeNode.id, node_ids):
+            graph.add_node(node.id, label=node.label, type=node.node_type, definition=node.definition,
+                           mentions=node.mention_count, documents=node.document_count)
+        for edge in self._load(KnowledgeEdge, KnowledgeEdge.source_id, node_ids):
+            if edge.target_id in graph:
+                graph.add_edge(edge.source_id, edge.target_id, key=edge.relation, relation=edge.relation,
+                               weight=edge.weight)
+        return graph
+
+    def _centers(self, term, user_id, course, language):
+        query = self.db.query(KnowledgeNode.id).filter(
+            KnowledgeNode.user_id == user_id, KnowledgeNode.key == concept_key(term, language))
+        if course is not None:
+            query = query.filter(KnowledgeNode.course == course)
+        return [node_id for node_id, in query]
+
+    def _distances(self, start_ids, depth):
+        """Distance of every node within ``depth`` relations of the start nodes, one query per level"""
+        distances = {node_id: 0 for node_id in start_ids}
+        frontier = list(start_ids)
+        for distance in range(1, depth + 1):
+            reached = set()
+            for batch in _batches(frontier):
+                for source_id, target_id in self.db.query(KnowledgeEdge.source_id, KnowledgeEdge.target_id).filter(
+                        or_(KnowledgeEdge.source_id.in_(batch), KnowledgeEdge.target_id.in_(batch))):
+                    reached.update((source_id, target_id))
+            frontier = [node_id for node_id in reached if node_id not in distances]
+            if not frontier:
+                break
+            distances.update((node_id, distance) for node_id in frontier)
+        return distances
+
+    def _order(self, distances):
+        documents = {}
+        for batch in _batches(list(distances)):
+            documents.update(self.db.query(KnowledgeNode.id, KnowledgeNode.document_count).filter(
+                KnowledgeNode.id.in_(batch)))
+        return sorted(distances, key=lambda node_id: (distances[node_id], -(documents.get(node_id) or 0), node_id))
+
+    def _load(self, model, column, ids):
+        for batch in _batches(list(ids)):
+            yield from self.db.query(model).filter(column.in_(batch))
+
+
+def document_graph(concepts: Dict[str, Any], language: str = 'en') -> Tuple[Dict[str, Dict[str, Any]], Counter]:
+    """Nodes by key and relation counts by ``(source key, target key, relation)`` of a ``ConceptExtractor`` result"""
+    nodes = {}
+
+    def add(text, node_type, mentions=1, definition=None):
+        key = concept_key(text, language)
+        if not key:
+            return None
+        node = nodes.get(key)
+        if node is None:
+            node = nodes[key] = {'label': ' '.join(text.split())[:200], 'type': node_type, 'mentions': 0,
+                                 'definition': None}
+        elif node['type'] == 'concept':
+            node['type'] = node_type
+        node['mentions'] += mentions
+        if definition and not node['definition']:
+            node['definition'] = definition
+        return key
+
+    for term in concepts.get('terms', []):
+        add(term['term'], 'term')
+    for entity_type, entities in concepts.get('entities', {}).items():
+        for entity in entities:
+            add(entity['text'], entity_type, entity.get('count', 1))
+    for definition in concepts.get('definitions', []):
+        add(definition['term'], 'term', definition=definition['definition'])
+
+    relationships = concepts.get('relationships', {})
+    for node in relationships.get('nodes', []):
+        # Relationship nodes repeat mentions already counted above
+        add(node['id'], node.get('type', 'concept'), mentions=0)
+    edges = Counter()
+    for edge in relationships.get('edges', []):
+        source = add(edge['source'], 'concept', mentions=0)
+        target = add(edge['target'], 'concept', mentions=0)
+        relation = ' '.join(edge['relation'].lower().split())[:100]
+        if source and target and source != target and relation:
+            edges[(source, target, relation)] += 1
+    return nodes, edges
+
+
+def _batches(items: List[Any]) -> Iterable[List[Any]]:
+    for start in range(0, len(items), _IN_BATCH):
+        yield items[start:start + _IN_BATCH]
+
+
+knowledge_graph_store = KnowledgeGraphStore()
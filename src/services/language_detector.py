@@ -0,0 +1,186 @@
+"""Character n-gram language detection used to route text to the right models"""
+import math
+import os
+import re
+from collections import Counter
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Languages there are models for, with text their n-gram profiles are learned from
+TRAINING_TEXTS = {
+    'en': (
+        "The cell is the basic unit of life. All living things are made of one or more cells, and every "
+        "cell comes from another cell that divided. During mitosis the nucleus of the cell divides into "
+        "two nuclei with the same number of chromosomes. The history of the modern world was shaped by "
+        "the industrial revolution, which began in Britain in the eighteenth century and spread through "
+        "Europe and North America. Students should read the chapter carefully before the exam and write "
+        "a short summary of each section. In mathematics, a function assigns to each element of a set "
+        "exactly one element of another set. These are the questions that we will answer in the next "
+        "lesson: what happens when the temperature of a gas increases, and why does the pressure change? "
+        "Energy cannot be created or destroyed; it can only be transformed from one form into another. "
+        "The teacher explained how the economy works and which factors influence the prices of goods. "
+        "Learning a new language requires practice, patience and a lot of reading and listening."
+    ),
+    'ro': (
+        "Celula este unitatea de bază a vieții. Toate organismele vii sunt formate din una sau mai multe "
+        "celule, iar fiecare celulă provine dintr-o altă celulă care s-a divizat. În timpul mitozei, "
+        "nucleul celulei se împarte în doi nuclei cu același număr de cromozomi. Istoria lumii moderne a "
+        "fost influențată de revoluția industrială, care a început în Marea Britanie în secolul al "
+        "optsprezecelea și s-a răspândit în Europa și America de Nord. Elevii trebuie să citească cu "
+        "atenție capitolul înainte de examen și să scrie un rezumat scurt pentru fiecare secțiune. În "
+        "matematică, o funcție asociază fiecărui element al unei mulțimi exact un element al altei "
+        "mulțimi. Acestea sunt întrebările la care vom răspunde în lecția următoare: ce se întâmplă când "
+        "temperatura unui gaz crește și de ce se schimbă presiunea? Energia nu poate fi creată sau "
+        "distrusă, ci doar transformată dintr-o formă în alta. Profesorul a explicat cum funcționează "
+        "economia și care sunt factorii care influențează prețurile bunurilor. Învățarea unei limbi noi "
+        "necesită exercițiu, răbdare și multă lectură."
+    ),
+}
+
+# Characters of a text the document language is detected from
+SAMPLE_CHARS = int(os.environ.get('LANGUAGE_DETECTION_SAMPLE_CHARS', 4096))
+
+# Detections less certain than this fall back to the requested language
+MIN_CONFIDENCE = float(os.environ.get('LANGUAGE_DETECTION_MIN_CONFIDENCE', 0.8))
+
+# Paragraphs shorter than this are not detected on their own and stay with their neighbours
+MIN_PARAGRAPH_CHARS = 200
+
+# Characters of each paragraph its language is detected from
+PARAGRAPH_SAMPLE_CHARS = 512
+
+_NON_LETTERS = re.compile(r'[\W\d_]+')
+
+
+class Detection:
+    """The language of a text and the posterior probability of that guess"""
+
+    def __init__(self, language: str, confidence: float, scores: Optional[Dict[str, float]] = None):
+        self.language = language
+        self.confidence = confidence
+        self.scores = scores or {}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'language': self.language, 'confidence': self.confidence, 'scores': self.scores}
+
+
+class LanguageDetector:
+    """Naive Bayes classifier over character 1- to 3-grams
+
+    Only the first ``sample_chars`` characters of a text are looked at, so
+    detection costs the same whatever the document's length. When it is
+    less certain than ``min_confidence``, or the text is too short to tell,
+    the requested language is used instead. With ``enabled`` false the
+    requested language is always used.
+    """
+
+    def __init__(self, training_texts: Optional[Dict[str, str]] = None, max_n: int = 3,
+                 sample_chars: int = SAMPLE_CHARS, min_confidence: float = MIN_CONFIDENCE,
+                 default_language: str = 'en', enabled: Optional[bool] = None):
+        self.max_n = max_n
+        self.sample_chars = sample_chars
+        self.min_confidence = min_confidence
+        self.default_language = default_language
+        self.enabled = enabled if enabled is not None else os.environ.get('LANGUAGE_DETECTION', 'auto') != 'off'
+        self._log_probs: Dict[str, Dict[str, float]] = {}
+        self._unseen: Dict[str, float] = {}
+        for language, text in (training_texts or TRAINING_TEXTS).items():
+            counts = Counter(self._ngrams(text))
+            total = sum(counts.values())
+            vocabulary = len(counts) + 1
+            self._log_probs[language] = {gram: math.log((count + 1) / (total + vocabulary))
+                                         for gram, count in counts.items()}
+            self._unseen[language] = math.log(1 / (total + vocabulary))
+
+    @property
+    def languages(self) -> List[str]:
+        return list(self._log_probs)
+
+    def detect(self, text: str, requested: Optional[str] = None) -> Detection:
+        """Language of a text, from its first ``sample_chars`` characters"""
+        fallback = requested or self.default_language
+        if not self.enabled:
+            return Detection(fallback, 1.0 if requested else 0.0)
+
+        grams = self._ngrams(text[:self.sample_chars])
+        if len(grams) < 20:
+            return Detection(fallback, 0.0)
+        # Overlapping n-grams of one text are far from independent, so the summed
+        # log-likelihoods are scaled down to keep the confidence meaningful
+        scale = math.sqrt(len(grams))
+        scores = {language: sum(log_probs.get(gram, self._unseen[language]) for gram in grams) / scale
+                  for language, log_probs in self._log_probs.items()}
+        best = max(scores.values())
+        total = sum(math.exp(score - best) for score in scores.values())
+        probabilities = {language: math.exp(score - best) / total for language, score in scores.items()}
+        language = max(probabilities, key=probabilities.get)
+        if probabilities[language] < self.min_confidence:
+            return Detection(fallback, probabilities.get(fallback, 0.0), probabilities)
+        return Detection(language, probabilities[language], probabilities)
+
+    def segments(self, text: str, requested: Optional[str] = None) -> List[Tuple[str, Detection]]:
+        """Split a text into runs of consecutive paragraphs in the same language
+
+        Each paragraph is detected from its first ``PARAGRAPH_SAMPLE_CHARS``
+        characters; a paragraph too short to detect reliably joins the run
+        before it. A text in a single language comes back as one segment.
+        """
+        document = self.detect(text, requested)
+        runs: List[Tuple[List[str], List[Tuple[int, Detection]]]] = []
+        for paragraph in _paragraphs(text):
+            if len(paragraph.strip()) < MIN_PARAGRAPH_CHARS and runs:
+                runs[-1][0].append(paragraph)
+                continue
+            detection = self.detect(paragraph[:PARAGRAPH_SAMPLE_CHARS], document.language)
+            if runs and runs[-1][1][-1][1].language == detection.language:
+                runs[-1][0].append(paragraph)
+                runs[-1][1].append((len(paragraph), detection))
+            else:
+                runs.append(([paragraph], [(len(paragraph), detection)]))
+
+        if len(runs) <= 1:
+            return [(text, document)]
+        return [('\n'.join(paragraphs), _combine(detections)) for paragraphs, detections in runs]
+
+    def _ngrams(self, text: str) -> List[str]:
+        grams = []
+        for word in _NON_LETTERS.sub(' ', text.lower()).split():
+            padded = f" {word} "
+            for n in range(1, self.max_n + 1):
+                grams.extend(padded[i:i + n] for i in range(len(padded) - n + 1))
+        return grams
+
+
+def summarize_detections(segments: List[Tuple[int, Detection]]) -> Dict[str, Any]:
+    """Report of the dominant language of a document and of each of its language runs
+
+    ``segments`` are the length in characters and the detection of each
+    run, so callers need not keep the text of a run once it is analyzed.
+    """
+    characters = Counter()
+    for length, detection in segments:
+        characters[detection.language] += length
+    language = characters.most_common(1)[0][0]
+    total = sum(characters.values()) or 1
+    return {
+        'language': language,
+        'confidence': sum(d.confidence * length for length, d in segments if d.language == language)
+        / (characters[language] or 1),
+        'segments': [{'language': d.language, 'confidence': d.confidence, 'characters': length,
+                      'share': length / total} for length, d in segments]
+    }
+
+
+def _paragraphs(text: str) -> Iterator[str]:
+    for paragraph in text.split('\n'):
+        if paragraph.strip():
+            yield paragraph
+
+
+def _combine(detections: List[Tuple[int, Detection]]) -> Detection:
+    """One detection for a run of paragraphs, with their length-weighted confidence"""
+    total = sum(length for length, _ in detections) or 1
+    return Detection(detections[0][1].language,
+                     sum(length * detection.confidence for length, detection in detections) / total)
+
+
+language_detector = LanguageDetector()
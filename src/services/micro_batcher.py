@@ -0,0 +1,117 @@
+"""Micro-batching of model inference across concurrent requests"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, List, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """Merge items submitted by concurrent callers into shared model batches
+
+    Items are grouped by a key (the model and its generation parameters),
+    since only items with the same key can share a batch. A group is run as
+    soon as it holds ``max_batch_size`` items, or once its oldest item has
+    waited ``max_wait_ms``; that short window lets chunks from requests
+    arriving at about the same time share a forward pass. Batches run one at
+    a time on a single scheduler thread, which leaves the model's own
+    intra-op parallelism to use the cores.
+
+    ``run_batch(key, items)`` must return one result per item, in order.
+    """
+
+    def __init__(self, run_batch: Callable[[Hashable, List[Any]], Sequence[Any]], max_batch_size: int = 8,
+                 max_wait_ms: float = 10, name: str = 'batcher'):
+        self.run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.name = name
+        self._pending: 'OrderedDict[Hashable, List]' = OrderedDict()
+        self._oldest: Dict[Hashable, float] = {}
+        self._condition = threading.Condition()
+        self._thread = None
+        self._batches = 0
+        self._items = 0
+        self._seconds = 0.0
+
+    def submit(self, key: Hashable, items: Sequence[Any]) -> List[Future]:
+        """Queue items for batching and return a future per item"""
+        futures = []
+        with self._condition:
+            pending = self._pending.setdefault(key, [])
+            self._oldest.setdefault(key, time.perf_counter())
+            for item in items:
+                future = Future()
+                pending.append((item, future))
+                futures.append(future)
+            self._ensure_thread()
+            self._condition.notify()
+        return futures
+
+    def map(self, key: Hashable, items: Sequence[Any]) -> List[Any]:
+        """Run items through the model in shared batches and return their results in order"""
+        return [future.result() for future in self.submit(key, items)]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._condition:
+            return {
+                'name': self.name,
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait * 1000,
+                'pending': sum(len(entries) for entries in self._pending.values()),
+                'batches': self._batches,
+                'items': self._items,
+                'mean_batch_size': self._items / self._batches if self._batches else None,
+                'batch_seconds': self._seconds
+            }
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name=f"{self.name}-scheduler", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            key, entries = self._next_batch()
+            items = [item for item, _ in entries]
+            started = time.perf_counter()
+            try:
+                results = list(self.run_batch(key, items))
+                if len(results) != len(items):
+                    raise RuntimeError(f"Batch returned {len(results)} results for {len(items)} items")
+            except Exception as e:
+                logger.exception("Batch of %d items failed", len(items))
+                for _, future in entries:
+                    future.set_exception(e)
+            else:
+                for (_, future), result in zip(entries, results):
+                    future.set_result(result)
+
+            with self._condition:
+                self._batches += 1
+                self._items += len(items)
+                self._seconds += time.perf_counter() - started
+
+    def _next_batch(self):
+        """Wait until a group is full or its oldest item has waited long enough, and take it"""
+        with self._condition:
+            while True:
+                now = time.perf_counter()
+                deadline = None
+                for key, entries in self._pending.items():
+                    due = self._oldest[key] + self.max_wait
+                    if len(entries) >= self.max_batch_size or due <= now:
+                        batch, rest = entries[:self.max_batch_size], entries[self.max_batch_size:]
+                        if rest:
+                            # Leftovers keep their age so they go out in the next batch
+                            self._pending[key] = rest
+                            self._pending.move_to_end(key)
+                        else:
+                            del self._pending[key]
+                            del self._oldest[key]
+                        return key, batch
+                    deadline = due if deadline is None else min(deadline, due)
+                self._condition.wait(None if deadline is None else deadline - now)
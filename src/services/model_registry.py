@@ -0,0 +1,235 @@
+"""Process-wide registry of NLP models shared by all services"""
+import gc
+import logging
+import os
+import resource
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from src.services.inference_backends import TRANSFORMER_MODELS
+
+logger = logging.getLogger(__name__)
+
+
+class ModelRegistry:
+    """Load each model once, on first use, and share it between services
+
+    Loading happens behind a lock so concurrent requests never load the same
+    model twice, and loads are serialized so the resident memory each one
+    adds to the process can be attributed to it.
+    """
+
+    def __init__(self):
+        self._loaders: Dict[str, Callable[[], Any]] = {}
+        self._models: Dict[str, Any] = {}
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._load_lock = threading.RLock()
+        self._loading: Dict[str, threading.Thread] = {}
+        self._loading_lock = threading.Lock()
+        self._reaper = None
+
+    def register(self, name: str, loader: Callable[[], Any]):
+        """Register a zero-argument loader under a model name"""
+        self._loaders[name] = loader
+        self._stats.setdefault(name, _empty_stats())
+
+    def get(self, name: str) -> Any:
+        """Return a model, loading it on first use"""
+        model = self._models.get(name)
+        if model is None:
+            with self._load_lock:
+                model = self._models.get(name)
+                if model is None:
+                    model = self._load(name)
+        stats = self._stats[name]
+        stats['last_used'] = time.time()
+        stats['use_count'] += 1
+        return model
+
+    def for_language(self, kind: str, language: str) -> Any:
+        """Return the model of a kind for a language code"""
+        return self.get(f"{kind}:{language_key(language)}")
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._models
+
+    def load_in_background(self, name: str):
+        """Start loading a model in a daemon thread unless it is loaded or already loading"""
+        with self._loading_lock:
+            if name in self._models or name in self._loading:
+                return
+            thread = threading.Thread(target=self._load_in_background, args=(name,), name=f'model-load-{name}',
+                                      daemon=True)
+            self._loading[name] = thread
+        thread.start()
+
+    def _load_in_background(self, name):
+        try:
+            self.get(name)
+        except Exception:
+            logger.exception("Failed to load model %s", name)
+        finally:
+            with self._loading_lock:
+                self._loading.pop(name, None)
+
+    def unload(self, name: str) -> bool:
+        """Drop a model so its memory can be reclaimed; it reloads on next use"""
+        with self._load_lock:
+            model = self._models.pop(name, None)
+            if model is None:
+                return False
+            del model
+            gc.collect()
+            self._stats[name]['loaded'] = False
+            logger.info("Unloaded model %s", name)
+            return True
+
+    def unload_idle(self, max_idle_seconds: float) -> List[str]:
+        """Unload every model that has not been used for ``max_idle_seconds``"""
+        cutoff = time.time() - max_idle_seconds
+        idle = [name for name in list(self._models) if (self._stats[name]['last_used'] or 0) < cutoff]
+        return [name for name in idle if self.unload(name)]
+
+    def start_idle_reaper(self, max_idle_seconds: float, interval: Optional[float] = None):
+        """Periodically unload idle models in a background thread"""
+        if self._reaper is not None and self._reaper.is_alive():
+            return
+
+        def reap():
+            while True:
+                time.sleep(interval or max_idle_seconds / 2)
+                try:
+                    self.unload_idle(max_idle_seconds)
+                except Exception:
+                    logger.exception("Failed to unload idle models")
+
+        self._reaper = threading.Thread(target=reap, name='model-reaper', daemon=True)
+        self._reaper.start()
+
+    def memory_report(self) -> Dict[str, Any]:
+        """Resident memory attributed to each model, and for the whole process"""
+        models = []
+        for name in sorted(self._loaders):
+            stats = dict(self._stats[name], name=name)
+            if name in self._models:
+                stats['param_bytes'] = _parameter_bytes(self._models[name])
+            models.append(stats)
+        return {
+            'process_rss_bytes': current_rss(),
+            'loaded_rss_bytes': sum(m['rss_bytes'] or 0 for m in models if m['loaded']),
+            'models': models
+        }
+
+    def _load(self, name: str) -> Any:
+        if name not in self._loaders:
+            raise KeyError(f"Unknown model: {name}")
+
+        rss_before = current_rss()
+        started = time.time()
+        model = self._loaders[name]()
+        self._models[name] = model
+
+        stats = self._stats[name]
+        stats.update(
+            loaded=True,
+            load_count=stats['load_count'] + 1,
+            loaded_at=time.time(),
+            load_seconds=time.time() - started,
+            rss_bytes=max(0, current_rss() - rss_before)
+        )
+        logger.info("Loaded model %s in %.1fs (+%d MB RSS)", name, stats['load_seconds'],
+                    stats['rss_bytes'] // (1024 * 1024))
+        return model
+
+
+def language_key(language: str) -> str:
+    """Map a language code to the model set used for it"""
+    return 'en' if language == 'en' else 'ro'
+
+
+def current_rss() -> int:
+    """Resident set size of this process in bytes"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        # Peak RSS is the best portable approximation (kilobytes on Linux, bytes on macOS)
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return usage if os.uname().sysname == 'Darwin' else usage * 1024
+
+
+def _parameter_bytes(model) -> Optional[int]:
+    """Size of a transformer model's weights, if it has any"""
+    module = getattr(model, 'model', model)
+    parameters = getattr(module, 'parameters', None)
+    if not callable(parameters):
+        return None
+    try:
+        return sum(p.numel() * p.element_size() for p in parameters())
+    except Exception:
+        return None
+
+
+def _empty_stats():
+    return {
+        'loaded': False,
+        'load_count': 0,
+        'loaded_at': None,
+        'load_seconds': None,
+        'rss_bytes': None,
+        'last_used': None,
+        'use_count': 0
+    }
+
+
+def _spacy_loader(model_name):
+    def load():
+        import spacy
+        return spacy.load(model_name)
+    return load
+
+
+def _vosk_loader(env_var, default_path):
+    def load():
+        from vosk import Model
+        return Model(os.environ.get(env_var, default_path))
+    return load
+
+
+def _pipeline_loader(name):
+    def load():
+        from src.services.inference_backends import load_pipeline
+        return load_pipeline(name)
+    return load
+
+
+def _encoder_loader():
+    def load():
+        from src.services.topic_clusterer import SentenceEncoder
+        return SentenceEncoder()
+    return load
+
+
+def _tokenizer_loader(model_name):
+    def load():
+        from transformers import AutoTokenizer
+        return AutoTokenizer.from_pretrained(model_name)
+    return load
+
+
+model_registry = ModelRegistry()
+
+model_registry.register('spacy:en', _spacy_loader('en_core_web_sm'))
+model_registry.register('spacy:ro', _spacy_loader('xx_ent_wiki_sm'))  # Multilingual model for Romanian
+# Transformer pipelines run on the inference backend configured for each of them
+for _name in TRANSFORMER_MODELS:
+    model_registry.register(_name, _pipeline_loader(_name))
+# Separate tokenizer instances for chunking, so measuring text never races the pipeline's own tokenizer
+model_registry.register('summarization-tokenizer:en', _tokenizer_loader(TRANSFORMER_MODELS['summarization:en'][1]))
+model_registry.register('summarization-tokenizer:ro', _tokenizer_loader(TRANSFORMER_MODELS['summarization:ro'][1]))
+model_registry.register('ner-tokenizer:en', _tokenizer_loader(TRANSFORMER_MODELS['ner:en'][1]))
+model_registry.register('ner-tokenizer:ro', _tokenizer_loader(TRANSFORMER_MODELS['ner:ro'][1]))
+model_registry.register('topic-embedding', _encoder_loader())
+model_registry.register('vosk:en', _vosk_loader('VOSK_MODEL_EN', 'models/vosk-model-small-en-us-0.15'))
+model_registry.register('vosk:ro', _vosk_loader('VOSK_MODEL_RO', 'models/vosk-model-small-ro-0.1'))
@@ -0,0 +1,120 @@
+"""Page-level OCR for scanned PDFs and multi-page images"""
+import os
+from collections import deque
+from concurrent.futures import Future
+from typing import Iterable, Iterator, Optional, Tuple
+
+import pytesseract
+from PIL import Image
+from pdf2image import convert_from_path
+
+from src.services.workload_pools import WorkloadPool, workload_pools
+
+# Support both English and Romanian
+DEFAULT_LANGUAGES = 'eng+ron'
+
+
+class PageOCR:
+    """OCR the pages of a document on the OCR pool, streaming text back in page order
+
+    Each worker renders and recognizes one page at a time, so only the pages
+    in flight are held in memory. Pages that already carry a text layer are
+    passed through without OCR. All documents share the bounded ``ocr``
+    workload pool, so concurrent uploads do not oversubscribe the CPUs.
+    """
+
+    def __init__(self, dpi: Optional[int] = None, languages: Optional[str] = None,
+                 min_text_chars: Optional[int] = None, pool: Optional[WorkloadPool] = None):
+        self.dpi = dpi or int(os.environ.get('OCR_DPI', 300))
+        self.languages = languages or os.environ.get('OCR_LANGUAGES', DEFAULT_LANGUAGES)
+        self.min_text_chars = min_text_chars if min_text_chars is not None else int(
+            os.environ.get('OCR_MIN_TEXT_CHARS', 25))
+        self.pool = pool or workload_pools.get('ocr')
+
+    @property
+    def workers(self) -> int:
+        return self.pool.workers
+
+    def shutdown(self):
+        """Stop the worker pool"""
+        self.pool.shutdown()
+
+    def has_text_layer(self, text: str) -> bool:
+        """Whether text extracted from a PDF page is substantial enough to skip OCR"""
+        return len(text.strip()) >= self.min_text_chars
+
+    def iter_pdf(self, file_path: str, page_texts: Iterable[str]) -> Iterator[Tuple[str, bool]]:
+        """Yield ``(text, ocr_used)`` for each page of a PDF, in page order
+
+        ``page_texts`` provides the text layer of each page; pages where it
+        is missing or too short are rendered at ``dpi`` and OCRed.
+        """
+        def pages():
+            for page_number, text in enumerate(page_texts, start=1):
+                if self.has_text_layer(text):
+                    yield text
+                else:
+                    yield self.pool.submit(_ocr_pdf_page, file_path, page_number, self.dpi, self.languages)
+
+        return self._in_order(pages())
+
+    def iter_image(self, file_path: str) -> Iterator[str]:
+        """Yield the text of each frame of an image, in frame order"""
+        with Image.open(file_path) as image:
+            frames = getattr(image, 'n_frames', 1)
+        if frames == 1:
+            # Not worth a round trip to the pool
+            yield _ocr_image_frame(file_path, 0, self.languages)
+            return
+
+        futures = (self.pool.submit(_ocr_image_frame, file_path, frame, self.languages)
+                   for frame in range(frames))
+        for text, _ in self._in_order(futures):
+            yield text
+
+    def iter_image_files(self, file_paths: Iterable[str]) -> Iterator[str]:
+        """Yield the text of each image file, in order, OCRing them in parallel"""
+        futures = (self.pool.submit(_ocr_image_frame, path, 0, self.languages) for path in file_paths)
+        for text, _ in self._in_order(futures):
+            yield text
+
+    def _in_order(self, pages: Iterable) -> Iterator[Tuple[str, bool]]:
+        """Resolve a stream of texts and OCR futures in order, bounding the pages in flight"""
+        max_in_flight = self.workers * 2
+        pending = deque()
+        in_flight = 0
+
+        def pop():
+            nonlocal in_flight
+            page = pending.popleft()
+            if isinstance(page, Future):
+                in_flight -= 1
+                return page.result(), True
+            return page, False
+
+        for page in pages:
+            pending.append(page)
+            if isinstance(page, Future):
+                in_flight += 1
+            # Emit everything at the head that is ready, and block once too many pages are in flight
+            while pending and (in_flight >= max_in_flight or not isinstance(pending[0], Future)
+                               or pending[0].done()):
+                yield pop()
+        while pending:
+            yield pop()
+
+
+def _ocr_pdf_page(file_path, page_number, dpi, languages):
+    """Worker entry point: render one PDF page and OCR it"""
+    images = convert_from_path(file_path, dpi=dpi, first_page=page_number, last_page=page_number)
+    return pytesseract.image_to_string(images[0], lang=languages) if images else ''
+
+
+def _ocr_image_frame(file_path, frame, languages):
+    """Worker entry point: OCR one frame of a (possibly multi-page) image"""
+    with Image.open(file_path) as image:
+        image.seek(frame)
+        return pytesseract.image_to_string(image, lang=languages)
+
+
+page_ocr = PageOCR()
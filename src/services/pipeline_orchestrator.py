@@ -0,0 +1,177 @@
+"""Concurrent execution of independent pipeline stages"""
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# How often stages still waiting for a worker are checked for having started
+START_POLL_SECONDS = 0.05
+
+
+class Stage:
+    """A unit of pipeline work
+
+    ``func`` is called with ``args``; when the stage depends on another one,
+    the dependency's result is passed as the first positional argument.
+    """
+
+    def __init__(self, name: str, func: Callable, args: Tuple = (), depends_on: Optional[str] = None,
+                 timeout: Optional[float] = None):
+        self.name = name
+        self.func = func
+        self.args = args
+        self.depends_on = depends_on
+        self.timeout = timeout
+
+
+class StageTimeoutError(Exception):
+    """Raised for a stage that did not finish within its timeout"""
+
+
+class PipelineOrchestrator:
+    """Run pipeline stages concurrently on a thread or process pool
+
+    Stages without dependencies start immediately; dependent stages start as
+    soon as the stage they need has finished. A failed or timed-out stage
+    does not abort the others, so callers get partial results plus errors.
+    A stage's timeout counts from when a worker starts running it, so time
+    spent waiting for a free worker is not held against it; that wait is
+    bounded separately by ``queue_timeout``, so stages stuck behind hung
+    ones fail instead of waiting forever. A stage is reported to the job as
+    running only once a worker has picked it up. Timed-out stages cannot be
+    interrupted in a thread pool; their results are discarded when they
+    eventually finish.
+    """
+
+    def __init__(self, executor: Optional[str] = None, max_workers: Optional[int] = None,
+                 default_timeout: Optional[float] = None, stage_timeouts: Optional[Dict[str, float]] = None,
+                 queue_timeout: Optional[float] = None):
+        self.executor_type = executor or os.environ.get('ANALYSIS_EXECUTOR', 'thread')
+        if self.executor_type not in ('thread', 'process'):
+            raise ValueError(f"Unknown executor type: {self.executor_type}")
+        self.max_workers = max_workers or int(os.environ.get('ANALYSIS_WORKERS', 4))
+        self.default_timeout = default_timeout or float(os.environ.get('ANALYSIS_STAGE_TIMEOUT', 300))
+        self.stage_timeouts = stage_timeouts if stage_timeouts is not None else _parse_timeouts(
+            os.environ.get('ANALYSIS_STAGE_TIMEOUTS', ''))
+        self.queue_timeout = queue_timeout or float(os.environ.get('ANALYSIS_QUEUE_TIMEOUT', 300))
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self):
+        """The worker pool, created on first use and shared between runs"""
+        with self._lock:
+            if self._executor is None:
+                if self.executor_type == 'process':
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers, mp_context=multiprocessing.get_context('spawn'))
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix='pipeline-stage')
+            return self._executor
+
+    def shutdown(self):
+        """Stop the worker pool"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def run(self, stages: List[Stage], job=None) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        """Run the stages and return ``(results, errors)`` keyed by stage name"""
+        results: Dict[str, Any] = {}
+        errors: Dict[str, str] = {}
+        pending = {stage.name: stage for stage in stages}
+        # future -> (stage, deadline, stage context); the context is None and the deadline bounds the
+        # wait for a worker until the stage is seen running
+        running = {}
+
+        def submit_ready():
+            for name, stage in list(pending.items()):
+                if stage.depends_on in errors:
+                    errors[name] = f"Skipped because stage '{stage.depends_on}' failed"
+                    if job:
+                        _exit_with_error(self._enter(name, job), RuntimeError(errors[name]))
+                    del pending[name]
+                elif stage.depends_on is None or stage.depends_on in results:
+                    args = stage.args if stage.depends_on is None else (results[stage.depends_on],) + stage.args
+                    future = self.executor.submit(stage.func, *args)
+                    running[future] = (stage, time.monotonic() + self.queue_timeout, None)
+                    del pending[name]
+
+        submit_ready()
+        while running:
+            now = time.monotonic()
+            for future, (stage, deadline, context) in list(running.items()):
+                if context is None and (future.running() or future.done()):
+                    running[future] = (stage, now + self._timeout(stage), self._enter(stage.name, job))
+            deadline = min(deadline for _, deadline, _ in running.values())
+            timeout = deadline - now
+            if any(context is None for _, _, context in running.values()):
+                timeout = min(timeout, START_POLL_SECONDS)
+            done, _ = wait(list(running), timeout=max(0.0, timeout), return_when=FIRST_COMPLETED)
+
+            now = time.monotonic()
+            for future in list(running):
+                stage, deadline, context = running[future]
+                if future in done:
+                    error = future.exception()
+                elif now < deadline:
+                    continue
+                elif context is not None:
+                    future.cancel()
+                    error = StageTimeoutError(f"Stage '{stage.name}' timed out after {self._timeout(stage):g}s")
+                elif future.cancel():
+                    error = StageTimeoutError(
+                        f"Stage '{stage.name}' waited more than {self.queue_timeout:g}s for a worker")
+                else:
+                    # Started just now; its own timeout applies from the next check
+                    continue
+
+                del running[future]
+                if context is None:
+                    context = self._enter(stage.name, job)
+                if error is None:
+                    results[stage.name] = future.result()
+                    context.__exit__(None, None, None)
+                else:
+                    logger.warning("Pipeline stage %s failed: %s", stage.name, error)
+                    errors[stage.name] = str(error) or error.__class__.__name__
+                    _exit_with_error(context, error)
+
+            submit_ready()
+
+        return results, errors
+
+    @staticmethod
+    def _enter(name: str, job):
+        """Report a stage as running on the job and return its open context"""
+        context = job.stage(name) if job else nullcontext()
+        context.__enter__()
+        return context
+
+    def _timeout(self, stage: Stage) -> float:
+        return stage.timeout or self.stage_timeouts.get(stage.name, self.default_timeout)
+
+
+def _exit_with_error(context, error):
+    """Close a stage context so it records the failure without re-raising it"""
+    try:
+        context.__exit__(type(error), error, error.__traceback__)
+    except Exception:
+        pass
+
+
+def _parse_timeouts(value: str) -> Dict[str, float]:
+    """Parse ``stage=seconds,stage=seconds`` into a timeout mapping"""
+    timeouts = {}
+    for item in filter(None, (part.strip() for part in value.split(','))):
+        name, seconds = item.split('=', 1)
+        timeouts[name.strip()] = float(seconds)
+    return timeouts
@@ -3,6 +3,7 @@ from datetime import datetime
 from sqlalchemy import func, desc
 from src.extensions import db
 from src.models import Question, Answer, Tag, QuestionVote, AnswerVote
+from src.services.concept_index import queue_document
 
 class QAService:
     """Question and Answer service"""
@@ -27,6 +28,9 @@ class QAService:
         
         db.session.add(question)
         db.session.commit()
+
+        # Concepts are extracted in the background and added to the asker's concept index
+        queue_document('question', question.id, f"{title}\n{content}", language, user_id)
         return question
     
     @staticmethod
@@ -3,6 +3,7 @@ from datetime import datetime
 from sqlalchemy import func, desc
 from src.extensions import db
 from src.models.resource_library import Resource, ResourceCategory, ResourceRating
+from src.services.concept_index import queue_document
 
 class ResourceLibraryService:
     def create_resource(self, user_id, data):
@@ -24,6 +25,10 @@ class ResourceLibraryService:
             
         db.session.add(resource)
         db.session.commit()
+
+        # Concepts are extracted in the background and added to the owner's concept index
+        queue_document('resource', resource.id, '\n'.join(filter(None, [
+            resource.title, resource.description, resource.content])), resource.language, user_id)
         
         return self._format_resource(resource)
 
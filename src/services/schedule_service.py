@@ -9,6 +9,7 @@ from src.models import (
     LearningProgress, AnalysisResult
 )
 from src import db
+from src.services.concept_index import concept_key
 
 class ScheduleService:
     def __init__(self, db_session: Session = None):
@@ -93,7 +94,7 @@ class ScheduleService:
 
         # Select goal and topics for this session
         selected_goal = prioritized_goals[0]
-        topics = self._get_topics_for_goal(selected_goal)
+        topics = self._get_topics_for_goal(selected_goal, learning_progress)
         
         # Calculate session difficulty and duration
         avg_difficulty = np.mean([topic.difficulty_level for topic in topics]) if topics else 3
@@ -122,15 +123,26 @@ class ScheduleService:
 
         return sorted(goals, key=priority_score, reverse=True)
 
-    def _get_topics_for_goal(self, goal: LearningGoal) -> List[LearningProgress]:
-        """Get relevant topics for a goal based on metadata and analysis results."""
+    def _get_topics_for_goal(
+        self,
+        goal: LearningGoal,
+        learning_progress: Optional[List[LearningProgress]] = None
+    ) -> List[LearningProgress]:
+        """Get relevant topics for a goal, matching its topics and the progress records on their concept keys."""
         if not goal.goal_metadata or 'topics' not in goal.goal_metadata:
             return []
 
-        return self.db.query(LearningProgress).filter(
-            LearningProgress.user_id == goal.user_id,
-            LearningProgress.concept_name.in_(goal.goal_metadata['topics'])
-        ).all()
+        # "Cell cycles" in a goal matches progress on "the cell cycle"
+        keys = {concept_key(topic) for topic in goal.goal_metadata['topics']} - {''}
+        if learning_progress is None:
+            learning_progress = self.db.query(LearningProgress).filter(
+                LearningProgress.user_id == goal.user_id
+            ).all()
+
+        return [
+            progress for progress in learning_progress
+            if progress.user_id == goal.user_id and concept_key(progress.concept_name) in keys
+        ]
 
     def _select_session_type(
         self,
@@ -0,0 +1,115 @@
+"""Extractive sentence ranking on a sparse sentence-by-term matrix"""
+from typing import List, Optional
+
+import numpy as np
+from scipy import sparse
+
+RANKINGS = ('frequency', 'textrank')
+
+
+def sentence_term_matrix(sentence_ids: np.ndarray, term_ids: np.ndarray, num_sentences: int) -> sparse.csr_matrix:
+    """Count matrix with a row per sentence and a column per term
+
+    ``sentence_ids`` and ``term_ids`` give the sentence and the term of each
+    kept token; terms can be any integer ids (such as string hashes) and are
+    renumbered densely.
+    """
+    terms, columns = np.unique(np.asarray(term_ids), return_inverse=True)
+    counts = np.ones(len(columns), dtype=np.float64)
+    matrix = sparse.coo_matrix((counts, (np.asarray(sentence_ids), columns.ravel())),
+                               shape=(num_sentences, len(terms)))
+    # Repeated (sentence, term) pairs are summed into counts
+    return matrix.tocsr()
+
+
+def frequency_scores(matrix: sparse.csr_matrix, lengths: np.ndarray) -> np.ndarray:
+    """Sum of the normalized document frequency of each sentence's terms, per token of the sentence"""
+    frequencies = np.asarray(matrix.sum(axis=0)).ravel()
+    if not frequencies.size or frequencies.max() == 0:
+        return np.zeros(matrix.shape[0])
+    return (matrix @ (frequencies / frequencies.max())) / (np.asarray(lengths) + 1)
+
+
+def textrank_scores(matrix: sparse.csr_matrix, damping: float = 0.85, tolerance: float = 1e-6,
+                    max_iterations: int = 100) -> np.ndarray:
+    """PageRank of the sentences over their cosine similarity graph
+
+    The n-by-n similarity matrix is never built: with ``X`` the row-normalized
+    tf-idf matrix, multiplying by the similarities is ``X @ (X.T @ v)``, so
+    each iteration costs time linear in the number of tokens.
+    """
+    n = matrix.shape[0]
+    if n == 0:
+        return np.zeros(0)
+    normalized = _normalize_rows(_tfidf(matrix))
+    # Sentences are not linked to themselves
+    self_similarity = np.asarray(normalized.multiply(normalized).sum(axis=1)).ravel()
+    degree = _similarity_product(normalized, np.ones(n)) - self_similarity
+    linked = degree > 1e-12
+    inverse_degree = np.divide(1.0, degree, out=np.zeros(n), where=linked)
+
+    scores = np.full(n, 1.0 / n)
+    for _ in range(max_iterations):
+        share = scores * inverse_degree
+        spread = _similarity_product(normalized, share) - self_similarity * share
+        # Sentences without links spread their score evenly
+        dangling = scores[~linked].sum() / n
+        updated = (1 - damping) / n + damping * (spread + dangling)
+        converged = np.abs(updated - scores).sum() < tolerance
+        scores = updated
+        if converged:
+            break
+    return scores
+
+
+def select_sentences(scores: np.ndarray, count: int, matrix: Optional[sparse.csr_matrix] = None,
+                     diversity: float = 0.0) -> List[int]:
+    """Indexes of the sentences to extract, best first
+
+    Sentences with a non-finite score are never chosen. With ``diversity``
+    above 0 and the sentence-term ``matrix`` given, sentences are picked by
+    maximal marginal relevance: each pick trades its score off against its
+    similarity to the sentences already picked, which keeps near-duplicates
+    out of the result.
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    candidates = np.flatnonzero(np.isfinite(scores))
+    count = min(count, len(candidates))
+    if count <= 0:
+        return []
+
+    if not diversity or matrix is None:
+        top = candidates[np.argpartition(-scores[candidates], count - 1)[:count]]
+        return [int(i) for i in top[np.argsort(-scores[top], kind='stable')]]
+
+    normalized = _normalize_rows(_tfidf(matrix))
+    finite = scores[candidates]
+    spread = finite.max() - finite.min()
+    relevance = np.full(len(scores), -np.inf)
+    relevance[candidates] = (finite - finite.min()) / spread if spread else 1.0
+    closest = np.zeros(len(scores))
+    selected = []
+    for _ in range(count):
+        marginal = (1 - diversity) * relevance - diversity * closest
+        best = int(np.argmax(marginal))
+        selected.append(best)
+        relevance[best] = -np.inf
+        similarity = (normalized @ normalized[best].T).toarray().ravel()
+        closest = np.maximum(closest, similarity)
+    return selected
+
+
+def _tfidf(matrix):
+    document_frequency = np.bincount(matrix.indices, minlength=matrix.shape[1])
+    idf = np.log((1 + matrix.shape[0]) / (1 + document_frequency)) + 1
+    return matrix @ sparse.diags(idf)
+
+
+def _normalize_rows(matrix):
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    inverse = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)
+    return sparse.csr_matrix(sparse.diags(inverse) @ matrix)
+
+
+def _similarity_product(normalized, vector):
+    return normalized @ (normalized.T @ vector)
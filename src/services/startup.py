@@ -0,0 +1,164 @@
+"""Startup modes, model warm-up and startup timing"""
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, List
+
+from src.services.model_registry import model_registry
+
+logger = logging.getLogger(__name__)
+
+# lazy: build services and load models on first use
+# background: start serving immediately and warm up in a background thread
+# eager: warm up before create_app() returns
+STARTUP_MODES = ('lazy', 'background', 'eager')
+
+DEFAULT_WARMUP_MODELS = 'spacy:en,ner:en,summarization:en,topic-embedding'
+
+DEFAULT_PROFILE_COMMAND = (
+    "from src import create_app; "
+    "create_app().test_client().get('/api/health')"
+)
+
+
+class StartupMonitor:
+    """Time application startup and warm heavy models up according to the startup mode
+
+    Nothing heavy is imported or loaded while the app is created; the
+    analysis services and their models are only built when a job first needs
+    them, unless the startup mode asks for them to be warmed up ahead of time.
+    """
+
+    def __init__(self):
+        self.mode = 'lazy'
+        self.phases: Dict[str, float] = {}
+        self.warmup: Dict[str, Any] = {
+            'state': 'idle',
+            'models': [],
+            'started_at': None,
+            'finished_at': None,
+            'seconds': None,
+            'error': None
+        }
+        self._thread = None
+
+    @contextmanager
+    def phase(self, name: str):
+        """Record the wall time of a startup phase"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = time.perf_counter() - started
+
+    def init_app(self, app):
+        """Apply the configured startup mode to a freshly created app"""
+        self.mode = app.config.get('STARTUP_MODE') or os.environ.get('STARTUP_MODE', 'lazy')
+        if self.mode not in STARTUP_MODES:
+            raise ValueError(f"Unknown startup mode: {self.mode}")
+        models = _parse_models(app.config.get('WARMUP_MODELS') or os.environ.get(
+            'WARMUP_MODELS', DEFAULT_WARMUP_MODELS))
+
+        if self.mode == 'eager':
+            self.warm_up(models)
+        elif self.mode == 'background':
+            self.start_background_warmup(models)
+
+    def warm_up(self, models: List[str]):
+        """Build the analysis pipeline and load the given models"""
+        self.warmup.update(state='running', models=models, started_at=time.time(), error=None)
+        started = time.perf_counter()
+        try:
+            # Imported here so creating the app never pulls in the analysis stack
+            from src.services.analysis_pipeline import get_pipeline
+            get_pipeline()
+            for name in models:
+                model_registry.get(name)
+        except Exception as e:
+            logger.exception("Model warm-up failed")
+            self.warmup.update(state='failed', error=str(e))
+        else:
+            self.warmup['state'] = 'finished'
+        finally:
+            self.warmup.update(finished_at=time.time(), seconds=time.perf_counter() - started)
+
+    def start_background_warmup(self, models: List[str]):
+        """Warm up in a daemon thread so the app can serve requests meanwhile"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self.warm_up, args=(models,), name='model-warmup', daemon=True)
+        self._thread.start()
+
+    def report(self) -> Dict[str, Any]:
+        """Startup phase timings, warm-up state and per-model load times"""
+        return {
+            'mode': self.mode,
+            'phases': dict(self.phases),
+            'warmup': dict(self.warmup),
+            'models': [
+                {'name': m['name'], 'loaded': m['loaded'], 'load_seconds': m['load_seconds']}
+                for m in model_registry.memory_report()['models']
+            ]
+        }
+
+
+def import_times(command: str = DEFAULT_PROFILE_COMMAND, top: int = 20) -> Dict[str, Any]:
+    """Profile the imports done by ``command`` in a fresh interpreter
+
+    Runs Python with ``-X importtime`` so the numbers reflect a cold start,
+    and returns the slowest modules by cumulative time plus the self time
+    aggregated per top-level package.
+    """
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', command],
+        capture_output=True, text=True
+    )
+    total = time.perf_counter() - started
+    if completed.returncode != 0:
+        raise RuntimeError(f"Profiled command failed: {completed.stderr.strip().splitlines()[-1:]}")
+
+    modules = parse_import_times(completed.stderr)
+    packages = defaultdict(float)
+    for module in modules:
+        packages[module['module'].split('.')[0]] += module['self_seconds']
+
+    return {
+        'command': command,
+        'total_seconds': total,
+        'import_seconds': sum(m['self_seconds'] for m in modules),
+        'modules': sorted(modules, key=lambda m: m['cumulative_seconds'], reverse=True)[:top],
+        'packages': [
+            {'package': name, 'self_seconds': seconds}
+            for name, seconds in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+        ]
+    }
+
+
+def parse_import_times(output: str) -> List[Dict[str, Any]]:
+    """Parse the ``import time:`` lines written by ``python -X importtime``"""
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = [field.strip() for field in line[len('import time:'):].split('|')]
+        if len(fields) != 3 or not fields[0].isdigit():
+            continue  # Column header
+        modules.append({
+            'module': fields[2],
+            'self_seconds': int(fields[0]) / 1e6,
+            'cumulative_seconds': int(fields[1]) / 1e6
+        })
+    return modules
+
+
+def _parse_models(value: str) -> List[str]:
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+startup = StartupMonitor()
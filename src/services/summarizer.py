@@ -1,90 +1,329 @@
-from transformers import pipeline
-import spacy
 from nltk.tokenize import sent_tokenize
 from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
-from nltk.probability import FreqDist
-from heapq import nlargest
-from string import punctuation
+from collections import OrderedDict
+from concurrent.futures import Future, as_completed
+from functools import partial
+import hashlib
+import os
+import queue
 import re
+import threading
+import numpy as np
+from src.services.analyzed_document import AnalyzedDocument
+from src.services.micro_batcher import MicroBatcher
+from src.services.model_registry import model_registry
+from src.services.sentence_ranker import (RANKINGS, frequency_scores, select_sentences, sentence_term_matrix,
+                                          textrank_scores)
+from src.services.text_chunker import SentenceChunker, tokenizer_budget, tokenizer_counter
+
+def _summarize_batch(key, chunks):
+    """Summarize chunks sharing a model and length limits in one padded forward pass"""
+    language, max_length, min_length = key
+    summarizer = model_registry.for_language('summarization', language)
+    outputs = summarizer(chunks, batch_size=len(chunks), max_length=max_length, min_length=min_length,
+                         do_sample=False, truncation=True)
+    return [output['summary_text'] for output in outputs]
+
+# Shared by all requests in the process so concurrent documents fill each other's batches
+summarization_batcher = MicroBatcher(
+    _summarize_batch,
+    max_batch_size=int(os.environ.get('SUMMARY_BATCH_SIZE', 8)),
+    max_wait_ms=float(os.environ.get('SUMMARY_BATCH_WAIT_MS', 10)),
+    name='summarization'
+)
+
+# Length limits of the intermediate summaries of a hierarchical summary. They do not
+# depend on the requested length, so every level but the last is reusable across requests
+LEVEL_MAX_LENGTH = int(os.environ.get('SUMMARY_LEVEL_MAX_LENGTH', 150))
+LEVEL_MIN_LENGTH = int(os.environ.get('SUMMARY_LEVEL_MIN_LENGTH', 40))
+
+# Safety net against summaries that stop shrinking
+MAX_LEVELS = 8
+
+# How bullet points are chosen: sentence ranking (frequency or textrank), and the
+# weight (0-1) given to keeping them different from each other
+BULLET_RANKING = os.environ.get('SUMMARY_BULLET_RANKING', 'frequency')
+BULLET_DIVERSITY = float(os.environ.get('SUMMARY_BULLET_DIVERSITY', 0))
+
+class SummaryCache:
+    """In-process LRU of chunk summaries, keyed on the chunk and the generation settings"""
+
+    def __init__(self, max_entries=None):
+        self.max_entries = max_entries or int(os.environ.get('SUMMARY_CACHE_ENTRIES', 4096))
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(language, max_length, min_length, text):
+        return hashlib.sha256(f"{language}\0{max_length}\0{min_length}\0{text}".encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            summary = self._entries.get(key)
+            if summary is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return summary
+
+    def set(self, key, summary):
+        with self._lock:
+            self._entries[key] = summary
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+summary_cache = SummaryCache()
+
+def _cache_summary(key, future):
+    if future.exception() is None:
+        summary_cache.set(key, future.result())
 
 class Summarizer:
     def __init__(self):
-        # Initialize models for both languages
-        self.summarizer_en = pipeline("summarization", model="facebook/bart-large-cnn")
-        self.summarizer_ro = pipeline("summarization", model="facebook/mbart-large-cc25")
-        
-        # Load SpaCy models
-        self.nlp_en = spacy.load("en_core_web_sm")
-        self.nlp_ro = spacy.load("xx_ent_wiki_sm")  # Multilingual model for Romanian
-        
-        # Load stopwords
+        # Load stopwords (models are loaded on first use through the model registry)
         self.stopwords_en = set(stopwords.words('english'))
         # Romanian stopwords (basic set, should be expanded)
         self.stopwords_ro = set(['și', 'în', 'la', 'de', 'pe', 'cu', 'pentru', 'dar', 'sau', 'care'])
 
-    def generate_summary(self, text, language='en', max_length=150, min_length=50, summary_type='paragraph'):
+    def generate_summary(self, text, language='en', max_length=150, min_length=50, summary_type='paragraph',
+                         hierarchical=True, on_chunk=None):
         """Generate a summary of the given text"""
         if summary_type == 'bullet_points':
             return self._generate_bullet_points(text, language)
         else:
-            return self._generate_paragraph_summary(text, language, max_length, min_length)
+            return self._generate_paragraph_summary(text, language, max_length, min_length,
+                                                    hierarchical=hierarchical, on_chunk=on_chunk)
 
-    def _generate_paragraph_summary(self, text, language='en', max_length=150, min_length=50):
-        """Generate a paragraph summary using the appropriate model"""
-        # Choose the appropriate summarizer based on language
-        summarizer = self.summarizer_en if language == 'en' else self.summarizer_ro
-        
+    def generate_summary_from_document(self, document, max_length=150, min_length=50, summary_type='paragraph',
+                                       hierarchical=True):
+        """Generate a summary of an already parsed document"""
+        if summary_type == 'bullet_points':
+            return self._bullet_points_from_document(document)
+        else:
+            # Reuse the parser's sentence boundaries for chunking
+            return self._generate_paragraph_summary(document.text, document.language, max_length, min_length,
+                                                    sentences=[sentence.text for sentence in document.sentences],
+                                                    hierarchical=hierarchical)
+
+    def iter_summary(self, text, language='en', max_length=150, min_length=50, hierarchical=True):
+        """Yield ``(event, data)`` pairs while summarizing, for streaming to clients
+
+        The bullet points are computed alongside the paragraph summary, and
+        both they and each chunk's summary are yielded as soon as they are
+        ready. The events are ``chunking`` (how the text was split),
+        ``chunk``, ``bullet_points``, ``paragraph``, ``error`` if a part
+        fails, and finally ``summary`` with both summaries.
+        """
+        events = queue.Queue()
+
+        def paragraph():
+            for event in self._paragraph_events(text, language, max_length, min_length, hierarchical=hierarchical):
+                events.put(event)
+
+        def bullet_points():
+            events.put(('bullet_points', self._generate_bullet_points(text, language)))
+
+        def produce(name, work):
+            try:
+                work()
+            except Exception as e:
+                events.put(('error', {'part': name, 'error': str(e) or e.__class__.__name__}))
+            finally:
+                events.put((None, name))
+
+        for name, work in (('paragraph', paragraph), ('bullet_points', bullet_points)):
+            threading.Thread(target=produce, args=(name, work), name=f"summary-{name}", daemon=True).start()
+
+        summaries = {'paragraph': None, 'bullet_points': None}
+        running = len(summaries)
+        while running:
+            event, data = events.get()
+            if event is None:
+                running -= 1
+                continue
+            if event in summaries:
+                summaries[event] = data
+            yield event, data
+        yield 'summary', summaries
+
+    def combine_summaries(self, summaries_list, language='en', max_length=150, min_length=50, hierarchical=True):
+        """Combine the summaries of consecutive windows of one document
+
+        In hierarchical mode the window summaries are summarized again,
+        level by level, into one summary of the requested length.
+        """
+        paragraphs = [s['paragraph']['summary'] for s in summaries_list if s.get('paragraph')]
+        if hierarchical and len(paragraphs) > 1:
+            chunks, _ = self._chunker(language).chunk(paragraphs)
+            final_summary, _ = self._summarize_hierarchically(chunks, language, max_length, min_length)
+        else:
+            final_summary = ' '.join(paragraphs)
+
+        bullet_points = []
+        for summaries in summaries_list:
+            for point in (summaries.get('bullet_points') or {}).get('points', []):
+                if point not in bullet_points:
+                    bullet_points.append(point)
+
+        return {
+            'paragraph': {
+                'type': 'paragraph',
+                'summary': final_summary,
+                'length': len(final_summary.split())
+            },
+            'bullet_points': {
+                'type': 'bullet_points',
+                'points': bullet_points,
+                'count': len(bullet_points)
+            }
+        }
+
+    def _generate_paragraph_summary(self, text, language='en', max_length=150, min_length=50, sentences=None,
+                                    hierarchical=True, on_chunk=None):
+        """Generate a paragraph summary using the appropriate model
+
+        With ``hierarchical`` set, the chunk summaries are summarized again
+        until a single pass produces the summary, so its length stays within
+        ``max_length`` however long the document is. Otherwise the chunk
+        summaries are concatenated. ``on_chunk`` receives each chunk's
+        summary as soon as it is ready.
+        """
+        for event, data in self._paragraph_events(text, language, max_length, min_length, sentences, hierarchical):
+            if event == 'chunk' and on_chunk:
+                on_chunk(data)
+            elif event == 'paragraph':
+                return data
+
+    def _paragraph_events(self, text, language, max_length, min_length, sentences=None, hierarchical=True):
+        """Yield the chunking stats, each chunk's summary in completion order, then the paragraph summary"""
         # Clean and prepare text
-        cleaned_text = self._clean_text(text)
+        if sentences is None:
+            sentences = sent_tokenize(text)
+        sentences = [self._clean_text(sentence) for sentence in sentences]
         
-        # Split text into chunks if it's too long
-        chunks = self._split_into_chunks(cleaned_text, max_length=1024)
+        # Pack whole sentences into chunks that fill the model's token limit
+        chunks, chunk_stats = self._chunker(language).chunk(sentences)
+        yield 'chunking', chunk_stats.to_dict()
         
-        summaries = []
-        for chunk in chunks:
-            summary = summarizer(chunk, 
-                               max_length=max_length,
-                               min_length=min_length,
-                               do_sample=False)[0]['summary_text']
-            summaries.append(summary)
+        # With a single chunk the first pass is already the final one
+        reduce = hierarchical and len(chunks) > 1
+        lengths = (LEVEL_MAX_LENGTH, LEVEL_MIN_LENGTH) if reduce else (max_length, min_length)
+        futures = self._submit_chunks(chunks, language, *lengths)
+        indexes = {future: index for index, future in enumerate(futures)}
+        for future in as_completed(futures):
+            yield 'chunk', {'index': indexes[future], 'total': len(chunks), 'summary': future.result()}
         
-        # Combine summaries if there are multiple chunks
-        final_summary = ' '.join(summaries)
+        if reduce:
+            # The first level is already summarized, so the reduction starts at the next one
+            final_summary, levels = self._summarize_hierarchically(
+                chunks, language, max_length, min_length, summaries=[future.result() for future in futures])
+        else:
+            final_summary = ' '.join(future.result() for future in futures)
+            levels = [{'level': 0, 'chunks': len(chunks)}] if hierarchical else []
         
-        return {
+        yield 'paragraph', {
             'type': 'paragraph',
             'summary': final_summary,
-            'length': len(final_summary.split())
+            'length': len(final_summary.split()),
+            'chunking': chunk_stats.to_dict(),
+            'levels': levels
         }
 
-    def _generate_bullet_points(self, text, language='en', num_points=5):
+    def _summarize_hierarchically(self, chunks, language, max_length, min_length, summaries=None):
+        """Map-reduce: summarize the chunks, pack the summaries into new chunks and repeat
+
+        Each level is summarized with the fixed intermediate lengths and
+        cached, so only the final pass depends on the requested length.
+        ``summaries`` are the intermediate summaries of ``chunks`` when the
+        caller already has them. Returns the summary and the number of
+        chunks at each level.
+        """
+        chunker = self._chunker(language)
+        levels = []
+        while len(chunks) > 1 and len(levels) < MAX_LEVELS:
+            levels.append({'level': len(levels), 'chunks': len(chunks)})
+            if summaries is None:
+                # All chunks of a level are independent and go to the model together
+                summaries = self._summarize_chunks(chunks, language, LEVEL_MAX_LENGTH, LEVEL_MIN_LENGTH)
+            chunks, _ = chunker.chunk(summaries)
+            summaries = None
+        levels.append({'level': len(levels), 'chunks': len(chunks)})
+        return ' '.join(self._summarize_chunks(chunks, language, max_length, min_length)), levels
+
+    def _summarize_chunks(self, chunks, language, max_length, min_length):
+        """Summarize each chunk, reusing cached summaries"""
+        return [future.result() for future in self._submit_chunks(chunks, language, max_length, min_length)]
+
+    def _submit_chunks(self, chunks, language, max_length, min_length):
+        """Futures of each chunk's summary; cached summaries come back already resolved"""
+        futures = []
+        missing = []
+        for chunk in chunks:
+            key = summary_cache.make_key(language, max_length, min_length, chunk)
+            summary = summary_cache.get(key)
+            if summary is None:
+                missing.append((len(futures), key))
+                futures.append(None)
+            else:
+                future = Future()
+                future.set_result(summary)
+                futures.append(future)
+
+        if missing:
+            # Chunks go to the model in padded batches, shared with other concurrent requests
+            submitted = summarization_batcher.submit((language, max_length, min_length),
+                                                     [chunks[index] for index, _ in missing])
+            for (index, key), future in zip(missing, submitted):
+                future.add_done_callback(partial(_cache_summary, key))
+                futures[index] = future
+        return futures
+
+    def _chunker(self, language):
+        """Sentence chunker sized to the summarization model's input limit"""
+        tokenizer = model_registry.for_language('summarization-tokenizer', language)
+        budget = int(os.environ.get('SUMMARY_CHUNK_TOKENS') or tokenizer_budget(tokenizer))
+        overlap = int(os.environ.get('SUMMARY_CHUNK_OVERLAP', 0))
+        return SentenceChunker(tokenizer_counter(tokenizer), max_tokens=budget, overlap_tokens=overlap)
+
+    def _generate_bullet_points(self, text, language='en', num_points=5, ranking=None, diversity=None):
         """Generate bullet points from the text"""
-        # Choose appropriate NLP model and stopwords
-        nlp = self.nlp_en if language == 'en' else self.nlp_ro
-        stop_words = self.stopwords_en if language == 'en' else self.stopwords_ro
-        
-        # Process the text
-        doc = nlp(text)
-        
-        # Tokenize into sentences
-        sentences = [sent.text.strip() for sent in doc.sents]
-        
-        # Calculate sentence scores based on word frequency
-        word_freq = self._calculate_word_frequency(text, stop_words)
-        sentence_scores = self._score_sentences(sentences, word_freq)
-        
-        # Get the top sentences
-        summary_sentences = nlargest(num_points, sentence_scores, key=sentence_scores.get)
-        
-        # Convert to bullet points
-        bullet_points = []
-        for sent in summary_sentences:
-            # Clean and format the sentence
-            point = sent.strip()
-            # Remove redundant information and make more concise
-            point = self._format_bullet_point(point)
-            bullet_points.append(point)
+        return self._bullet_points_from_document(AnalyzedDocument.parse(text, language), num_points,
+                                                 ranking, diversity)
+
+    def _bullet_points_from_document(self, document, num_points=5, ranking=None, diversity=None):
+        """Generate bullet points from the sentences of a parsed document
+
+        Sentences are scored on a sentence-by-term matrix built in one pass
+        over the document's tokens, either by the frequency of their words or
+        by TextRank. A ``diversity`` above 0 picks them by maximal marginal
+        relevance instead of by score alone.
+        """
+        ranking = ranking or BULLET_RANKING
+        if ranking not in RANKINGS:
+            raise ValueError(f"Unknown bullet point ranking: {ranking}")
+        diversity = BULLET_DIVERSITY if diversity is None else diversity
+
+        stop_words = self.stopwords_en if document.language == 'en' else self.stopwords_ro
+        matrix, lengths = self._sentence_term_matrix(document, stop_words)
+        if ranking == 'textrank':
+            scores = textrank_scores(matrix)
+        else:
+            scores = frequency_scores(matrix, lengths)
+
+        # A sentence repeated in the text is only offered once
+        texts = document.sentence_texts
+        seen = set()
+        for index, text in enumerate(texts):
+            if text in seen or not text:
+                scores[index] = -np.inf
+            seen.add(text)
+
+        bullet_points = [self._format_bullet_point(texts[index])
+                         for index in select_sentences(scores, num_points, matrix, diversity)]
         
         return {
             'type': 'bullet_points',
@@ -92,6 +331,23 @@ class Summarizer:
             'count': len(bullet_points)
         }
 
+    def _sentence_term_matrix(self, document, stop_words):
+        """Term counts of each sentence, excluding stop words, punctuation and numbers, and sentence lengths"""
+        doc = document.doc
+        sentences = document.sentences
+        if not len(doc) or not sentences:
+            return sentence_term_matrix([], [], len(sentences)), np.zeros(len(sentences))
+
+        from spacy.attrs import IS_DIGIT, IS_PUNCT, IS_SPACE, LOWER
+        attributes = doc.to_array([LOWER, IS_PUNCT, IS_SPACE, IS_DIGIT])
+        lower, is_punct, is_space, is_digit = (attributes[:, i] for i in range(4))
+        sentence_ids = np.searchsorted([sent.start for sent in sentences], np.arange(len(doc)), side='right') - 1
+
+        stop_hashes = np.array([doc.vocab.strings[word] for word in stop_words], dtype=lower.dtype)
+        keep = (is_punct == 0) & (is_space == 0) & (is_digit == 0) & ~np.isin(lower, stop_hashes)
+        lengths = np.bincount(sentence_ids[is_space == 0], minlength=len(sentences))
+        return sentence_term_matrix(sentence_ids[keep], lower[keep], len(sentences)), lengths
+
     def _clean_text(self, text):
         """Clean and prepare text for summarization"""
         # Remove extra whitespace
@@ -102,55 +358,6 @@ class Summarizer:
         
         return text
 
-    def _split_into_chunks(self, text, max_length=1024):
-        """Split text into chunks of specified maximum length"""
-        words = text.split()
-        chunks = []
-        current_chunk = []
-        current_length = 0
-        
-        for word in words:
-            if current_length + len(word) + 1 <= max_length:
-                current_chunk.append(word)
-                current_length += len(word) + 1
-            else:
-                chunks.append(' '.join(current_chunk))
-                current_chunk = [word]
-                current_length = len(word)
-        
-        if current_chunk:
-            chunks.append(' '.join(current_chunk))
-        
-        return chunks
-
-    def _calculate_word_frequency(self, text, stop_words):
-        """Calculate word frequency excluding stop words"""
-        # Tokenize and clean words
-        words = word_tokenize(text.lower())
-        words = [word for word in words 
-                if word not in stop_words 
-                and word not in punctuation
-                and not word.isnumeric()]
-        
-        # Calculate frequency
-        freq_dist = FreqDist(words)
-        
-        # Normalize frequencies
-        max_freq = max(freq_dist.values())
-        return {word: freq/max_freq for word, freq in freq_dist.items()}
-
-    def _score_sentences(self, sentences, word_freq):
-        """Score sentences based on word frequency"""
-        sentence_scores = {}
-        
-        for sentence in sentences:
-            words = word_tokenize(sentence.lower())
-            score = sum(word_freq.get(word, 0) for word in words)
-            # Normalize by sentence length
-            sentence_scores[sentence] = score / (len(words) + 1)
-        
-        return sentence_scores
-
     def _format_bullet_point(self, sentence):
         """Format a sentence as a concise bullet point"""
         # Remove certain phrases that often start sentences but add little value
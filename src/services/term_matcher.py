@@ -0,0 +1,102 @@
+"""Single-pass matching of definitions and technical terms over a parsed document"""
+import threading
+import weakref
+from bisect import bisect_right
+from typing import Any, Dict, List
+
+from spacy.matcher import Matcher
+
+# Token patterns are anchored to one token, so no pattern can scan past a word boundary
+CAPITALIZED = r'^[A-Z][a-z]+(?:[A-Z][a-z]+)*$'
+ACRONYM = r'^[A-Z]{2,}$'
+SUFFIXES = {
+    'en': r'^\w+(?:ology|ization|isation|ment)$',
+    'ro': r'^\w+(?:ologie|izare|ment)$'
+}
+
+# Phrases linking a term to its definition, longest first
+COPULAS = {
+    'en': [['can', 'be', 'defined', 'as'], ['is', 'defined', 'as'], ['refers', 'to'], ['is'], ['are'], ['means']],
+    'ro': [['poate', 'fi', 'definit', 'ca'], ['se', 'definește', 'ca'], ['se', 'referă', 'la'], ['este'],
+           ['sunt'], ['înseamnă']]
+}
+
+
+class TermMatcher:
+    """One spaCy ``Matcher`` holding every term and definition pattern of a language
+
+    Matching walks the document's tokens once, whatever the number of
+    patterns, and each token is only tested against patterns anchored to
+    that token, so the cost is linear in the length of the document.
+    """
+
+    def __init__(self, vocab, language: str = 'en'):
+        self.language = language if language in SUFFIXES else 'en'
+        self.matcher = Matcher(vocab)
+        self.matcher.add('TECHNICAL', [[{'TEXT': {'REGEX': CAPITALIZED}}]])
+        self.matcher.add('ACRONYM', [[{'TEXT': {'REGEX': ACRONYM}}]])
+        self.matcher.add('SUFFIX_TERM', [[{'TEXT': {'REGEX': SUFFIXES[self.language]}}]])
+        self.matcher.add('DEFINITION', [[{'LOWER': word} for word in copula]
+                                        for copula in COPULAS[self.language]])
+        self._labels = {self.matcher.vocab.strings[label]: label
+                        for label in ('TECHNICAL', 'ACRONYM', 'SUFFIX_TERM', 'DEFINITION')}
+
+    def match(self, doc) -> Dict[str, List[Any]]:
+        """Technical terms, acronyms, suffix terms and definitions of a document
+
+        A sentence gives at most one definition: the text before its first
+        linking phrase is the term and the rest of the sentence, which must
+        end with a period, is the definition.
+        """
+        matches = {'technical': [], 'acronyms': [], 'suffix_terms': [], 'definitions': []}
+        defined = {}
+        sentences = None
+        for match_id, start, end in self.matcher(doc):
+            label = self._labels[match_id]
+            if label == 'TECHNICAL':
+                matches['technical'].append(doc[start].text)
+            elif label == 'ACRONYM':
+                matches['acronyms'].append(doc[start].text)
+            elif label == 'SUFFIX_TERM':
+                matches['suffix_terms'].append(doc[start].text)
+            else:
+                if sentences is None:
+                    # Token.sent scans for the sentence boundaries on every call
+                    sentences = [(sentence.start, sentence.end) for sentence in doc.sents]
+                    starts = [sentence_start for sentence_start, _ in sentences]
+                sentence = sentences[bisect_right(starts, start) - 1]
+                if end > sentence[1]:
+                    continue
+                # Matches come sorted by start, so keep the first, longest copula of each sentence
+                known = defined.get(sentence)
+                if known is None or (known[0] == start and end > known[1]):
+                    defined[sentence] = (start, end)
+
+        for (sentence_start, sentence_end), (start, end) in defined.items():
+            term = doc[sentence_start:start].text.strip()
+            definition = doc[end:sentence_end].text.strip()
+            if term and definition.endswith('.') and len(definition) > 1:
+                matches['definitions'].append({'term': term, 'definition': definition})
+        return matches
+
+
+# Matchers of each pipeline by language. Weak keys let a pipeline unloaded from the model
+# registry be freed with its matchers, which hold its vocabulary
+_matchers = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def match_terms(doc, language: str = 'en', nlp=None) -> Dict[str, List[Any]]:
+    """Match a document with the matcher of its language, built once per pipeline
+
+    ``nlp`` is the pipeline that parsed the document; without it a matcher
+    is built for this document alone.
+    """
+    if nlp is None:
+        return TermMatcher(doc.vocab, language).match(doc)
+    with _lock:
+        matchers = _matchers.setdefault(nlp, {})
+        matcher = matchers.get(language)
+        if matcher is None:
+            matcher = matchers[language] = TermMatcher(nlp.vocab, language)
+    return matcher.match(doc)
@@ -0,0 +1,142 @@
+"""Token-aware packing of whole sentences into model-sized chunks"""
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+# Used when a tokenizer does not report a real input limit
+DEFAULT_MAX_TOKENS = 1024
+
+
+class ChunkStats:
+    """How well a text was packed into a model's token budget"""
+
+    def __init__(self, max_tokens: int):
+        self.max_tokens = max_tokens
+        self.chunks = 0
+        self.sentences = 0
+        self.tokens = 0
+        self.overlap_tokens = 0
+        self.largest_chunk = 0
+        self.split_sentences = 0
+
+    def add_chunk(self, tokens: int, overlap_tokens: int):
+        self.chunks += 1
+        self.tokens += tokens
+        self.overlap_tokens += overlap_tokens
+        self.largest_chunk = max(self.largest_chunk, tokens)
+
+    def to_dict(self) -> Dict[str, Any]:
+        mean = self.tokens / self.chunks if self.chunks else 0
+        return {
+            'chunks': self.chunks,
+            'sentences': self.sentences,
+            'tokens': self.tokens,
+            'max_tokens': self.max_tokens,
+            'mean_tokens': mean,
+            'largest_chunk': self.largest_chunk,
+            'fill_ratio': mean / self.max_tokens if self.max_tokens else None,
+            'overlap_tokens': self.overlap_tokens,
+            'split_sentences': self.split_sentences
+        }
+
+
+class SentenceChunker:
+    """Pack consecutive sentences into chunks of at most ``max_tokens`` tokens
+
+    Sentences are measured with the model's own tokenizer, so chunks use the
+    model's real input budget instead of a character estimate. A sentence is
+    only cut when it alone exceeds the budget, in which case it is split on
+    word boundaries. With ``overlap_tokens`` set, each chunk starts with the
+    trailing sentences of the previous one, up to that many tokens, so
+    context is not lost at chunk boundaries.
+
+    ``count_tokens`` maps a list of texts to their token counts, so a whole
+    document is measured in a single tokenizer call.
+    """
+
+    def __init__(self, count_tokens: Callable[[List[str]], List[int]], max_tokens: int = DEFAULT_MAX_TOKENS,
+                 overlap_tokens: int = 0):
+        if overlap_tokens >= max_tokens:
+            raise ValueError("Chunk overlap must be smaller than the chunk size")
+        self.count_tokens = count_tokens
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+
+    def chunk(self, sentences: Sequence[str]) -> Tuple[List[str], ChunkStats]:
+        """Return the chunk texts and packing statistics"""
+        stats = ChunkStats(self.max_tokens)
+        sentences = [sentence.strip() for sentence in sentences if sentence.strip()]
+        stats.sentences = len(sentences)
+        pieces = []
+        for sentence, tokens in zip(sentences, self.count_tokens(sentences) if sentences else []):
+            if tokens > self.max_tokens:
+                stats.split_sentences += 1
+                pieces.extend(self._split_sentence(sentence))
+            else:
+                pieces.append((sentence, tokens))
+
+        chunks = []
+        for start, end, overlap in self.pack([tokens for _, tokens in pieces]):
+            chunks.append(' '.join(text for text, _ in pieces[start:end]))
+            stats.add_chunk(sum(tokens for _, tokens in pieces[start:end]),
+                            sum(tokens for _, tokens in pieces[start:start + overlap]))
+        return chunks, stats
+
+    def pack(self, sizes: Sequence[int]) -> List[Tuple[int, int, int]]:
+        """Group consecutive pieces of the given token sizes into chunks
+
+        Returns ``(start, end, overlap)`` per chunk: the range of piece
+        indexes it holds, of which the first ``overlap`` repeat the end of the
+        previous chunk. Pieces must each fit in the budget.
+        """
+        ranges = []
+        start = 0
+        overlap = 0
+        size = 0
+        for index, tokens in enumerate(sizes):
+            if index - start > overlap and size + tokens > self.max_tokens:
+                ranges.append((start, index, overlap))
+                # Carry the trailing pieces of the chunk over, while they fit the overlap budget
+                budget = min(self.overlap_tokens, self.max_tokens - tokens)
+                start = index
+                while start > ranges[-1][0] and sizes[start - 1] <= budget:
+                    start -= 1
+                    budget -= sizes[start]
+                overlap = index - start
+                size = sum(sizes[start:index])
+            size += tokens
+
+        if len(sizes) - start > overlap:
+            ranges.append((start, len(sizes), overlap))
+        return ranges
+
+    def _split_sentence(self, sentence):
+        """Cut a sentence longer than the budget into pieces on word boundaries"""
+        words = sentence.split()
+        pieces = []
+        current = []
+        size = 0
+        for word, tokens in zip(words, self.count_tokens(words)):
+            if current and size + tokens > self.max_tokens:
+                pieces.append((' '.join(current), size))
+                current = []
+                size = 0
+            current.append(word)
+            size += tokens
+        if current:
+            pieces.append((' '.join(current), size))
+        return pieces
+
+
+def tokenizer_counter(tokenizer) -> Callable[[List[str]], List[int]]:
+    """Token counting function for a Hugging Face tokenizer, excluding special tokens"""
+    def count_tokens(texts):
+        return [len(ids) for ids in tokenizer(list(texts), add_special_tokens=False)['input_ids']]
+    return count_tokens
+
+
+def tokenizer_budget(tokenizer) -> int:
+    """Content tokens that fit in one model input, after the special tokens"""
+    limit = tokenizer.model_max_length
+    # Tokenizers without a configured limit report a huge sentinel value
+    if not limit or limit > 100000:
+        limit = DEFAULT_MAX_TOKENS
+    return limit - tokenizer.num_special_tokens_to_add()
@@ -0,0 +1,303 @@
+"""Incremental semantic clustering of each user's study topics over cached embeddings"""
+import os
+import threading
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from src.services.concept_index import concept_key
+from src.services.model_registry import model_registry
+
+# Small multilingual sentence encoder, so English and Romanian topics share one space
+EMBEDDING_MODEL = os.environ.get('TOPIC_EMBEDDING_MODEL',
+                                 'sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2')
+
+# Directory of the per-user embedding caches
+CACHE_DIR = os.environ.get('TOPIC_EMBEDDING_CACHE_DIR', os.path.join('instance', 'topic_embeddings'))
+
+# Cosine similarity a topic needs to its cluster's centroid, and two centroids need to merge
+SIMILARITY_THRESHOLD = float(os.environ.get('TOPIC_CLUSTER_SIMILARITY', 0.6))
+
+# Model registry name of the sentence encoder
+ENCODER = 'topic-embedding'
+
+# Rows of the centroid similarity matrix computed at once while looking for clusters to merge
+_BLOCK_ROWS = 256
+
+
+class EncoderNotReady(RuntimeError):
+    """Raised when new topics need embedding before the sentence encoder is loaded"""
+
+
+class SentenceEncoder:
+    """Mean-pooled, L2-normalized sentence embeddings from a transformer encoder"""
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL, batch_size: int = 64, max_length: int = 32):
+        from transformers import AutoModel, AutoTokenizer
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.model = AutoModel.from_pretrained(model_name).eval()
+        self.batch_size = batch_size
+        self.max_length = max_length
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        import torch
+
+        vectors = []
+        with torch.no_grad():
+            for start in range(0, len(texts), self.batch_size):
+                inputs = self.tokenizer(texts[start:start + self.batch_size], padding=True, truncation=True,
+                                        max_length=self.max_length, return_tensors='pt')
+                hidden = self.model(**inputs).last_hidden_state
+                mask = inputs['attention_mask'].unsqueeze(-1).to(hidden.dtype)
+                vectors.append(((hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)).numpy())
+        return _normalize(np.concatenate(vectors).astype(np.float32))
+
+
+class TopicSpace:
+    """Embedded topics of one user, the cluster of each and the vector sum and size of each cluster
+
+    Vectors are kept at half precision, which is how they are stored, so
+    cluster sums always equal the sums of the stored vectors.
+    """
+
+    def __init__(self, keys=None, vectors=None, assignments=None, sums=None, counts=None):
+        self.keys: List[str] = list(keys) if keys is not None else []
+        self.vectors = vectors if vectors is not None else np.zeros((0, 0), dtype=np.float16)
+        self.assignments = assignments if assignments is not None else np.zeros(0, dtype=np.int32)
+        self.sums = sums if sums is not None else np.zeros((0, self.vectors.shape[1]), dtype=np.float32)
+        self.counts = counts if counts is not None else np.zeros(0, dtype=np.int32)
+        self.centroids = _normalize(self.sums)
+        self.rows = {key: row for row, key in enumerate(self.keys)}
+
+    def __contains__(self, key):
+        return key in self.rows
+
+    def retain(self, keys) -> List[int]:
+        """Drop the topics not in ``keys`` and return the clusters they left"""
+        dropped = np.array([row for row, key in enumerate(self.keys) if key not in keys], dtype=np.intp)
+        if not dropped.size:
+            return []
+        clusters = self.assignments[dropped]
+        np.subtract.at(self.sums, clusters, self.vectors[dropped].astype(np.float32))
+        np.subtract.at(self.counts, clusters, 1)
+        kept = np.ones(len(self.keys), dtype=bool)
+        kept[dropped] = False
+        self.keys = [key for key, keep in zip(self.keys, kept) if keep]
+        self.vectors = self.vectors[kept]
+        self.assignments = self.assignments[kept]
+        self.rows = {key: row for row, key in enumerate(self.keys)}
+        changed = np.unique(clusters)
+        # Rounding can leave a residue in the sum of an emptied cluster
+        self.sums[changed[self.counts[changed] == 0]] = 0
+        self.centroids[changed] = _normalize(self.sums[changed])
+        return [int(cluster) for cluster in changed if self.counts[cluster] > 0]
+
+    def add(self, keys: List[str], vectors: np.ndarray, threshold: float) -> List[int]:
+        """Put each new topic in the cluster with the most similar centroid, or a cluster of its own
+
+        Returns the clusters that changed.
+        """
+        vectors = np.asarray(vectors, dtype=np.float32).astype(np.float16)
+        if not self.keys and not len(self.counts):
+            self.vectors = np.zeros((0, vectors.shape[1]), dtype=np.float16)
+            self.sums = np.zeros((0, vectors.shape[1]), dtype=np.float32)
+            self.centroids = self.sums.copy()
+
+        # Room for one new cluster per topic, trimmed afterwards
+        used = len(self.counts)
+        self.sums = np.vstack([self.sums, np.zeros((len(keys), self.sums.shape[1]), dtype=np.float32)])
+        self.centroids = np.vstack([self.centroids, np.zeros_like(self.sums[used:])])
+        self.counts = np.concatenate([self.counts, np.zeros(len(keys), dtype=np.int32)])
+
+        assignments = np.empty(len(keys), dtype=np.int32)
+        changed = set()
+        for index, vector in enumerate(vectors.astype(np.float32)):
+            cluster = used
+            if used:
+                similarities = self.centroids[:used] @ vector
+                similarities[self.counts[:used] == 0] = -np.inf
+                best = int(np.argmax(similarities))
+                if similarities[best] >= threshold:
+                    cluster = best
+            if cluster == used:
+                used += 1
+            self.sums[cluster] += vector
+            self.counts[cluster] += 1
+            self.centroids[cluster] = _normalize(self.sums[cluster])
+            assignments[index] = cluster
+            changed.add(cluster)
+
+        self.sums = self.sums[:used]
+        self.centroids = self.centroids[:used]
+        self.counts = self.counts[:used]
+        self.rows.update((key, len(self.keys) + index) for index, key in enumerate(keys))
+        self.keys.extend(keys)
+        self.vectors = np.vstack([self.vectors, vectors])
+        self.assignments = np.concatenate([self.assignments, assignments])
+        return sorted(changed)
+
+    def merge_close_clusters(self, changed: Iterable[int], threshold: float):
+        """Merge clusters whose centroids are at least ``threshold`` similar, closest pair first
+
+        Only pairs involving a changed cluster are compared: the centroids
+        of the other clusters did not move since they were last merged.
+        """
+        rows = [cluster for cluster in changed if self.counts[cluster] > 0]
+        best = {}
+        for start in range(0, len(rows), _BLOCK_ROWS):
+            block = rows[start:start + _BLOCK_ROWS]
+            for cluster, (similarity, other) in zip(block, self._closest(block)):
+                best[cluster] = (similarity, other)
+
+        while best:
+            cluster = max(best, key=lambda c: best[c][0])
+            similarity, other = best[cluster]
+            if similarity < threshold:
+                break
+            # The larger cluster absorbs the smaller one
+            keep, gone = (cluster, other) if self.counts[cluster] >= self.counts[other] else (other, cluster)
+            self.sums[keep] += self.sums[gone]
+            self.counts[keep] += self.counts[gone]
+            self.sums[gone] = 0
+            self.counts[gone] = 0
+            self.centroids[keep] = _normalize(self.sums[keep])
+            self.centroids[gone] = 0
+            self.assignments[self.assignments == gone] = keep
+
+            best.pop(gone, None)
+            stale = [c for c, (_, o) in best.items() if o in (keep, gone)] + [keep]
+            similarities = self.centroids[list(best)] @ self.centroids[keep] if best else []
+            for c, s in zip(list(best), similarities):
+                if c != keep and s > best[c][0]:
+                    best[c] = (float(s), keep)
+            for c, closest in zip(stale, self._closest(stale)):
+                best[c] = closest
+
+    def groups(self) -> List[List[str]]:
+        """Topic keys of each cluster, largest cluster first and each closest to its centroid first"""
+        if not self.keys:
+            return []
+        vectors = self.vectors.astype(np.float32)
+        closeness = np.einsum('ij,ij->i', vectors, self.centroids[self.assignments])
+        order = np.lexsort((-closeness, self.assignments))
+        boundaries = np.flatnonzero(np.diff(self.assignments[order])) + 1
+        groups = [[self.keys[row] for row in rows] for rows in np.split(order, boundaries)]
+        return sorted(groups, key=lambda group: (-len(group), group[0]))
+
+    def compact(self):
+        """Renumber the clusters so none is empty"""
+        live = np.flatnonzero(self.counts > 0)
+        renumbered = np.full(len(self.counts), -1, dtype=np.int32)
+        renumbered[live] = np.arange(len(live), dtype=np.int32)
+        self.assignments = renumbered[self.assignments]
+        self.sums = self.sums[live]
+        self.counts = self.counts[live]
+        self.centroids = self.centroids[live]
+
+    def _closest(self, clusters):
+        """Most similar other live cluster of each cluster, as ``(similarity, cluster)``"""
+        if not clusters:
+            return []
+        similarities = self.centroids[clusters] @ self.centroids.T
+        similarities[:, self.counts == 0] = -np.inf
+        similarities[np.arange(len(clusters)), clusters] = -np.inf
+        others = np.argmax(similarities, axis=1)
+        return [(float(similarities[i, other]), int(other)) for i, other in enumerate(others)]
+
+
+class TopicClusterer:
+    """Group a user's topics by meaning, embedding each topic only once
+
+    Topic names are embedded with a small sentence encoder and a user's
+    vectors are cached in a ``.npz`` file, with the cluster of each topic
+    and the vector sum and size of each cluster. New topics join the
+    cluster whose centroid is most similar, when at least ``threshold``,
+    or start their own; clusters that then come within ``threshold`` of
+    each other are merged (centroid-linkage agglomeration). Topics that
+    are gone are subtracted from their clusters. When no topic changed,
+    clustering is a cache read and a few vectorized operations.
+
+    The shared encoder is never loaded on the calling thread: it is warmed
+    up at startup, and until it is loaded, clustering topics that are not
+    cached yet starts loading it in the background and raises
+    ``EncoderNotReady``.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, threshold: Optional[float] = None, encoder=None,
+                 model_name: str = EMBEDDING_MODEL):
+        self.cache_dir = cache_dir or CACHE_DIR
+        self.threshold = SIMILARITY_THRESHOLD if threshold is None else threshold
+        self.model_name = model_name
+        self._encoder = encoder
+        self._locks: Dict[int, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+
+    def clusters(self, user_id: int, topics: Iterable[str], language: str = 'en') -> List[List[str]]:
+        """Concept keys of a user's topics grouped by meaning, largest group first"""
+        labels = {}
+        for topic in topics:
+            key = concept_key(topic, language)
+            if key:
+                labels.setdefault(key, topic)
+
+        with self._lock(user_id):
+            space = self._load(user_id)
+            cached = len(space.keys)
+            changed = space.retain(labels)
+            modified = len(space.keys) != cached
+            new = [key for key in labels if key not in space]
+            if new:
+                changed += space.add(new, self._encode([labels[key] for key in new]), self.threshold)
+                modified = True
+            if modified:
+                space.merge_close_clusters(set(changed), self.threshold)
+                space.compact()
+                self._save(user_id, space)
+            return space.groups()
+
+    def cache_path(self, user_id: int) -> str:
+        return os.path.join(self.cache_dir, f"user_{user_id}.npz")
+
+    def _encode(self, texts):
+        encoder = self._encoder
+        if encoder is None:
+            if not model_registry.is_loaded(ENCODER):
+                model_registry.load_in_background(ENCODER)
+                raise EncoderNotReady("The topic embedding model is still loading")
+            encoder = model_registry.get(ENCODER)
+        return encoder.encode(texts)
+
+    def _load(self, user_id):
+        path = self.cache_path(user_id)
+        if not os.path.exists(path):
+            return TopicSpace()
+        with np.load(path, allow_pickle=False) as cache:
+            if str(cache['model']) != self.model_name or float(cache['threshold']) != self.threshold:
+                # Vectors of another model, or clusters cut at another threshold, are rebuilt
+                return TopicSpace()
+            return TopicSpace(cache['keys'].tolist(), cache['vectors'], cache['assignments'], cache['sums'],
+                              cache['counts'])
+
+    def _save(self, user_id, space):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self.cache_path(user_id)
+        temporary = f"{path}.{threading.get_ident()}.tmp"
+        with open(temporary, 'wb') as f:
+            np.savez(f, keys=np.array(space.keys, dtype=str), vectors=space.vectors,
+                     assignments=space.assignments, sums=space.sums, counts=space.counts,
+                     model=np.array(self.model_name), threshold=np.array(self.threshold))
+        # Readers never see a partly written cache
+        os.replace(temporary, path)
+
+    def _lock(self, user_id):
+        with self._locks_lock:
+            return self._locks.setdefault(user_id, threading.Lock())
+
+
+def _normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+
+topic_clusterer = TopicClusterer()
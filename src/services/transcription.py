@@ -0,0 +1,301 @@
+"""Segmented, parallel speech transcription with pluggable recognizer backends"""
+import json
+import os
+import subprocess
+import tempfile
+import wave
+from collections import deque
+from itertools import chain
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from pydub import AudioSegment
+from pydub.silence import detect_nonsilent
+from pydub.utils import get_encoder_name
+
+from src.services.model_registry import model_registry
+from src.services.workload_pools import WorkloadPool, workload_pools
+
+# Recognizers work best on 16 kHz mono 16-bit PCM
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2
+
+# Languages considered when none is given, in order of preference on a tie
+DEFAULT_LANGUAGES = ('en', 'ro')
+
+
+class TranscriptionError(Exception):
+    """Raised when a backend cannot be reached or fails"""
+
+
+class Segment:
+    """A stretch of speech between silences, with its position in the recording"""
+
+    def __init__(self, index: int, start_ms: int, end_ms: int, audio: AudioSegment):
+        self.index = index
+        self.start_ms = start_ms
+        self.end_ms = end_ms
+        self.audio = audio
+
+    @property
+    def pcm(self) -> bytes:
+        return self.audio.raw_data
+
+
+class TranscriptionBackend:
+    """Recognizer interface: turn 16 kHz mono PCM into text and a confidence in [0, 1]"""
+
+    name = None
+
+    def transcribe(self, pcm: bytes, language: str) -> Tuple[str, float]:
+        raise NotImplementedError
+
+
+class GoogleBackend(TranscriptionBackend):
+    """Google Web Speech API through SpeechRecognition; needs network access"""
+
+    name = 'google'
+    locales = {'en': 'en-US', 'ro': 'ro-RO'}
+
+    def transcribe(self, pcm, language):
+        import speech_recognition as sr
+
+        recognizer = sr.Recognizer()
+        audio = sr.AudioData(pcm, SAMPLE_RATE, SAMPLE_WIDTH)
+        try:
+            response = recognizer.recognize_google(
+                audio, language=self.locales.get(language, language), show_all=True)
+        except sr.RequestError as e:
+            raise TranscriptionError(f"Could not request results: {e}")
+
+        alternatives = response.get('alternative', []) if isinstance(response, dict) else []
+        if not alternatives:
+            return '', 0.0
+        best = alternatives[0]
+        return best.get('transcript', ''), best.get('confidence', 0.5)
+
+
+class VoskBackend(TranscriptionBackend):
+    """Offline Kaldi recognizer; models are shared through the model registry"""
+
+    name = 'vosk'
+
+    def transcribe(self, pcm, language):
+        from vosk import KaldiRecognizer
+
+        recognizer = KaldiRecognizer(model_registry.for_language('vosk', language), SAMPLE_RATE)
+        recognizer.SetWords(True)
+        recognizer.AcceptWaveform(pcm)
+        result = json.loads(recognizer.FinalResult())
+
+        words = result.get('result', [])
+        confidence = sum(word['conf'] for word in words) / len(words) if words else 0.0
+        return result.get('text', ''), confidence
+
+
+_backends: Dict[str, Callable[[], TranscriptionBackend]] = {}
+
+
+def register_backend(name: str, factory: Callable[[], TranscriptionBackend]):
+    """Make a backend selectable by name through TRANSCRIPTION_BACKEND"""
+    _backends[name] = factory
+
+
+def get_backend(name: str) -> TranscriptionBackend:
+    if name not in _backends:
+        raise ValueError(f"Unknown transcription backend: {name}")
+    return _backends[name]()
+
+
+register_backend(GoogleBackend.name, GoogleBackend)
+register_backend(VoskBackend.name, VoskBackend)
+
+
+class Transcriber:
+    """Transcribe recordings segment by segment on the audio workload pool
+
+    The recording is converted to 16 kHz mono WAV and read back in windows,
+    so memory stays bounded for long lectures. Each window is split on
+    silence into segments of at most ``max_segment_seconds``. The language
+    is detected once, on the first segment, and the segments are then
+    transcribed in parallel and yielded in order with their timestamps.
+    """
+
+    def __init__(self, backend: Optional[TranscriptionBackend] = None, pool: Optional[WorkloadPool] = None,
+                 max_segment_seconds: Optional[float] = None, min_silence_ms: Optional[int] = None,
+                 window_seconds: float = 300, languages=DEFAULT_LANGUAGES):
+        self._backend = backend
+        self.pool = pool or workload_pools.get('audio')
+        self.max_segment_ms = int(1000 * (max_segment_seconds or float(
+            os.environ.get('TRANSCRIPTION_MAX_SEGMENT_SECONDS', 30))))
+        self.min_silence_ms = min_silence_ms or int(os.environ.get('TRANSCRIPTION_MIN_SILENCE_MS', 500))
+        self.window_ms = int(window_seconds * 1000)
+        self.languages = languages
+
+    @property
+    def backend(self) -> TranscriptionBackend:
+        if self._backend is None:
+            self._backend = get_backend(os.environ.get('TRANSCRIPTION_BACKEND', 'google'))
+        return self._backend
+
+    @property
+    def workers(self) -> int:
+        return self.pool.workers
+
+    def transcribe(self, file_path: str, language: Optional[str] = None,
+                   on_segment: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """Transcribe a recording; ``on_segment`` is called with each segment as it completes"""
+        segments = []
+        duration = 0.0
+        detected = language
+        for segment in self.iter_transcript(file_path, language):
+            segments.append(segment)
+            duration = segment['end']
+            detected = segment['language']
+            if on_segment:
+                on_segment(segment)
+
+        return {
+            'type': 'audio',
+            'language': detected,
+            'backend': self.backend.name,
+            'transcription': ' '.join(s['text'] for s in segments if s['text']),
+            'segments': segments,
+            'duration': duration
+        }
+
+    def iter_transcript(self, file_path: str, language: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Yield ``{index, start, end, text, confidence, language}`` per segment, in order"""
+        wav_path, converted = self._to_wav(file_path)
+        try:
+            segments = self._iter_segments(wav_path)
+            first = next(segments, None)
+            if first is None:
+                return
+
+            if language is None:
+                language, text, confidence = self.detect_language(first)
+                yield self._result(first, language, text, confidence)
+            else:
+                segments = chain([first], segments)
+
+            def transcribe(segment):
+                return self._result(segment, language, *self.backend.transcribe(segment.pcm, language))
+
+            yield from _ordered_map(self.pool, transcribe, segments, self.workers * 2)
+        finally:
+            if converted:
+                os.remove(wav_path)
+
+    def detect_language(self, segment: Segment) -> Tuple[str, str, float]:
+        """Pick the candidate language the backend recognizes a segment with most confidently
+
+        Only this one segment is transcribed once per candidate language;
+        its winning transcription is kept so the segment isn't redone.
+        """
+        futures = [self.pool.submit(lambda lang: (lang, *self.backend.transcribe(segment.pcm, lang)), language)
+                   for language in self.languages]
+        attempts = [future.result() for future in futures]
+        # Highest confidence wins; more recognized words breaks ties
+        return max(attempts, key=lambda a: (a[2], len(a[1].split())))
+
+    def _to_wav(self, file_path) -> Tuple[str, bool]:
+        """Path of a 16 kHz mono WAV version of the recording, and whether it was created"""
+        if self._is_recognizer_wav(file_path):
+            return file_path, False
+
+        fd, wav_path = tempfile.mkstemp(suffix='.wav')
+        os.close(fd)
+        # ffmpeg (as located by pydub) streams the conversion without decoding the file into memory
+        command = [get_encoder_name(), '-y', '-loglevel', 'error', '-i', file_path,
+                   '-ac', '1', '-ar', str(SAMPLE_RATE), '-sample_fmt', 's16', wav_path]
+        try:
+            subprocess.run(command, check=True, capture_output=True)
+        except (OSError, subprocess.CalledProcessError) as e:
+            os.remove(wav_path)
+            raise TranscriptionError(f"Could not convert audio: {getattr(e, 'stderr', b'') or e}")
+        return wav_path, True
+
+    @staticmethod
+    def _is_recognizer_wav(file_path) -> bool:
+        try:
+            with wave.open(file_path, 'rb') as wav:
+                return (wav.getframerate(), wav.getnchannels(), wav.getsampwidth()) == (SAMPLE_RATE, 1, SAMPLE_WIDTH)
+        except (wave.Error, EOFError, OSError):
+            return False
+
+    def _iter_segments(self, wav_path) -> Iterator[Segment]:
+        """Split the recording on silence, reading it one window at a time
+
+        Speech running into the end of a window is carried over to the next
+        one, so segments never break mid-utterance at a window boundary.
+        """
+        index = 0
+        with wave.open(wav_path, 'rb') as wav:
+            frames_per_window = int(self.window_ms * SAMPLE_RATE / 1000)
+            carry = AudioSegment.empty()
+            carry_start = 0
+            while True:
+                data = wav.readframes(frames_per_window)
+                final = len(data) < frames_per_window * SAMPLE_WIDTH
+                audio = carry + AudioSegment(data=data, sample_width=SAMPLE_WIDTH, frame_rate=SAMPLE_RATE, channels=1)
+
+                keep_from = len(audio)
+                for start, end in self._speech_ranges(audio):
+                    if not final and end >= len(audio) - self.min_silence_ms:
+                        keep_from = start
+                        break
+                    yield Segment(index, carry_start + start, carry_start + end, audio[start:end])
+                    index += 1
+
+                if final:
+                    return
+                carry = audio[keep_from:]
+                carry_start += keep_from
+
+    def _speech_ranges(self, audio: AudioSegment) -> List[Tuple[int, int]]:
+        """Non-silent ranges of a window, merged up to the maximum segment length"""
+        if not audio.rms:
+            return []
+        ranges = detect_nonsilent(audio, min_silence_len=self.min_silence_ms,
+                                  silence_thresh=audio.dBFS - 16, seek_step=10)
+
+        merged = []
+        for start, end in ranges:
+            if merged and end - merged[-1][0] <= self.max_segment_ms:
+                merged[-1] = (merged[-1][0], end)
+            else:
+                merged.append((start, end))
+
+        # Hard-split speech that runs longer than a segment without a pause
+        segments = []
+        for start, end in merged:
+            while end - start > self.max_segment_ms:
+                segments.append((start, start + self.max_segment_ms))
+                start += self.max_segment_ms
+            segments.append((start, end))
+        return segments
+
+    @staticmethod
+    def _result(segment, language, text, confidence):
+        return {
+            'index': segment.index,
+            'start': segment.start_ms / 1000,
+            'end': segment.end_ms / 1000,
+            'text': text,
+            'confidence': confidence,
+            'language': language
+        }
+
+
+def _ordered_map(pool, func, items, max_in_flight):
+    """Map ``func`` over ``items`` on a pool, yielding results in order with bounded look-ahead"""
+    pending = deque()
+    for item in items:
+        pending.append(pool.submit(func, item))
+        while pending and (len(pending) >= max_in_flight or pending[0].done()):
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+transcriber = Transcriber()
@@ -0,0 +1,140 @@
+"""Lecture video processing: slide keyframes, slide OCR and audio transcription"""
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from src.services.ocr import page_ocr
+from src.services.transcription import transcriber
+
+# Size frames are reduced to before comparing them for scene changes
+SCENE_FRAME_SIZE = (64, 36)
+
+
+class Keyframe:
+    """A frame where the picture changed, with its perceptual hash"""
+
+    def __init__(self, time: float, frame: np.ndarray, phash: int):
+        self.time = time
+        self.frame = frame
+        self.phash = phash
+
+
+def dhash(frame: np.ndarray, hash_size: int = 8) -> int:
+    """Difference hash: one bit per horizontally adjacent pixel pair of a tiny grayscale copy"""
+    image = Image.fromarray(frame).convert('L').resize((hash_size + 1, hash_size), Image.LANCZOS)
+    pixels = np.asarray(image, dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    return int(''.join('1' if bit else '0' for bit in bits), 2)
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+def detect_keyframes(frames: Iterable[Tuple[float, np.ndarray]], scene_threshold: float,
+                     hash_distance: int) -> Iterator[Keyframe]:
+    """Yield the frames that start a new, previously unseen picture
+
+    A scene change is a jump in the mean pixel difference of consecutive
+    samples. The frame after a change is only kept once the picture has
+    settled (so slide transitions are skipped) and when its hash is not
+    within ``hash_distance`` bits of a slide already seen, so a slide shown
+    several times is only processed once.
+    """
+    seen: List[int] = []
+    previous = None
+    candidate = None
+    for time, frame in frames:
+        small = np.asarray(Image.fromarray(frame).convert('L').resize(SCENE_FRAME_SIZE), dtype=np.float32) / 255
+        change = 1.0 if previous is None else float(np.abs(small - previous).mean())
+        previous = small
+
+        if change >= scene_threshold:
+            candidate = (time, frame)
+            continue
+        if candidate is not None:
+            # The picture is stable again: keep the settled frame
+            candidate = None
+            phash = dhash(frame)
+            if all(hamming_distance(phash, other) > hash_distance for other in seen):
+                seen.append(phash)
+                yield Keyframe(time, frame, phash)
+
+    if candidate is not None:
+        phash = dhash(candidate[1])
+        if all(hamming_distance(phash, other) > hash_distance for other in seen):
+            yield Keyframe(candidate[0], candidate[1], phash)
+
+
+class VideoProcessor:
+    """Extract the slides and the spoken content of a recorded lecture
+
+    Frames are sampled at ``sample_fps`` only to detect scene changes; OCR
+    runs on the deduplicated slides alone, so its cost grows with the number
+    of distinct slides rather than with the length of the video. The audio
+    track is transcribed concurrently through the transcription service.
+    """
+
+    def __init__(self, sample_fps: Optional[float] = None, scene_threshold: Optional[float] = None,
+                 hash_distance: Optional[int] = None):
+        self.sample_fps = sample_fps or float(os.environ.get('VIDEO_SAMPLE_FPS', 1))
+        self.scene_threshold = scene_threshold or float(os.environ.get('VIDEO_SCENE_THRESHOLD', 0.08))
+        self.hash_distance = hash_distance if hash_distance is not None else int(
+            os.environ.get('VIDEO_HASH_DISTANCE', 6))
+
+    def process(self, file_path: str, language: Optional[str] = None,
+                on_segment: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        from moviepy.editor import VideoFileClip
+
+        work_dir = tempfile.mkdtemp(prefix='video_')
+        try:
+            with VideoFileClip(file_path) as clip:
+                duration = clip.duration
+                # Transcribe the audio track while the frames are scanned; the
+                # transcriber's conversion to WAV demuxes it from the video
+                with ThreadPoolExecutor(max_workers=1, thread_name_prefix='video-audio') as audio_pool:
+                    transcription = None
+                    if clip.audio is not None:
+                        transcription = audio_pool.submit(transcriber.transcribe, file_path, language, on_segment)
+
+                    slides = self._extract_slides(clip, work_dir)
+                    audio = transcription.result() if transcription else None
+
+            return {
+                "type": "video",
+                "duration": duration,
+                "slides": slides,
+                "slide_text": '\n'.join(slide['text'] for slide in slides if slide['text'].strip()),
+                "transcription": audio['transcription'] if audio else None,
+                "language": audio['language'] if audio else language,
+                "segments": audio['segments'] if audio else [],
+                "file_info": {
+                    "size": os.path.getsize(file_path),
+                    "path": os.path.basename(file_path)
+                }
+            }
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    def _extract_slides(self, clip, work_dir) -> List[Dict[str, Any]]:
+        """Save the distinct keyframes to disk and OCR them in parallel"""
+        frames = ((i / self.sample_fps, frame) for i, frame in enumerate(clip.iter_frames(fps=self.sample_fps)))
+        slides = []
+        paths = []
+        for keyframe in detect_keyframes(frames, self.scene_threshold, self.hash_distance):
+            path = os.path.join(work_dir, f"slide_{len(paths):04d}.png")
+            Image.fromarray(keyframe.frame).save(path)
+            paths.append(path)
+            slides.append({'time': keyframe.time, 'hash': f"{keyframe.phash:016x}"})
+
+        for slide, text in zip(slides, page_ocr.iter_image_files(paths)):
+            slide['text'] = text
+        return slides
+
+
+video_processor = VideoProcessor()
@@ -101,7 +101,7 @@ class Visualizer:
         for node, data in graph.nodes(data=True):
             node_type = data.get('type', 'concept')
             color = color_scheme.get(node_type, '#607D8B')
-            net.add_node(node, label=str(node), color=color, title=f"Type: {node_type}")
+            net.add_node(node, label=str(data.get('label', node)), color=color, title=f"Type: {node_type}")
 
         # Add edges
         for source, target, data in graph.edges(data=True):
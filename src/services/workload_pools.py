@@ -0,0 +1,230 @@
+"""Bounded worker pools, one per class of file-processing work"""
+import math
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, Optional
+
+# Number of recent tasks percentiles are computed over
+TIMING_WINDOW = 500
+
+
+class PoolSaturated(Exception):
+    """Raised when a pool's queue is full and new work should be turned away"""
+
+    def __init__(self, pool: str, retry_after: int):
+        super().__init__(f"The {pool} workers are busy, try again in {retry_after} seconds")
+        self.pool = pool
+        self.retry_after = retry_after
+
+
+class WorkloadPool:
+    """Executor that bounds both the concurrency and the backlog of one kind of work
+
+    At most ``workers`` tasks run at once and further tasks wait in a FIFO
+    queue of at most ``max_queue`` entries. A producer submitting to a full
+    queue blocks until there is room, so a large document cannot flood the
+    pool; request handlers check ``saturated`` to turn new uploads away
+    instead of letting them pile up. The time tasks spend queued and the
+    time they spend running are recorded separately.
+    """
+
+    def __init__(self, name: str, workers: int, max_queue: Optional[int] = None, kind: str = 'thread',
+                 initializer: Optional[Callable[[], None]] = None):
+        if kind not in ('thread', 'process'):
+            raise ValueError(f"Unknown pool kind: {kind}")
+        self.name = name
+        self.workers = workers
+        self.max_queue = max_queue or workers * 4
+        self.kind = kind
+        self.initializer = initializer
+        self._executor = None
+        self._condition = threading.Condition()
+        self._queue = deque()
+        self._running = 0
+        self._counters = {'submitted': 0, 'completed': 0, 'failed': 0, 'rejected': 0}
+        self._waits = deque(maxlen=TIMING_WINDOW)
+        self._runs = deque(maxlen=TIMING_WINDOW)
+        self._max_wait = 0.0
+        self._max_run = 0.0
+
+    @property
+    def executor(self):
+        """The underlying pool, created the first time a task starts"""
+        with self._condition:
+            if self._executor is None:
+                if self.kind == 'process':
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'),
+                        initializer=self.initializer)
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.workers, thread_name_prefix=f"{self.name}-worker",
+                        initializer=self.initializer)
+            return self._executor
+
+    @property
+    def saturated(self) -> bool:
+        return len(self._queue) >= self.max_queue
+
+    def check_capacity(self):
+        """Raise ``PoolSaturated`` when the queue is full"""
+        with self._condition:
+            if self.saturated:
+                self._counters['rejected'] += 1
+                raise PoolSaturated(self.name, self._retry_after())
+
+    def submit(self, fn: Callable, *args, block: bool = True, **kwargs) -> Future:
+        """Queue ``fn(*args, **kwargs)``; waits for room in the queue unless ``block`` is false"""
+        future = Future()
+        with self._condition:
+            while self.saturated:
+                if not block:
+                    self._counters['rejected'] += 1
+                    raise PoolSaturated(self.name, self._retry_after())
+                self._condition.wait()
+            self._counters['submitted'] += 1
+            self._queue.append((future, fn, args, kwargs, time.perf_counter()))
+        self._dispatch()
+        return future
+
+    def shutdown(self):
+        """Cancel queued tasks and stop the underlying pool"""
+        with self._condition:
+            while self._queue:
+                self._queue.popleft()[0].cancel()
+            self._condition.notify_all()
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, task counts and queue wait vs. processing time"""
+        with self._condition:
+            return dict(
+                self._counters,
+                name=self.name,
+                kind=self.kind,
+                workers=self.workers,
+                max_queue=self.max_queue,
+                queued=len(self._queue),
+                running=self._running,
+                saturated=self.saturated,
+                wait_seconds=_summarize(self._waits, self._max_wait),
+                processing_seconds=_summarize(self._runs, self._max_run)
+            )
+
+    def _dispatch(self):
+        """Start queued tasks while fewer than ``workers`` are running"""
+        while True:
+            with self._condition:
+                if self._running >= self.workers or not self._queue:
+                    return
+                future, fn, args, kwargs, queued_at = self._queue.popleft()
+                self._condition.notify_all()
+                if not future.set_running_or_notify_cancel():
+                    continue
+                self._running += 1
+                started = time.perf_counter()
+                self._waits.append(started - queued_at)
+                self._max_wait = max(self._max_wait, started - queued_at)
+
+            try:
+                task = self.executor.submit(fn, *args, **kwargs)
+            except BaseException as e:
+                task = Future()
+                task.set_exception(e)
+            task.add_done_callback(partial(self._finish, future, started))
+
+    def _finish(self, future, started, task):
+        seconds = time.perf_counter() - started
+        failed = task.cancelled() or task.exception() is not None
+        with self._condition:
+            self._running -= 1
+            self._runs.append(seconds)
+            self._max_run = max(self._max_run, seconds)
+            self._counters['failed' if failed else 'completed'] += 1
+
+        if task.cancelled():
+            future.cancel()
+        elif task.exception() is not None:
+            future.set_exception(task.exception())
+        else:
+            future.set_result(task.result())
+        self._dispatch()
+
+    def _retry_after(self) -> int:
+        """Seconds until the queue has likely drained enough to accept work"""
+        mean_run = sum(self._runs) / len(self._runs) if self._runs else 1.0
+        return max(1, math.ceil(mean_run * len(self._queue) / self.workers))
+
+
+class WorkloadPools:
+    """The pools of this process, looked up by workload name"""
+
+    def __init__(self):
+        self._pools: Dict[str, WorkloadPool] = {}
+
+    def register(self, pool: WorkloadPool) -> WorkloadPool:
+        self._pools[pool.name] = pool
+        return pool
+
+    def get(self, name: str) -> WorkloadPool:
+        if name not in self._pools:
+            raise ValueError(f"Unknown workload pool: {name}")
+        return self._pools[name]
+
+    def check_capacity(self, names: Iterable[str]):
+        """Raise ``PoolSaturated`` if any of the named pools is saturated"""
+        for name in names:
+            self.get(name).check_capacity()
+
+    def stats(self) -> Dict[str, Any]:
+        return {'pools': [pool.stats() for pool in self._pools.values()]}
+
+    def shutdown(self):
+        for pool in self._pools.values():
+            pool.shutdown()
+
+
+def limit_native_threads():
+    """Worker initializer: keep tesseract and BLAS to one thread per worker
+
+    The pool already runs one task per core, so native thread pools inside
+    each task would only oversubscribe the CPUs.
+    """
+    for variable in ('OMP_THREAD_LIMIT', 'OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS'):
+        os.environ[variable] = '1'
+
+
+def _summarize(samples, maximum):
+    if not samples:
+        return {'mean': None, 'p50': None, 'p95': None, 'max': None}
+    ordered = sorted(samples)
+    return {
+        'mean': sum(ordered) / len(ordered),
+        'p50': ordered[len(ordered) // 2],
+        'p95': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        'max': maximum
+    }
+
+
+def _env_int(name):
+    value = os.environ.get(name)
+    return int(value) if value else None
+
+
+workload_pools = WorkloadPools()
+workload_pools.register(WorkloadPool(
+    'ocr', workers=_env_int('OCR_WORKERS') or os.cpu_count() or 1,
+    max_queue=_env_int('OCR_QUEUE_LIMIT'), kind='process', initializer=limit_native_threads))
+workload_pools.register(WorkloadPool(
+    'audio', workers=_env_int('TRANSCRIPTION_WORKERS') or 4,
+    max_queue=_env_int('TRANSCRIPTION_QUEUE_LIMIT')))
+workload_pools.register(WorkloadPool(
+    'text', workers=_env_int('TEXT_EXTRACTION_WORKERS') or os.cpu_count() or 1,
+    max_queue=_env_int('TEXT_EXTRACTION_QUEUE_LIMIT')))
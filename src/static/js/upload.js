@@ -13,39 +13,133 @@ document.addEventListener('DOMContentLoaded', function() {
             return;
         }
 
-        const formData = new FormData();
-        formData.append('file', file);
-
         try {
-            const response = await uploadFile(formData);
-            if (response.ok) {
-                const result = await response.json();
-                showSuccess('File uploaded successfully!');
-                displayProcessingResult(result);
-            } else {
-                const error = await response.json();
-                showError(error.error || 'Upload failed');
-            }
+            const job = await uploadFile(file);
+            showSuccess('File uploaded, processing...');
+            const result = await waitForJob(job.status_url);
+            showSuccess('File processed successfully!');
+            displayProcessingResult(result);
         } catch (error) {
-            showError('Network error occurred');
+            showError(error.message || 'Network error occurred');
         }
     });
 
-    async function uploadFile(formData) {
-        const xhr = new XMLHttpRequest();
-        
-        // Setup progress tracking
-        xhr.upload.addEventListener('progress', function(e) {
-            if (e.lengthComputable) {
-                const percentComplete = (e.loaded / e.total) * 100;
-                updateProgress(percentComplete);
+    async function waitForJob(statusUrl) {
+        // Poll the job until processing has finished
+        while (true) {
+            const response = await fetch(statusUrl);
+            const job = await response.json();
+            if (job.state === 'finished') {
+                return job.result;
+            }
+            if (job.state === 'failed') {
+                throw new Error(job.error || 'Processing failed');
+            }
+            updateProgress(job.progress * 100);
+            await new Promise(resolve => setTimeout(resolve, 1000));
+        }
+    }
+
+    const MAX_CHUNK_RETRIES = 5;
+
+    async function uploadFile(file) {
+        // Send the file in chunks; an interrupted upload resumes where the server left off
+        const storageKey = `upload:${file.name}:${file.size}:${file.lastModified}`;
+        let upload = await resumeUpload(localStorage.getItem(storageKey));
+        if (!upload) {
+            upload = await requestJson('/api/uploads', {
+                method: 'POST',
+                headers: {'Content-Type': 'application/json'},
+                body: JSON.stringify({filename: file.name, size: file.size})
+            });
+            upload.upload_url = upload.upload_url || `/api/uploads/${upload.upload_id}`;
+            localStorage.setItem(storageKey, upload.upload_id);
+        }
+
+        let offset = upload.offset;
+        let retries = 0;
+        while (offset < file.size) {
+            const chunk = file.slice(offset, offset + upload.chunk_size);
+            try {
+                const response = await fetch(upload.upload_url, {
+                    method: 'PATCH',
+                    headers: Object.assign(
+                        {'Content-Type': 'application/octet-stream', 'Upload-Offset': String(offset)},
+                        await checksumHeader(chunk)
+                    ),
+                    body: chunk
+                });
+                const body = await response.json();
+                if (response.status === 409) {
+                    offset = body.offset;
+                    continue;
+                }
+                if (!response.ok) {
+                    throw new Error(body.error || 'Upload failed');
+                }
+                offset = body.offset;
+                retries = 0;
+                updateProgress((offset / file.size) * 100);
+            } catch (error) {
+                if (++retries > MAX_CHUNK_RETRIES) {
+                    throw error;
+                }
+                await new Promise(resolve => setTimeout(resolve, 1000 * retries));
+                offset = (await requestJson(upload.upload_url)).offset;
+            }
+        }
+
+        const job = await finalizeUpload(upload.upload_url);
+        localStorage.removeItem(storageKey);
+        return job;
+    }
+
+    async function finalizeUpload(uploadUrl) {
+        // A busy server keeps the upload; wait as long as it asks and try again
+        while (true) {
+            const response = await fetch(`${uploadUrl}/finalize`, {method: 'POST'});
+            const body = await response.json();
+            if (response.status !== 503) {
+                if (!response.ok) {
+                    throw new Error(body.error || 'Upload failed');
+                }
+                return body;
             }
-        });
+            const retryAfter = parseInt(response.headers.get('Retry-After'), 10) || 5;
+            await new Promise(resolve => setTimeout(resolve, retryAfter * 1000));
+        }
+    }
 
-        return await fetch('/api/upload', {
-            method: 'POST',
-            body: formData
-        });
+    async function resumeUpload(uploadId) {
+        if (!uploadId) {
+            return null;
+        }
+        const response = await fetch(`/api/uploads/${uploadId}`);
+        if (!response.ok) {
+            return null;
+        }
+        const upload = await response.json();
+        upload.upload_url = `/api/uploads/${uploadId}`;
+        return upload;
+    }
+
+    async function checksumHeader(chunk) {
+        // Digests are only available in secure contexts; the server skips the check without one
+        if (!window.crypto || !window.crypto.subtle) {
+            return {};
+        }
+        const digest = await crypto.subtle.digest('SHA-256', await chunk.arrayBuffer());
+        const hex = Array.from(new Uint8Array(digest)).map(b => b.toString(16).padStart(2, '0')).join('');
+        return {'Upload-Checksum': hex};
+    }
+
+    async function requestJson(url, options) {
+        const response = await fetch(url, options);
+        const body = await response.json();
+        if (!response.ok) {
+            throw new Error(body.error || 'Upload failed');
+        }
+        return body;
     }
 
     function updateProgress(percent) {
@@ -93,7 +187,9 @@ document.addEventListener('DOMContentLoaded', function() {
             case 'video':
                 resultDiv.innerHTML = `
                     <h3>Video Processing Result</h3>
-                    <div class="status">${result.status}</div>
+                    <p>Slides: ${(result.slides || []).length}</p>
+                    <div class="extracted-text">${result.slide_text || ''}</div>
+                    <div class="transcription">${result.transcription || result.error || ''}</div>
                 `;
                 break;
         }
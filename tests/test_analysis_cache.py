@@ -0,0 +1,76 @@
+"""Tests for the analysis result cache"""
+import pytest
+from src.services.analysis_cache import AnalysisCache
+
+RESULT = {
+    'concepts': {'terms': [{'term': 'machine learning', 'type': 'noun_phrase'}]},
+    'visualizations': {'mind_map': '/static/visualizations/a_mindmap.html'},
+    'difficulty_assessment': {'difficulty_level': 'Beginner'},
+    'summaries': {'paragraph': {'summary': 'Short.'}}
+}
+
+@pytest.fixture
+def cache():
+    return AnalysisCache('test', max_entries=2, ttl_seconds=3600)
+
+def test_key_ignores_whitespace_differences(cache):
+    """Test that keys are stable across whitespace and unicode normalization"""
+    assert cache.make_key('Machine  learning\nis fun', 'en') == cache.make_key(' Machine learning is fun ', 'en')
+    assert cache.make_key('știință', 'ro') == cache.make_key('știință', 'ro')
+
+def test_key_depends_on_language_and_version(cache):
+    """Test that language and pipeline version are part of the key"""
+    key = cache.make_key('Some text', 'en')
+    assert len(key) == 64
+    assert key != cache.make_key('Some text', 'ro')
+    assert key != AnalysisCache('other').make_key('Some text', 'en')
+
+def test_cache_hit_and_miss(db_session, cache):
+    """Test storing and reading back a result"""
+    key = cache.make_key('Some text', 'en')
+    assert cache.get(key) is None
+
+    cache.set(key, 'en', RESULT)
+    assert cache.get(key) == RESULT
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+def test_lru_eviction(db_session, cache):
+    """Test that the least recently used entry is evicted over the size limit"""
+    keys = [cache.make_key(text, 'en') for text in ('one', 'two', 'three')]
+    cache.set(keys[0], 'en', RESULT)
+    cache.set(keys[1], 'en', RESULT)
+    cache.get(keys[0])
+    cache.set(keys[2], 'en', RESULT)
+
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) == RESULT
+    assert cache.stats()['entries'] == 2
+
+def test_ttl_expiry(db_session):
+    """Test that expired entries are treated as misses"""
+    cache = AnalysisCache('test', ttl_seconds=-1)
+    key = cache.make_key('Some text', 'en')
+    cache.set(key, 'en', RESULT)
+    assert cache.get(key) is None
+
+def test_unavailable_cache_falls_through_to_analysis(tmp_path, caplog):
+    """Test that a failing cache read or write is logged and the analysis still runs"""
+    from src.services.analysis_pipeline import AnalysisPipeline
+
+    class BrokenCache:
+        def get(self, key):
+            raise RuntimeError('database is locked')
+
+        def set(self, key, language, result, title=None):
+            raise RuntimeError('database is locked')
+
+    pipeline = AnalysisPipeline(concept_extractor=object(), visualizer=object(), difficulty_assessor=object(),
+                                summarizer=object(), visualizations_folder=str(tmp_path), cache=BrokenCache(),
+                                orchestrator=object(), language_detector=object())
+    pipeline._run = lambda text, language, title, viz_prefix, job, render: {'concepts': {'terms': []}}
+
+    result = pipeline._analyze_cached('a' * 64, 'Cells divide', 'en', 'Cells', None)
+    assert result == {'concepts': {'terms': []}, 'cache': {'key': 'a' * 64, 'hit': False}}
+    assert 'Could not read analysis cache entry' in caplog.text
+    assert 'Could not store analysis cache entry' in caplog.text
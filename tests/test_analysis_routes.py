@@ -0,0 +1,129 @@
+"""Tests for the upload and text analysis routes"""
+import io
+import pytest
+from src.services.job_queue import JobQueue
+
+
+def fake_analyze(job, text, language=None):
+    job.declare_stages(['analyze'])
+    with job.stage('analyze'):
+        return {'words': len(text.split()), 'language': language}
+
+
+def fake_upload(job, file_path, filename, language=None, mime_type=None, user_id=None, course=None):
+    with open(file_path, 'rb') as f:
+        result = {'filename': filename, 'mime_type': mime_type, 'size': len(f.read())}
+    if user_id is not None or course is not None:
+        result.update(user_id=user_id, course=course)
+    return result
+
+
+@pytest.fixture
+def job_queue(tmp_path, monkeypatch):
+    """Job queue shared by the analysis and job routes, running the fake handlers on demand"""
+    from src.routes import analysis, jobs
+    queue = JobQueue(db_path=str(tmp_path / 'jobs.db'), num_workers=1)
+    queue.start = lambda: None
+    queue._handlers[analysis.ANALYZE_JOB] = fake_analyze
+    queue._handlers[analysis.UPLOAD_JOB] = fake_upload
+    monkeypatch.setattr(analysis, 'job_queue', queue)
+    monkeypatch.setattr(jobs, 'job_queue', queue)
+    monkeypatch.setattr(analysis, 'UPLOAD_FOLDER', str(tmp_path / 'uploads'))
+    return queue
+
+
+def test_analyze_queues_a_job(client, job_queue):
+    """Test that text analysis returns 202 with a job that can be polled to its result"""
+    response = client.post('/api/analyze', json={'text': 'Cells divide by mitosis', 'language': 'en'})
+    assert response.status_code == 202
+    assert response.json['status'] == 'queued'
+    status_url = response.json['status_url']
+    assert status_url == f"/api/jobs/{response.json['job_id']}"
+    assert client.get(status_url).json['state'] == 'queued'
+
+    job_queue.run_pending()
+    job = client.get(status_url).json
+    assert job['state'] == 'finished'
+    assert job['result'] == {'words': 4, 'language': 'en'}
+
+
+def test_analyze_requires_text(client, job_queue):
+    """Test that a request without text is rejected"""
+    assert client.post('/api/analyze', json={}).status_code == 400
+    assert client.post('/api/analyze', data='not json').status_code == 400
+
+
+def test_upload_queues_a_job(client, job_queue):
+    """Test that an upload is saved, sniffed and processed by a background job"""
+    data = {'file': (io.BytesIO(b'%PDF-1.4\n' + bytes(100)), 'notes.pdf')}
+    response = client.post('/api/upload', data=data, content_type='multipart/form-data')
+    assert response.status_code == 202
+
+    job_queue.run_pending()
+    job = client.get(response.json['status_url']).json
+    assert job['state'] == 'finished'
+    assert job['result'] == {'filename': 'notes.pdf', 'mime_type': 'application/pdf', 'size': 109}
+
+
+def test_upload_is_indexed_for_the_signed_in_user(client, job_queue, monkeypatch):
+    """Test that an upload with a token and course is queued for that user's course index"""
+    from types import SimpleNamespace
+    from src.routes.auth import auth_service
+    monkeypatch.setattr(auth_service, 'validate_token', lambda token: SimpleNamespace(id=42))
+    data = {'file': (io.BytesIO(b'%PDF-1.4\n' + bytes(100)), 'notes.pdf'), 'course': 'BIO101'}
+    response = client.post('/api/upload', data=data, content_type='multipart/form-data',
+                           headers={'Authorization': 'Bearer token'})
+    assert response.status_code == 202
+
+    job_queue.run_pending()
+    result = client.get(response.json['status_url']).json['result']
+    assert (result['user_id'], result['course']) == (42, 'BIO101')
+
+
+def test_upload_with_invalid_token_is_rejected(client, job_queue, tmp_path, monkeypatch):
+    """Test that an upload with a bad token gets a 401 and is never saved"""
+    from src.routes.auth import auth_service
+
+    def invalid(token):
+        raise ValueError('Invalid token')
+
+    monkeypatch.setattr(auth_service, 'validate_token', invalid)
+    data = {'file': (io.BytesIO(b'%PDF-1.4\n' + bytes(100)), 'notes.pdf')}
+    response = client.post('/api/upload', data=data, content_type='multipart/form-data',
+                           headers={'Authorization': 'Bearer bad'})
+
+    assert response.status_code == 401
+    assert not (tmp_path / 'uploads').exists()
+    assert job_queue.run_pending() == 0
+
+
+def test_upload_rejects_unsupported_content(client, job_queue, tmp_path):
+    """Test that a file whose bytes are not a supported type gets a 415 and is never saved"""
+    data = {'file': (io.BytesIO(b'\x7fELF\x02\x01\x01' + bytes(100)), 'notes.pdf')}
+    response = client.post('/api/upload', data=data, content_type='multipart/form-data')
+
+    assert response.status_code == 415
+    assert not (tmp_path / 'uploads').exists()
+    assert job_queue.run_pending() == 0
+
+
+def test_upload_to_saturated_pool_is_deferred(client, job_queue, tmp_path, monkeypatch):
+    """Test that an upload needing a saturated pool gets a 503 with Retry-After and is not queued"""
+    from src.routes import analysis
+    from src.services.workload_pools import PoolSaturated
+    checked = []
+
+    def saturated(workloads):
+        checked.append(tuple(workloads))
+        raise PoolSaturated('ocr', 7)
+
+    monkeypatch.setattr(analysis.workload_pools, 'check_capacity', saturated)
+    data = {'file': (io.BytesIO(b'%PDF-1.4\n' + bytes(100)), 'notes.pdf')}
+    response = client.post('/api/upload', data=data, content_type='multipart/form-data')
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '7'
+    assert response.json['retry_after'] == 7
+    assert checked == [('text', 'ocr')]
+    assert not (tmp_path / 'uploads').exists()
+    assert job_queue.run_pending() == 0
@@ -0,0 +1,144 @@
+"""Tests for resumable chunked uploads"""
+import hashlib
+import io
+import os
+import pytest
+from src.services.chunked_upload import ChunkedUploadService, ChecksumMismatch, OffsetMismatch, UploadNotFound
+from src.services.file_types import UnsupportedFileType
+
+DATA = os.urandom(300 * 1024)
+
+@pytest.fixture
+def service(tmp_path):
+    """Chunked upload service writing to a temporary folder"""
+    return ChunkedUploadService(upload_folder=str(tmp_path), max_chunk_size=128 * 1024)
+
+def sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+def upload_in_chunks(service, upload_id, data, chunk_size=100 * 1024):
+    for offset in range(0, len(data), chunk_size):
+        chunk = data[offset:offset + chunk_size]
+        session = service.append(upload_id, offset, io.BytesIO(chunk), chunk_checksum=sha256(chunk))
+    return session
+
+def test_chunked_upload(service):
+    """Test uploading a file in chunks and finalizing it"""
+    session = service.init('lecture.mp3', size=len(DATA), checksum=sha256(DATA))
+    session = upload_in_chunks(service, session['upload_id'], DATA)
+    assert session['complete']
+
+    upload = service.finalize(session['upload_id'])
+
+    assert upload['checksum'] == sha256(DATA)
+    with open(upload['file_path'], 'rb') as f:
+        assert f.read() == DATA
+    with pytest.raises(UploadNotFound):
+        service.status(session['upload_id'])
+
+def test_resume_after_restart(service, tmp_path):
+    """Test that a new service instance resumes from the stored offset and checksum"""
+    session = service.init('lecture.mp3', size=len(DATA))
+    service.append(session['upload_id'], 0, io.BytesIO(DATA[:100 * 1024]))
+
+    restarted = ChunkedUploadService(upload_folder=str(tmp_path), max_chunk_size=128 * 1024)
+    offset = restarted.status(session['upload_id'])['offset']
+    restarted.append(session['upload_id'], offset, io.BytesIO(DATA[offset:offset + 100 * 1024]))
+    restarted.append(session['upload_id'], offset + 100 * 1024, io.BytesIO(DATA[offset + 100 * 1024:]))
+
+    assert restarted.finalize(session['upload_id'], checksum=sha256(DATA))['checksum'] == sha256(DATA)
+
+def test_rejected_chunks_leave_upload_unchanged(service):
+    """Test that out-of-order, corrupt and oversized chunks are discarded"""
+    session = service.init('notes.pdf')
+    upload_id = session['upload_id']
+    service.append(upload_id, 0, io.BytesIO(b'first'))
+
+    with pytest.raises(OffsetMismatch) as excinfo:
+        service.append(upload_id, 0, io.BytesIO(b'again'))
+    assert excinfo.value.expected == 5
+
+    with pytest.raises(ChecksumMismatch):
+        service.append(upload_id, 5, io.BytesIO(b'second'), chunk_checksum=sha256(b'other'))
+
+    with pytest.raises(ValueError):
+        service.append(upload_id, 5, io.BytesIO(b'x' * (129 * 1024)))
+
+    assert service.status(upload_id)['offset'] == 5
+    service.append(upload_id, 5, io.BytesIO(b'second'))
+    assert service.finalize(upload_id)['checksum'] == sha256(b'firstsecond')
+
+def test_init_rejects_unsupported_files(service):
+    """Test that file types we cannot process are refused up front"""
+    with pytest.raises(ValueError):
+        service.init('malware.exe')
+
+def test_upload_endpoints(client, tmp_path, monkeypatch):
+    """Test the chunked upload API from init to the queued processing job"""
+    from src.routes import uploads
+    monkeypatch.setattr(uploads.chunked_upload_service, 'upload_folder', str(tmp_path))
+    queued = []
+    monkeypatch.setattr(uploads.job_queue, 'enqueue', lambda func, **payload: queued.append(payload) or 'job1')
+
+    response = client.post('/api/uploads', json={'filename': 'notes.txt', 'size': 10})
+    assert response.status_code == 201
+    upload_url = response.json['upload_url']
+
+    assert client.patch(upload_url, data=b'01234', headers={'Upload-Offset': '0'}).status_code == 200
+    response = client.patch(upload_url, data=b'56789', headers={'Upload-Offset': '0'})
+    assert response.status_code == 409
+    assert response.json['offset'] == 5
+    assert client.patch(upload_url, data=b'56789', headers={'Upload-Offset': '5'}).json['complete']
+
+    response = client.post(f"{upload_url}/finalize", json={'checksum': sha256(b'0123456789')})
+    assert response.status_code == 202
+    assert response.json['status_url'] == '/api/jobs/job1'
+    assert queued[0]['filename'] == 'notes.txt'
+    with open(queued[0]['file_path'], 'rb') as f:
+        assert f.read() == b'0123456789'
+
+    assert client.get(upload_url).status_code == 404
+
+def test_unsupported_chunk_endpoint(client, tmp_path, monkeypatch):
+    """Test that an unsupported first chunk gets a 415 and ends the upload"""
+    from src.routes import uploads
+    monkeypatch.setattr(uploads.chunked_upload_service, 'upload_folder', str(tmp_path))
+    upload_url = client.post('/api/uploads', json={'filename': 'notes.pdf'}).json['upload_url']
+
+    response = client.patch(upload_url, data=b'\x7fELF\x02\x01\x01' + bytes(64), headers={'Upload-Offset': '0'})
+    assert response.status_code == 415
+    assert client.get(upload_url).status_code == 404
+
+def test_first_chunk_is_sniffed(service):
+    """Test that an unsupported file is rejected on its first chunk and its upload deleted"""
+    session = service.init('notes.pdf')
+    with pytest.raises(UnsupportedFileType):
+        service.append(session['upload_id'], 0, io.BytesIO(b'\x7fELF\x02\x01\x01' + bytes(4096)))
+    with pytest.raises(UploadNotFound):
+        service.status(session['upload_id'])
+    assert os.listdir(service.sessions_folder) == []
+
+    session = service.init('notes.pdf')
+    session = service.append(session['upload_id'], 0, io.BytesIO(b'%PDF-1.4\n' + bytes(4096)))
+    assert session['mime_type'] == 'application/pdf'
+    assert service.finalize(session['upload_id'])['mime_type'] == 'application/pdf'
+
+def test_expired_uploads_are_removed(service):
+    """Test that starting an upload deletes uploads idle for longer than the session TTL"""
+    stale = service.init('old.txt')['upload_id']
+    service.append(stale, 0, io.BytesIO(b'abandoned'))
+    fresh = service.init('new.txt')['upload_id']
+    orphan = os.path.join(service.sessions_folder, 'orphan.part')
+    open(orphan, 'wb').close()
+    expired = service.session_ttl + 60
+    for path in (service._session_path(stale), service._part_path(stale), orphan):
+        os.utime(path, (os.path.getatime(path) - expired, os.path.getmtime(path) - expired))
+
+    service._next_cleanup = 0
+    service.init('another.txt')
+
+    with pytest.raises(UploadNotFound):
+        service.status(stale)
+    assert not os.path.exists(service._part_path(stale))
+    assert not os.path.exists(orphan)
+    assert service.status(fresh)['offset'] == 0
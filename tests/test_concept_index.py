@@ -0,0 +1,92 @@
+"""Tests for the cross-document concept index"""
+from src.models.concept_index import Concept, ConceptCooccurrence, ConceptPosting
+from src.services.concept_index import ConceptIndex, concept_key
+
+
+def _concepts(*terms, entities=None):
+    return {
+        'terms': [{'term': term, 'type': 'noun_phrase'} for term in terms],
+        'entities': entities or {},
+        'definitions': [],
+        'relationships': {'nodes': [], 'edges': []}
+    }
+
+
+def test_concept_key_normalizes_surface_forms():
+    """Case, determiners, hyphens and English plurals do not change a concept's key"""
+    assert concept_key('The Cell-Cycles') == concept_key('cell cycle') == 'cell cycle'
+    assert concept_key('processes') == 'process'
+    assert concept_key('theories') == 'theory'
+    assert concept_key('analysis') == 'analysis'
+    assert concept_key('it') == ''
+    assert concept_key('Celula', 'ro') == concept_key('celula', 'ro')
+
+
+def test_index_document_builds_postings_and_cooccurrences(db_session, test_user):
+    """Each indexed document adds postings and counts its concepts as co-occurring"""
+    index = ConceptIndex(db_session.session)
+    index.index_document('upload', 'job-1', _concepts('mitosis', 'the cell', 'chromosomes'), user_id=test_user.id)
+    index.index_document('resource', 7, _concepts('Cells', 'mitosis', entities={
+        'PER': [{'text': 'Walther Flemming', 'score': 0.99, 'count': 3}]}), user_id=test_user.id)
+
+    documents = index.documents_for('Mitosis', user_id=test_user.id)
+    assert {(d['document_type'], d['document_id']) for d in documents} == {('upload', 'job-1'), ('resource', '7')}
+    assert index.documents_for('cell', user_id=test_user.id, document_type='resource') == [
+        {'document_type': 'resource', 'document_id': '7', 'count': 1}]
+
+    related = index.related_concepts('mitosis', user_id=test_user.id)
+    assert related[0]['key'] == 'cell' and related[0]['count'] == 2
+    assert {concept['key'] for concept in related} == {'cell', 'chromosome', 'walther flemming'}
+    # Other users do not see the concepts
+    assert index.documents_for('mitosis', user_id=test_user.id + 1) == []
+
+
+def test_reindexing_a_document_replaces_its_concepts(db_session, test_user):
+    """Indexing a document again or removing it updates counts instead of adding to them"""
+    index = ConceptIndex(db_session.session)
+    index.index_document('question', 1, _concepts('mitosis', 'meiosis'), user_id=test_user.id)
+    index.index_document('question', 1, _concepts('mitosis', 'cytokinesis'), user_id=test_user.id)
+
+    assert [c['key'] for c in index.related_concepts('mitosis', user_id=test_user.id)] == ['cytokinesis']
+    assert Concept.query.filter_by(key='meiosis').first() is None
+    assert Concept.query.filter_by(key='mitosis').one().document_count == 1
+
+    assert index.remove_document('question', 1)
+    assert Concept.query.count() == 0
+    assert ConceptPosting.query.count() == 0
+    assert ConceptCooccurrence.query.count() == 0
+
+
+def test_cooccurrences_are_limited_to_the_most_mentioned_concepts(db_session, test_user):
+    """Only the max_linked most mentioned concepts of a document are linked, but all are posted"""
+    index = ConceptIndex(db_session.session, max_linked=2)
+    index.index_document('upload', 'job-2', _concepts('mitosis', 'mitosis', 'mitosis', 'spindle', 'spindle',
+                                                      'nucleus'), user_id=test_user.id, course='BIO101')
+
+    assert [c['key'] for c in index.related_concepts('mitosis', user_id=test_user.id)] == ['spindle']
+    assert index.related_concepts('nucleus', user_id=test_user.id) == []
+    assert index.documents_for('nucleus', user_id=test_user.id, course='BIO101')[0]['document_id'] == 'job-2'
+    assert index.documents_for('nucleus', user_id=test_user.id, course='CHEM101') == []
+
+
+def test_concurrent_indexing_of_a_concept_is_retried(db_session, test_user, monkeypatch):
+    """Indexing that loses the race to add a concept is rolled back and retried against the stored row"""
+    index = ConceptIndex(db_session.session)
+    index.index_document('upload', 'job-1', _concepts('mitosis'), user_id=test_user.id, course='BIO101')
+
+    # The other job committed the concept after this one looked it up
+    lookups = []
+    scoped = index._scoped
+
+    def missed_first_lookup(user_id, course):
+        lookups.append(course)
+        query = scoped(user_id, course)
+        return query.filter(Concept.id.is_(None)) if len(lookups) == 1 else query
+
+    monkeypatch.setattr(index, '_scoped', missed_first_lookup)
+    assert index.index_document('upload', 'job-2', _concepts('mitosis'), user_id=test_user.id, course='BIO101') == 1
+
+    assert len(lookups) == 2
+    concept = Concept.query.filter_by(key='mitosis').one()
+    assert concept.document_count == 2
+    assert {posting.document_id for posting in concept.postings} == {'job-1', 'job-2'}
@@ -0,0 +1,71 @@
+"""Tests for windowed, aggregated named entity recognition"""
+import re
+import pytest
+import spacy
+from src.services.analyzed_document import AnalyzedDocument
+from src.services.entity_recognizer import EntityRecognizer, aggregate_entities
+from src.services.model_registry import model_registry
+
+class WordTokenizer:
+    """Stand-in tokenizer: one token per word, 20-token inputs"""
+    model_max_length = 22
+
+    def num_special_tokens_to_add(self):
+        return 2
+
+    def __call__(self, texts, add_special_tokens=False):
+        return {'input_ids': [text.split() for text in texts]}
+
+def fake_ner(texts, batch_size, aggregation_strategy):
+    """Tag every capitalized word after the first of its sentence as a person"""
+    return [[{'entity_group': 'PER', 'word': m.group(), 'score': 0.9, 'start': m.start(), 'end': m.end()}
+             for m in re.finditer(r'(?<=\w )[A-Z][a-z]+', text)] for text in texts]
+
+@pytest.fixture
+def document():
+    nlp = spacy.blank('en')
+    nlp.add_pipe('sentencizer')
+    text = ' '.join(f"In year {n} the scientist Marie studied radium with Pierre." for n in range(30))
+    return AnalyzedDocument(text, 'en', nlp(text))
+
+def test_windows_hold_whole_sentences_within_budget(document):
+    """Test that windows respect the model's input and overlap by the stride"""
+    windows = EntityRecognizer(stride_tokens=10).windows(document, WordTokenizer())
+
+    texts = [document.text[start:end] for start, end in windows]
+    assert all(len(text.split()) <= 20 for text in texts)
+    assert all(text.endswith('.') for text in texts)
+    assert windows[1][0] < windows[0][1]
+    # Two 10-word sentences per window, the second one repeated in the next window
+    assert len(windows) == 29
+
+def test_long_sentence_is_cut_between_words():
+    """Test that a sentence longer than the input is split instead of truncated"""
+    nlp = spacy.blank('en')
+    nlp.add_pipe('sentencizer')
+    text = ' '.join(['word'] * 50) + '.'
+    document = AnalyzedDocument(text, 'en', nlp(text))
+
+    windows = EntityRecognizer(stride_tokens=0).windows(document, WordTokenizer())
+
+    assert windows[0][0] == 0 and windows[-1][1] == len(text)
+    assert all(len(text[start:end].split()) <= 20 for start, end in windows)
+
+def test_entities_are_merged_and_counted(document, monkeypatch):
+    """Test that repeated mentions collapse into one entity with a count, and overlaps count once"""
+    monkeypatch.setitem(model_registry._models, 'ner:en', fake_ner)
+    monkeypatch.setitem(model_registry._models, 'ner-tokenizer:en', WordTokenizer())
+
+    entities = EntityRecognizer(stride_tokens=10).recognize(document)
+
+    assert [(e['text'], e['type'], e['count']) for e in entities] == [('Marie', 'PER', 30), ('Pierre', 'PER', 30)]
+    assert entities[0]['first_offset'] == document.text.index('Marie')
+
+def test_aggregation_accepts_a_single_window():
+    """Test that the flat output the pipeline gives for one input is handled"""
+    entities = aggregate_entities('Ada met Ada.', [(0, 12)], [
+        {'entity_group': 'PER', 'word': 'Ada', 'score': 0.8, 'start': 0, 'end': 3},
+        {'entity_group': 'PER', 'word': 'Ada', 'score': 0.6, 'start': 8, 'end': 11}])
+
+    assert entities == [{'text': 'Ada', 'type': 'PER', 'count': 2, 'score': 0.8, 'first_offset': 0,
+                         'mean_score': pytest.approx(0.7)}]
@@ -0,0 +1,96 @@
+"""Tests for streaming text extraction"""
+import zipfile
+import pytest
+import docx
+from src.services import file_processor
+from src.services.analysis_pipeline import iter_windows
+
+def test_iter_text_streams_paragraphs(tmp_path):
+    """Test that plain text is yielded paragraph by paragraph with stats"""
+    path = tmp_path / 'notes.txt'
+    path.write_text("First paragraph\nstill first.\n\nSecond paragraph.\n\n\nThird.\n", encoding='utf-8')
+    stats = file_processor.ExtractionStats()
+
+    chunks = list(file_processor.iter_text(str(path), stats))
+
+    assert chunks == ["First paragraph\nstill first.", "Second paragraph.", "Third."]
+    assert stats.paragraphs == 3
+    assert stats.characters == sum(len(chunk) for chunk in chunks)
+    assert stats.to_dict()['chars_per_second'] is not None
+
+def test_iter_text_bounds_long_lines(tmp_path, monkeypatch):
+    """Test that text without line breaks is still read in bounded blocks"""
+    monkeypatch.setattr(file_processor, 'TEXT_BLOCK_SIZE', 100)
+    path = tmp_path / 'one_line.txt'
+    path.write_text('word ' * 100, encoding='utf-8')
+
+    chunks = list(file_processor.iter_text(str(path)))
+
+    assert len(chunks) == 5
+    assert all(len(chunk) <= 100 for chunk in chunks)
+
+def test_iter_text_docx(tmp_path):
+    """Test that DOCX paragraphs are streamed"""
+    document = docx.Document()
+    for text in ('Intro', '', 'Body'):
+        document.add_paragraph(text)
+    path = tmp_path / 'notes.docx'
+    document.save(str(path))
+    stats = file_processor.ExtractionStats()
+
+    assert list(file_processor.iter_text(str(path), stats)) == ['Intro', 'Body']
+    assert stats.paragraphs == 3
+
+def test_process_text_keeps_only_preview(tmp_path):
+    """Test that the preview is capped while the length covers the whole document"""
+    path = tmp_path / 'long.txt'
+    path.write_text('\n\n'.join(['paragraph ' * 50] * 20), encoding='utf-8')
+
+    result = file_processor.process_text(str(path))
+
+    assert len(result['content']) == file_processor.PREVIEW_LENGTH
+    assert result['length'] > 9000
+    assert result['extraction']['paragraphs'] == 20
+
+def test_iter_text_html(tmp_path, monkeypatch):
+    """Test that HTML is streamed as paragraphs of visible text"""
+    monkeypatch.setattr(file_processor, 'TEXT_BLOCK_SIZE', 16)
+    path = tmp_path / 'page.html'
+    path.write_text("<html><head><title>Cells</title><style>p {color: red}</style></head>"
+                    "<body><h1>Mitosis</h1><p>Cells   divide<br>in phases &amp; stages.</p>"
+                    "<script>var x = 1;</script><ul><li>Prophase</li></ul></body></html>", encoding='utf-8')
+
+    chunks = list(file_processor.iter_text(str(path)))
+
+    assert chunks == ['Cells', 'Mitosis', 'Cells divide', 'in phases & stages.', 'Prophase']
+
+def test_iter_text_epub_follows_spine(tmp_path):
+    """Test that EPUB chapters are read in spine order, not archive order"""
+    path = tmp_path / 'book.epub'
+    with zipfile.ZipFile(str(path), 'w') as book:
+        book.writestr('mimetype', 'application/epub+zip', compress_type=zipfile.ZIP_STORED)
+        book.writestr('META-INF/container.xml',
+                      '<container xmlns="urn:oasis:names:tc:opendocument:xmlns:container"><rootfiles>'
+                      '<rootfile full-path="OEBPS/content.opf"/></rootfiles></container>')
+        book.writestr('OEBPS/content.opf',
+                      '<package xmlns="http://www.idpf.org/2007/opf"><manifest>'
+                      '<item id="b" href="text/two.xhtml"/><item id="a" href="text/one.xhtml"/>'
+                      '</manifest><spine><itemref idref="a"/><itemref idref="b"/></spine></package>')
+        book.writestr('OEBPS/text/two.xhtml', '<html><body><p>Second chapter</p></body></html>')
+        book.writestr('OEBPS/text/one.xhtml', '<html><body><p>First chapter</p></body></html>')
+    stats = file_processor.ExtractionStats()
+    progress = []
+
+    chunks = list(file_processor.iter_text(str(path), stats, on_progress=progress.append))
+
+    assert chunks == ['First chapter', 'Second chapter']
+    assert (stats.pages, stats.total_pages) == (2, 2)
+    assert progress == [0.0, 0.5]
+
+def test_iter_windows():
+    """Test grouping chunks into bounded windows"""
+    windows = list(iter_windows(['a' * 4, 'b' * 4, 'c' * 4], max_chars=10))
+    assert windows == ['aaaa\nbbbb', 'cccc']
+
+    windows = list(iter_windows(['one two three four'], max_chars=9))
+    assert windows == ['one two', 'three', 'four']
@@ -0,0 +1,54 @@
+"""Tests for MIME sniffing and the file type registry"""
+import io
+import threading
+import docx
+import pytest
+from src.services import file_types
+from src.services.file_types import FileType, UnsupportedFileType, register_file_type, sniff, sniff_stream
+
+def docx_bytes():
+    document = docx.Document()
+    document.add_paragraph('Notes')
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+def test_sniff_uses_content_then_extension():
+    """Test that content decides the type and the extension only resolves generic containers"""
+    assert sniff(b'%PDF-1.4\n', 'notes.txt').name == 'pdf'
+    assert sniff(docx_bytes(), 'notes.docx').name == 'docx'
+    assert sniff(b'plain words\n', 'page.html').name == 'html'
+    assert sniff(b'plain words\n', 'notes.txt').name == 'text'
+
+    with pytest.raises(UnsupportedFileType):
+        sniff(b'\x7fELF\x02\x01\x01' + bytes(64), 'notes.pdf')
+    with pytest.raises(UnsupportedFileType):
+        sniff(b'', 'notes.txt')
+
+def test_sniff_stream_rewinds():
+    """Test that sniffing an upload stream leaves it ready to be saved"""
+    stream = io.BytesIO(b'%PDF-1.4\n' + b'x' * 5000)
+
+    assert sniff_stream(stream, 'doc.pdf').mime_type == 'application/pdf'
+    assert stream.tell() == 0
+
+def test_register_plugin_file_type(monkeypatch):
+    """Test that a registered format is accepted and takes precedence"""
+    monkeypatch.setattr(file_types, '_registry', list(file_types._registry))
+    register_file_type(FileType('markdown', 'text', ['text/markdown'], ['md'],
+                                extractor=lambda path, stats: iter(['text']),
+                                generic_mime_types=['text/plain']))
+
+    assert file_types.allowed_file('notes.md')
+    assert sniff(b'# Title\n\nSome text\n', 'notes.md').name == 'markdown'
+    assert sniff(b'# Title\n\nSome text\n', 'notes.txt').name == 'text'
+
+def test_magic_handle_per_thread():
+    """Test that each thread gets its own libmagic handle and reuses it"""
+    handles = []
+    thread = threading.Thread(target=lambda: handles.append(file_types._magic()))
+    thread.start()
+    thread.join()
+
+    assert file_types._magic() is file_types._magic()
+    assert handles[0] is not file_types._magic()
@@ -0,0 +1,35 @@
+"""Tests for the selectable model inference backends"""
+import pytest
+from src.services import inference_backends
+from src.services.inference_backends import benchmark, model_backend
+
+def test_backend_chosen_per_model(monkeypatch):
+    """Test that a model's own backend setting overrides the default one"""
+    monkeypatch.setenv('MODEL_BACKEND', 'int8')
+    monkeypatch.setenv('MODEL_BACKENDS', 'summarization:en=onnx, ner:ro=fp32')
+
+    assert model_backend('summarization:en') == 'onnx'
+    assert model_backend('ner:ro') == 'fp32'
+    assert model_backend('ner:en') == 'int8'
+
+    monkeypatch.setenv('MODEL_BACKEND', 'fp16')
+    with pytest.raises(ValueError):
+        model_backend('ner:en')
+
+def test_benchmark_compares_backends_with_fp32(monkeypatch):
+    """Test that each backend is timed and scored against the full precision outputs"""
+    def load_pipeline(name, backend):
+        if backend == 'onnx':
+            raise FileNotFoundError('No ONNX export')
+        words = 4 if backend == 'fp32' else 2
+        return lambda text: [{'summary_text': ' '.join(text.split()[:words])}]
+
+    monkeypatch.setattr(inference_backends, 'load_pipeline', load_pipeline)
+
+    results = benchmark('summarization:en', ['one two three four five'], ['int8', 'onnx'])
+
+    assert [result['backend'] for result in results] == ['fp32', 'int8', 'onnx']
+    assert results[0]['agreement'] == 1.0
+    assert results[1]['agreement'] == pytest.approx(2 / 3)
+    assert results[1]['latency_seconds']['mean'] >= 0
+    assert results[2]['error'] == 'No ONNX export'
@@ -0,0 +1,201 @@
+"""Tests for the background job queue"""
+import time
+import pytest
+from src.services.job_queue import JobQueue
+
+
+def add_numbers(job, a, b):
+    job.declare_stages(['add'])
+    with job.stage('add'):
+        return {'sum': a + b}
+
+
+def fail_job(job, message):
+    with job.stage('explode'):
+        raise ValueError(message)
+
+
+def stream_words(job, words):
+    with job.stage('stream'):
+        for word in words:
+            job.add_partial_result('stream', {'word': word})
+    return {'count': len(words)}
+
+
+@pytest.fixture
+def job_queue(tmp_path):
+    queue = JobQueue(db_path=str(tmp_path / 'jobs.db'), num_workers=1, poll_interval=0.05)
+    yield queue
+    queue.stop(timeout=1)
+
+
+def test_enqueue_returns_queued_job(job_queue):
+    """Test that enqueued jobs are persisted before they run"""
+    job_queue.start = lambda: None  # keep the job in the queue
+    job_id = job_queue.enqueue(add_numbers, a=1, b=2)
+
+    job = job_queue.get_job(job_id)
+    assert job['state'] == 'queued'
+    assert job['result'] is None
+
+
+def test_run_pending_records_result_and_stages(job_queue):
+    """Test that a finished job exposes its result and stage progress"""
+    job_queue.start = lambda: None
+    job_id = job_queue.enqueue(add_numbers, a=1, b=2)
+
+    assert job_queue.run_pending() == 1
+    job = job_queue.get_job(job_id)
+    assert job['state'] == 'finished'
+    assert job['result'] == {'sum': 3}
+    assert job['progress'] == 1.0
+    assert [stage['name'] for stage in job['stages']] == ['add']
+    assert job['stages'][0]['state'] == 'finished'
+
+
+def test_partial_results_are_published(job_queue):
+    """Test that output published while a stage runs is visible on the job"""
+    job_queue.start = lambda: None
+    job_id = job_queue.enqueue(stream_words, words=['a', 'b'])
+    job_queue.run_pending()
+
+    stage = job_queue.get_job(job_id)['stages'][0]
+    assert stage['partial_results'] == [{'word': 'a'}, {'word': 'b'}]
+
+
+def test_failed_job_reports_error(job_queue):
+    """Test that handler exceptions mark the job and stage as failed"""
+    job_queue.start = lambda: None
+    job_id = job_queue.enqueue(fail_job, message='bad input')
+    job_queue.run_pending()
+
+    job = job_queue.get_job(job_id)
+    assert job['state'] == 'failed'
+    assert job['error'] == 'bad input'
+    assert job['stages'][0]['state'] == 'failed'
+
+
+def test_workers_process_jobs_in_background(job_queue):
+    """Test that the worker pool picks up queued jobs"""
+    job_id = job_queue.enqueue(add_numbers, a=2, b=5)
+
+    deadline = time.time() + 5
+    while job_queue.get_job(job_id)['state'] != 'finished' and time.time() < deadline:
+        time.sleep(0.05)
+    assert job_queue.get_job(job_id)['result'] == {'sum': 7}
+
+
+def test_jobs_are_shared_through_the_database(job_queue):
+    """Test that another queue on the same file can run and report jobs"""
+    job_queue.start = lambda: None
+    job_id = job_queue.enqueue(add_numbers, a=3, b=4)
+
+    other = JobQueue(db_path=job_queue.db_path, num_workers=1)
+    assert other.run_pending() == 1
+    assert job_queue.get_job(job_id)['result'] == {'sum': 7}
+
+
+def test_unknown_job(job_queue):
+    """Test looking up a job that does not exist"""
+    assert job_queue.get_job('missing') is None
+
+
+def test_requeue_stale_jobs(job_queue):
+    """Test that jobs abandoned mid-run are put back in the queue"""
+    job_queue.start = lambda: None
+    job_id = job_queue.enqueue(add_numbers, a=1, b=1)
+    job_queue._claim()
+    assert job_queue.get_job(job_id)['state'] == 'running'
+
+    assert job_queue.requeue_stale_jobs(max_age=-1) == 1
+    assert job_queue.get_job(job_id)['state'] == 'queued'
+
+
+def test_get_unknown_job_endpoint(client):
+    """Test the job status endpoint for an unknown job"""
+    response = client.get('/api/jobs/missing')
+    assert response.status_code == 404
+    assert response.json['error'] == 'Job not found'
+
+
+def test_job_events_endpoint(client, job_queue, monkeypatch):
+    """Test that the event stream of a job ends with its result"""
+    from src.routes import jobs as jobs_routes
+    monkeypatch.setattr(jobs_routes, 'job_queue', job_queue)
+    job_queue.start = lambda: None
+    job_id = job_queue.enqueue(stream_words, words=['cell', 'nucleus'])
+    job_queue.run_pending()
+
+    response = client.get(f'/api/jobs/{job_id}/events')
+
+    assert response.mimetype == 'text/event-stream'
+    body = response.get_data(as_text=True)
+    assert body.startswith('event: finished\ndata: ')
+    assert '"count": 2' in body
+
+
+def slow_job(job, seconds):
+    with job.stage('slow'):
+        time.sleep(seconds)
+    return {'slept': seconds}
+
+
+def test_long_running_job_keeps_its_heartbeat(job_queue, monkeypatch):
+    """Test that a job with one long stage is not requeued while its worker is alive"""
+    from src.services import job_queue as job_queue_module
+    monkeypatch.setattr(job_queue_module, 'HEARTBEAT_SECONDS', 0.05)
+    job_id = job_queue.enqueue(slow_job, seconds=0.6)
+    time.sleep(0.3)
+
+    assert job_queue.requeue_stale_jobs(max_age=0.2) == 0
+    assert job_queue.get_job(job_id)['state'] == 'running'
+    job_queue.stop(timeout=2)
+    assert job_queue.get_job(job_id)['result'] == {'slept': 0.6}
+
+
+def test_job_without_heartbeat_is_requeued(job_queue):
+    """Test that a running job whose worker stopped beating goes back in the queue"""
+    job_queue.start = lambda: None
+    job_id = job_queue.enqueue(add_numbers, a=1, b=1)
+    job_queue._claim()
+
+    assert job_queue.requeue_stale_jobs(max_age=60) == 0
+    with job_queue._transaction() as conn:
+        conn.execute("UPDATE jobs SET heartbeat_at = ? WHERE id = ?", (time.time() - 120, job_id))
+    assert job_queue.requeue_stale_jobs(max_age=60) == 1
+    assert job_queue.get_job(job_id)['state'] == 'queued'
+
+
+def test_purge_finished_jobs(job_queue):
+    """Test that only finished and failed jobs past the retention period are deleted"""
+    job_queue.start = lambda: None
+    old = job_queue.enqueue(add_numbers, a=1, b=1)
+    failed = job_queue.enqueue(fail_job, message='boom')
+    job_queue.run_pending()
+    recent = job_queue.enqueue(add_numbers, a=2, b=2)
+    job_queue.run_pending()
+    queued = job_queue.enqueue(add_numbers, a=3, b=3)
+    with job_queue._transaction() as conn:
+        conn.execute("UPDATE jobs SET finished_at = ? WHERE id IN (?, ?)", (time.time() - 3600, old, failed))
+
+    assert job_queue.purge_finished_jobs(max_age=60) == 2
+    assert job_queue.get_job(old) is None and job_queue.get_job(failed) is None
+    assert job_queue.get_job(recent)['state'] == 'finished'
+    assert job_queue.get_job(queued)['state'] == 'queued'
+
+
+def test_heartbeat_column_is_added_to_old_databases(tmp_path):
+    """Test that a jobs database created before heartbeats gets the new column"""
+    import sqlite3
+    path = str(tmp_path / 'old.db')
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE jobs (id TEXT PRIMARY KEY, func TEXT NOT NULL, payload TEXT NOT NULL, "
+                 "state TEXT NOT NULL, stages TEXT NOT NULL DEFAULT '[]', result TEXT, error TEXT, worker TEXT, "
+                 "created_at REAL NOT NULL, started_at REAL, finished_at REAL, updated_at REAL NOT NULL)")
+    conn.close()
+
+    queue = JobQueue(db_path=path, num_workers=1)
+    queue.start = lambda: None
+    job_id = queue.enqueue(add_numbers, a=1, b=2)
+    queue.run_pending()
+    assert queue.get_job(job_id)['result'] == {'sum': 3}
@@ -0,0 +1,110 @@
+"""Tests for the persistent knowledge graph store"""
+from src.models.knowledge_graph import KnowledgeEdge, KnowledgeNode
+from src.services.knowledge_graph_store import KnowledgeGraphStore, document_graph
+
+
+def _concepts(terms=(), edges=(), definitions=()):
+    return {
+        'terms': [{'term': term, 'type': 'noun_phrase'} for term in terms],
+        'entities': {},
+        'definitions': [{'term': term, 'definition': definition} for term, definition in definitions],
+        'relationships': {
+            'nodes': [],
+            'edges': [{'source': source, 'target': target, 'relation': relation}
+                      for source, relation, target in edges]
+        }
+    }
+
+
+def test_document_graph_merges_surface_forms_into_one_node():
+    """Nodes are keyed by normalized label and relations between pronouns are dropped"""
+    nodes, edges = document_graph(_concepts(
+        terms=['The cells', 'cell'], edges=[('cells', 'contain', 'Nucleus'), ('it', 'has', 'nucleus')],
+        definitions=[('Cell', 'the basic unit of life.')]))
+
+    assert set(nodes) == {'cell', 'nucleus'}
+    assert nodes['cell']['mentions'] == 3
+    assert nodes['cell']['definition'] == 'the basic unit of life.'
+    assert edges == {('cell', 'nucleus', 'contain'): 1}
+
+
+def test_merge_document_is_incremental_and_idempotent(db_session, test_user):
+    """Merging adds to the counts of existing nodes and edges, and a document merges only once"""
+    store = KnowledgeGraphStore(db_session.session)
+    first = _concepts(terms=['cell', 'nucleus'], edges=[('cell', 'contains', 'nucleus')])
+    assert store.merge_document('upload', 'job-1', first, user_id=test_user.id)
+    assert not store.merge_document('upload', 'job-1', first, user_id=test_user.id)
+    second = _concepts(terms=['Cells'], edges=[('cells', 'contains', 'the nucleus')])
+    assert store.merge_document('resource', 3, second, user_id=test_user.id)
+
+    cell = KnowledgeNode.query.filter_by(key='cell').one()
+    assert (cell.mention_count, cell.document_count) == (2, 2)
+    assert KnowledgeNode.query.count() == 2
+    assert KnowledgeEdge.query.one().weight == 2
+
+
+def test_neighbourhood_pages_nodes_by_distance(db_session, test_user):
+    """Neighbourhoods follow relations both ways up to the depth and are paginated nearest first"""
+    store = KnowledgeGraphStore(db_session.session)
+    store.merge_document('upload', 'job-1', _concepts(edges=[
+        ('mitosis', 'produces', 'daughter cells'), ('spindle', 'separates', 'chromosomes'),
+        ('mitosis', 'requires', 'spindle'), ('daughter cells', 'inherit', 'genes')]), user_id=test_user.id)
+
+    first = store.neighbourhood('Mitosis', user_id=test_user.id, depth=1)
+    assert [node['key'] for node in first['nodes']] == ['mitosis', 'daughter cell', 'spindle']
+    assert [node['distance'] for node in first['nodes']] == [0, 1, 1]
+    assert len(first['edges']) == 2
+
+    deeper = store.neighbourhood('mitosis', user_id=test_user.id, depth=2, page=2, per_page=2)
+    assert deeper['total'] == 5
+    assert [node['key'] for node in deeper['nodes']] == ['spindle', 'chromosome']
+    assert store.neighbourhood('mitosis', user_id=test_user.id + 1)['total'] == 0
+
+
+def test_to_networkx_exports_subgraphs(db_session, test_user):
+    """Exports hold the stored attributes and keep parallel relations apart"""
+    store = KnowledgeGraphStore(db_session.session)
+    store.merge_document('upload', 'job-1', _concepts(edges=[
+        ('enzyme', 'binds', 'substrate'), ('enzyme', 'converts', 'substrate'), ('substrate', 'becomes', 'product')]),
+        user_id=test_user.id)
+
+    whole = store.to_networkx(user_id=test_user.id)
+    assert whole.number_of_nodes() == 3 and whole.number_of_edges() == 3
+    subgraph = store.to_networkx('enzyme', user_id=test_user.id, depth=1)
+    assert sorted(data['label'] for _, data in subgraph.nodes(data=True)) == ['enzyme', 'substrate']
+    assert sorted(key for _, _, key in subgraph.edges(keys=True)) == ['binds', 'converts']
+
+
+def test_large_documents_are_merged_in_batches(db_session, test_user, monkeypatch):
+    """Relations between many nodes are looked up a batch of ids at a time"""
+    from src.services import knowledge_graph_store
+    monkeypatch.setattr(knowledge_graph_store, '_IN_BATCH', 3)
+    store = KnowledgeGraphStore(db_session.session)
+    edges = [(f"hub {i}", 'links', f"leaf {j}") for i in range(4) for j in range(4)]
+    store.merge_document('upload', 'job-1', _concepts(edges=edges), user_id=test_user.id)
+    store.merge_document('upload', 'job-2', _concepts(edges=edges[:5]), user_id=test_user.id)
+
+    assert KnowledgeNode.query.count() == 8
+    assert sorted(edge.weight for edge in KnowledgeEdge.query) == [1] * 11 + [2] * 5
+
+
+def test_concurrent_merge_of_a_document_is_rolled_back(db_session, test_user, monkeypatch):
+    """A merge that loses the race to store a document is rolled back and reported as merged before"""
+    store = KnowledgeGraphStore(db_session.session)
+    concepts = _concepts(edges=[('cell', 'contains', 'nucleus')])
+    store.merge_document('upload', 'job-1', concepts, user_id=test_user.id)
+
+    # The other merge committed after this one checked for the document
+    checks = []
+    merged = store._is_merged
+
+    def missed_first_check(*args):
+        checks.append(args)
+        return len(checks) > 1 and merged(*args)
+
+    monkeypatch.setattr(store, '_is_merged', missed_first_check)
+    assert not store.merge_document('upload', 'job-1', concepts, user_id=test_user.id)
+
+    assert len(checks) == 2
+    assert KnowledgeEdge.query.one().weight == 1
+    assert KnowledgeNode.query.filter_by(key='cell').one().document_count == 1
@@ -0,0 +1,47 @@
+"""Tests for character n-gram language detection"""
+from src.services.language_detector import LanguageDetector, summarize_detections
+
+ENGLISH = ("Photosynthesis is the process plants use to turn light energy into chemical energy. "
+           "It takes place in the chloroplasts, which contain the green pigment chlorophyll. ")
+ROMANIAN = ("Fotosinteza este procesul prin care plantele transformă energia luminoasă în energie chimică. "
+            "Ea are loc în cloroplaste, care conțin pigmentul verde numit clorofilă. ")
+
+def test_detects_language_with_confidence():
+    """Test that English and Romanian text are told apart, with or without diacritics"""
+    detector = LanguageDetector(enabled=True)
+
+    english = detector.detect(ENGLISH)
+    assert english.language == 'en' and english.confidence > 0.9
+    assert detector.detect(ROMANIAN).language == 'ro'
+    assert detector.detect("Studentii trebuie sa invete pentru examenul de la sfarsitul semestrului.").language == 'ro'
+
+def test_wrong_hint_is_overridden_but_used_when_unsure():
+    """Test that the requested language only decides when the text cannot"""
+    detector = LanguageDetector(enabled=True)
+
+    assert detector.detect(ROMANIAN, 'en').language == 'ro'
+    short = detector.detect('ADN', 'ro')
+    assert (short.language, short.confidence) == ('ro', 0.0)
+    assert LanguageDetector(enabled=False).detect(ROMANIAN, 'en').language == 'en'
+
+def test_mixed_document_is_split_into_language_runs():
+    """Test that consecutive paragraphs in one language are grouped, and short ones stay with their run"""
+    detector = LanguageDetector(enabled=True)
+    text = '\n'.join([ENGLISH * 2, ENGLISH * 2, 'Figure 1.', ROMANIAN * 2, ROMANIAN * 2])
+
+    segments = detector.segments(text)
+
+    assert [detection.language for _, detection in segments] == ['en', 'ro']
+    assert segments[0][0].endswith('Figure 1.')
+    report = summarize_detections([(len(segment), detection) for segment, detection in segments])
+    assert report['language'] == 'en'
+    assert [segment['language'] for segment in report['segments']] == ['en', 'ro']
+
+def test_single_language_document_is_one_segment():
+    """Test that a document in one language is routed whole"""
+    text = '\n'.join([ENGLISH * 2] * 3)
+
+    segments = LanguageDetector(enabled=True).segments(text, 'ro')
+
+    assert len(segments) == 1
+    assert segments[0][0] == text and segments[0][1].language == 'en'
@@ -0,0 +1,57 @@
+"""Tests for micro-batched inference"""
+import threading
+import pytest
+from src.services.micro_batcher import MicroBatcher
+
+class FakeModel:
+    """Records the batches it runs; 'summarizes' an item by upper-casing it"""
+
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, key, items):
+        self.batches.append((key, list(items)))
+        return [item.upper() for item in items]
+
+def test_large_request_is_split_into_full_batches():
+    """Test that one request's chunks go out in batches of the configured size"""
+    model = FakeModel()
+    batcher = MicroBatcher(model, max_batch_size=4, max_wait_ms=5)
+
+    results = batcher.map('en', [f"chunk {n}" for n in range(10)])
+
+    assert results == [f"CHUNK {n}" for n in range(10)]
+    assert [len(items) for _, items in model.batches] == [4, 4, 2]
+    assert batcher.stats()['mean_batch_size'] == pytest.approx(10 / 3)
+
+def test_concurrent_requests_share_a_batch():
+    """Test that chunks from requests arriving within the window are merged, per key"""
+    model = FakeModel()
+    batcher = MicroBatcher(model, max_batch_size=8, max_wait_ms=200)
+    results = {}
+    start = threading.Barrier(3)
+
+    def request(name, key):
+        start.wait()
+        results[name] = batcher.map(key, [f"{name} a", f"{name} b"])
+
+    threads = [threading.Thread(target=request, args=args)
+               for args in (('alice', 'en'), ('bob', 'en'), ('carol', 'ro'))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results['bob'] == ['BOB A', 'BOB B']
+    assert sorted((key, len(items)) for key, items in model.batches) == [('en', 4), ('ro', 2)]
+
+def test_failed_batch_fails_its_items():
+    """Test that an exception in the model reaches every caller in the batch"""
+    def broken(key, items):
+        raise RuntimeError("out of memory")
+
+    batcher = MicroBatcher(broken, max_batch_size=2, max_wait_ms=1)
+
+    with pytest.raises(RuntimeError, match="out of memory"):
+        batcher.map('en', ['a', 'b', 'c'])
+    assert batcher.stats()['batches'] >= 1
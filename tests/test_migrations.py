@@ -0,0 +1,50 @@
+"""Tests for the Alembic migrations"""
+import os
+import pytest
+import sqlalchemy as sa
+from alembic import command
+from alembic.config import Config
+
+MIGRATIONS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+
+
+@pytest.fixture
+def alembic_config(tmp_path, monkeypatch):
+    """Alembic config pointed at an empty SQLite file"""
+    from src import app
+    url = f"sqlite:///{tmp_path / 'migrations.db'}"
+    monkeypatch.setitem(app.config, 'SQLALCHEMY_DATABASE_URI', url)
+    # No ini file, so running the migrations leaves the test logging setup alone
+    config = Config()
+    config.set_main_option('script_location', MIGRATIONS)
+    return config, sa.create_engine(url)
+
+
+def test_upgrade_and_downgrade_on_empty_database(alembic_config):
+    """Test that every migration applies to an empty database and reverts cleanly"""
+    config, engine = alembic_config
+
+    command.upgrade(config, 'head')
+    columns = {column['name']: column for column in sa.inspect(engine).get_columns('analysis_results')}
+    for name in ('user_id', 'analysis_type', 'title', 'cache_key', 'last_accessed_at'):
+        assert name in columns
+    assert columns['upload_id']['nullable']
+
+    command.downgrade(config, 'base')
+    assert sa.inspect(engine).get_table_names() == ['alembic_version']
+
+
+def test_downgrade_drops_cache_entries(alembic_config):
+    """Test that downgrading past the cache migration removes rows without an upload"""
+    config, engine = alembic_config
+    command.upgrade(config, 'head')
+    with engine.begin() as conn:
+        conn.execute(sa.text("INSERT INTO analysis_results (analysis_type, title, cache_key) "
+                             "VALUES ('content_analysis', 'Cells', 'abc')"))
+
+    command.downgrade(config, 'cfb74efa71cc')
+    with engine.connect() as conn:
+        assert conn.execute(sa.text("SELECT COUNT(*) FROM analysis_results")).scalar() == 0
+    columns = {column['name']: column for column in sa.inspect(engine).get_columns('analysis_results')}
+    assert 'user_id' not in columns
+    assert not columns['upload_id']['nullable']
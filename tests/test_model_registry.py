@@ -0,0 +1,109 @@
+"""Tests for the shared model registry"""
+import threading
+import time
+import pytest
+from src.services.model_registry import ModelRegistry, language_key
+
+
+@pytest.fixture
+def registry():
+    registry = ModelRegistry()
+    registry.loads = []
+
+    def load_model():
+        registry.loads.append(1)
+        time.sleep(0.05)
+        return bytearray(8 * 1024 * 1024)
+
+    registry.register('model:en', load_model)
+    return registry
+
+
+def test_models_load_lazily(registry):
+    """Test that nothing is loaded until a model is first requested"""
+    assert not registry.is_loaded('model:en')
+    assert registry.loads == []
+
+    model = registry.get('model:en')
+    assert registry.is_loaded('model:en')
+    assert registry.get('model:en') is model
+
+
+def test_concurrent_requests_load_once(registry):
+    """Test that concurrent first requests share a single load"""
+    threads = [threading.Thread(target=registry.get, args=('model:en',)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(registry.loads) == 1
+
+
+def test_memory_report(registry):
+    """Test that loaded models report their resident memory and usage"""
+    registry.get('model:en')
+    report = registry.memory_report()
+
+    model = report['models'][0]
+    assert model['name'] == 'model:en'
+    assert model['loaded'] is True
+    assert model['use_count'] == 1
+    assert model['load_seconds'] > 0
+    assert report['process_rss_bytes'] > 0
+
+
+def test_unload_idle_models(registry):
+    """Test that idle models are unloaded and reload on next use"""
+    registry.get('model:en')
+    assert registry.unload_idle(3600) == []
+
+    time.sleep(0.01)
+    assert registry.unload_idle(0) == ['model:en']
+    assert not registry.is_loaded('model:en')
+
+    registry.get('model:en')
+    assert len(registry.loads) == 2
+
+
+def test_load_in_background(registry):
+    """Test that a background load runs once, off the calling thread"""
+    registry.load_in_background('model:en')
+    registry.load_in_background('model:en')
+    for thread in list(registry._loading.values()):
+        thread.join()
+
+    assert registry.is_loaded('model:en')
+    assert len(registry.loads) == 1
+    registry.load_in_background('model:en')
+    assert registry._loading == {}
+
+
+def test_unknown_model(registry):
+    """Test requesting a model that was never registered"""
+    with pytest.raises(KeyError):
+        registry.get('missing')
+
+
+def test_language_key():
+    """Test that non-English languages use the Romanian model set"""
+    assert language_key('en') == 'en'
+    assert language_key('ro') == 'ro'
+
+
+def test_unload_endpoint(client, monkeypatch):
+    """Test that unloading requires a signed-in user and a valid request"""
+    from src.routes import system
+    from src.routes.auth import auth_service
+    monkeypatch.setattr(auth_service, 'validate_token', lambda token: object())
+    monkeypatch.setattr(system.model_registry, 'unload_idle', lambda seconds: [f"idle:{seconds:g}"])
+    headers = {'Authorization': 'Bearer token'}
+
+    assert client.post('/api/system/models/unload', json={'idle_seconds': 0}).status_code == 401
+    for body in ({}, 'name', {'idle_seconds': 'soon'}, {'idle_seconds': -1}, {'idle_seconds': None},
+                 {'name': ['spacy:en']}):
+        assert client.post('/api/system/models/unload', json=body, headers=headers).status_code == 400
+
+    response = client.post('/api/system/models/unload', json={'idle_seconds': '600'}, headers=headers)
+    assert response.status_code == 200
+    assert response.json == {'unloaded': ['idle:600']}
@@ -0,0 +1,58 @@
+"""Tests for page-level OCR"""
+import random
+import time
+import pytest
+from src.services import ocr
+from src.services.ocr import PageOCR
+from src.services.workload_pools import WorkloadPool
+
+@pytest.fixture
+def page_ocr(monkeypatch):
+    """PageOCR running fake OCR on a thread pool"""
+    ocr_calls = []
+
+    def fake_ocr_page(file_path, page_number, dpi, languages):
+        ocr_calls.append(page_number)
+        time.sleep(random.uniform(0, 0.02))  # Finish out of order
+        return f"ocr page {page_number}"
+
+    monkeypatch.setattr(ocr, '_ocr_pdf_page', fake_ocr_page)
+    instance = PageOCR(dpi=150, min_text_chars=10, pool=WorkloadPool('ocr', workers=3))
+    instance.ocr_calls = ocr_calls
+    yield instance
+    instance.shutdown()
+
+def test_pdf_pages_stream_in_order(page_ocr):
+    """Test that OCR results come back in page order regardless of completion order"""
+    pages = list(page_ocr.iter_pdf('scan.pdf', [''] * 12))
+
+    assert [text for text, _ in pages] == [f"ocr page {n}" for n in range(1, 13)]
+    assert all(ocr_used for _, ocr_used in pages)
+
+def test_pages_with_text_layer_skip_ocr(page_ocr):
+    """Test that only pages without a usable text layer are OCRed"""
+    text_layers = ['Typed page with plenty of text', '', '  \n', 'Another typed page of text']
+
+    pages = list(page_ocr.iter_pdf('mixed.pdf', text_layers))
+
+    assert pages == [
+        ('Typed page with plenty of text', False),
+        ('ocr page 2', True),
+        ('ocr page 3', True),
+        ('Another typed page of text', False)
+    ]
+    assert sorted(page_ocr.ocr_calls) == [2, 3]
+
+def test_pages_in_flight_are_bounded(page_ocr):
+    """Test that pages are submitted lazily rather than all at once"""
+    submitted = []
+
+    def text_layers():
+        for n in range(20):
+            submitted.append(n)
+            yield ''
+
+    stream = page_ocr.iter_pdf('scan.pdf', text_layers())
+    next(stream)
+
+    assert len(submitted) <= page_ocr.workers * 2 + 1
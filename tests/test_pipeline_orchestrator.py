@@ -0,0 +1,150 @@
+"""Tests for the pipeline stage orchestrator"""
+import time
+import pytest
+from src.services.pipeline_orchestrator import PipelineOrchestrator, Stage
+
+
+def slow_value(value, delay):
+    time.sleep(delay)
+    return value
+
+
+def fail(message):
+    raise RuntimeError(message)
+
+
+def double(value):
+    return value * 2
+
+
+@pytest.fixture
+def orchestrator():
+    orchestrator = PipelineOrchestrator(executor='thread', max_workers=4, default_timeout=5)
+    yield orchestrator
+    orchestrator.shutdown()
+
+
+def test_stages_run_concurrently(orchestrator):
+    """Test that latency is close to the slowest stage rather than the sum"""
+    started = time.monotonic()
+    results, errors = orchestrator.run([
+        Stage(name, slow_value, (name, 0.2)) for name in ('a', 'b', 'c', 'd')
+    ])
+
+    assert time.monotonic() - started < 0.6
+    assert results == {'a': 'a', 'b': 'b', 'c': 'c', 'd': 'd'}
+    assert errors == {}
+
+
+def test_failed_stage_returns_partial_results(orchestrator):
+    """Test that one failing stage does not discard the others"""
+    results, errors = orchestrator.run([
+        Stage('ok', slow_value, (1, 0)),
+        Stage('broken', fail, ('model crashed',))
+    ])
+
+    assert results == {'ok': 1}
+    assert errors == {'broken': 'model crashed'}
+
+
+def test_stage_timeout(orchestrator):
+    """Test that a stage exceeding its timeout is reported as an error"""
+    results, errors = orchestrator.run([
+        Stage('fast', slow_value, (1, 0)),
+        Stage('slow', slow_value, (2, 1), timeout=0.1)
+    ])
+
+    assert results == {'fast': 1}
+    assert 'timed out' in errors['slow']
+
+
+def test_dependent_stages(orchestrator):
+    """Test that dependent stages receive their dependency's result"""
+    results, errors = orchestrator.run([
+        Stage('base', slow_value, (21, 0.05)),
+        Stage('derived', double, depends_on='base'),
+        Stage('broken', fail, ('boom',)),
+        Stage('after_broken', double, depends_on='broken')
+    ])
+
+    assert results == {'base': 21, 'derived': 42}
+    assert errors['broken'] == 'boom'
+    assert 'after_broken' in errors
+
+
+def test_unknown_executor():
+    """Test that an unknown executor type is rejected"""
+    with pytest.raises(ValueError):
+        PipelineOrchestrator(executor='gpu')
+
+
+def test_stage_timeout_excludes_queue_wait():
+    """Test that time spent waiting for a free worker does not count against a stage's timeout"""
+    orchestrator = PipelineOrchestrator(executor='thread', max_workers=1, default_timeout=5)
+    try:
+        results, errors = orchestrator.run([
+            Stage('first', slow_value, (1, 0.3)),
+            Stage('queued', slow_value, (2, 0.05), timeout=0.2)
+        ])
+    finally:
+        orchestrator.shutdown()
+
+    assert errors == {}
+    assert results == {'first': 1, 'queued': 2}
+
+
+class RecordingJob:
+    """Job stand-in recording when each stage is reported started and how it ended"""
+
+    def __init__(self):
+        self.events = []
+
+    def stage(self, name):
+        job = self
+
+        class Context:
+            def __enter__(self):
+                job.events.append(('start', name, time.monotonic()))
+
+            def __exit__(self, exc_type, exc, tb):
+                job.events.append(('fail' if exc else 'finish', name, time.monotonic()))
+
+        return Context()
+
+
+def test_queued_stage_fails_after_queue_timeout():
+    """Test that a stage stuck behind a hung one fails instead of waiting for a worker forever"""
+    orchestrator = PipelineOrchestrator(executor='thread', max_workers=1, default_timeout=5, queue_timeout=0.1)
+    job = RecordingJob()
+    started = time.monotonic()
+    try:
+        results, errors = orchestrator.run([
+            Stage('hung', slow_value, (1, 0.6), timeout=0.2),
+            Stage('queued', slow_value, (2, 0))
+        ], job=job)
+    finally:
+        orchestrator.shutdown()
+
+    assert results == {}
+    assert 'timed out' in errors['hung']
+    assert 'waited more than 0.1s for a worker' in errors['queued']
+    assert time.monotonic() - started < 0.5
+    assert [(event, name) for event, name, _ in job.events if name == 'queued'] == [('start', 'queued'),
+                                                                                    ('fail', 'queued')]
+
+
+def test_stage_reported_running_when_picked_up():
+    """Test that a stage waiting for a worker is not reported to the job as running"""
+    orchestrator = PipelineOrchestrator(executor='thread', max_workers=1, default_timeout=5)
+    job = RecordingJob()
+    try:
+        results, errors = orchestrator.run([
+            Stage('first', slow_value, (1, 0.2)),
+            Stage('second', slow_value, (2, 0))
+        ], job=job)
+    finally:
+        orchestrator.shutdown()
+
+    assert errors == {}
+    times = {(event, name): at for event, name, at in job.events}
+    assert times[('start', 'second')] - times[('start', 'first')] >= 0.15
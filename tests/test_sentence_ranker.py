@@ -0,0 +1,57 @@
+"""Tests for sparse extractive sentence ranking"""
+import time
+import numpy as np
+from src.services.sentence_ranker import (frequency_scores, select_sentences, sentence_term_matrix,
+                                          textrank_scores)
+
+def _matrix(sentences):
+    """Sentence-term matrix of whitespace-separated sentences, with their lengths"""
+    sentence_ids = [i for i, sentence in enumerate(sentences) for _ in sentence.split()]
+    term_ids = [hash(word) for sentence in sentences for word in sentence.split()]
+    lengths = np.array([len(sentence.split()) for sentence in sentences])
+    return sentence_term_matrix(sentence_ids, term_ids, len(sentences)), lengths
+
+def test_frequency_scores_favor_frequent_terms():
+    """Test that sentences made of the document's frequent terms score highest"""
+    matrix, lengths = _matrix(['cell division cell', 'cell membrane', 'weather today'])
+
+    scores = frequency_scores(matrix, lengths)
+
+    assert matrix.shape == (3, 5)
+    assert scores[0] > scores[1] > scores[2]
+    assert select_sentences(scores, 2) == [0, 1]
+
+def test_textrank_favors_central_sentences():
+    """Test that the sentence most similar to the others ranks first"""
+    matrix, _ = _matrix(['mitosis cells', 'mitosis cells nucleus', 'cells nucleus', 'stock market prices'])
+
+    scores = textrank_scores(matrix)
+
+    assert abs(scores.sum() - 1) < 1e-6
+    assert int(np.argmax(scores)) == 1 and int(np.argmin(scores)) == 3
+
+def test_diversity_skips_near_duplicates():
+    """Test that maximal marginal relevance does not pick a repeated sentence twice"""
+    matrix, lengths = _matrix(['cell division cell', 'cell division cell cycle', 'membrane transport cell'])
+    scores = frequency_scores(matrix, lengths)
+
+    assert select_sentences(scores, 2)[:2] == [0, 1]
+    assert select_sentences(scores, 2, matrix, diversity=0.7) == [0, 2]
+
+def test_excluded_sentences_are_never_selected():
+    """Test that sentences with a non-finite score are skipped"""
+    assert select_sentences(np.array([1.0, -np.inf, 0.5]), 5) == [0, 2]
+
+def test_ranking_scales_to_large_documents():
+    """Test that tens of thousands of sentences are ranked in well under a few seconds"""
+    rng = np.random.default_rng(0)
+    num_sentences = 50000
+    sentence_ids = np.repeat(np.arange(num_sentences), 12)
+    term_ids = rng.zipf(1.3, len(sentence_ids)) % 20000
+    matrix = sentence_term_matrix(sentence_ids, term_ids, num_sentences)
+
+    started = time.perf_counter()
+    textrank_scores(matrix)
+    select_sentences(frequency_scores(matrix, np.full(num_sentences, 12)), 5, matrix, diversity=0.3)
+
+    assert time.perf_counter() - started < 5
@@ -1,13 +1,18 @@
 import pytest
 import os
+import zlib
+import numpy as np
 from src.services.concept_extractor import ConceptExtractor
 from src.services.visualizer import Visualizer
 from src.services.difficulty_assessor import DifficultyAssessor
 from src.services.summarizer import Summarizer
 from src.services.goal_service import GoalService
+from src.services.topic_clusterer import TopicClusterer
 from src.services.schedule_service import ScheduleService
 from src.services.analytics_service import AnalyticsService
+from src.services.analyzed_document import AnalyzedDocument
 from datetime import datetime, timedelta
+from types import SimpleNamespace
 
 # Sample text for testing
 SAMPLE_TEXT_EN = """
@@ -48,9 +53,17 @@ def difficulty_assessor():
 def summarizer():
     return Summarizer()
 
+class StubEncoder:
+    """Deterministic topic embeddings, so goal suggestions never download the encoder"""
+
+    def encode(self, texts):
+        vectors = np.array([np.random.default_rng(zlib.crc32(text.encode('utf-8'))).normal(size=16)
+                            for text in texts], dtype=np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
 @pytest.fixture
-def goal_service():
-    return GoalService()
+def goal_service(tmp_path):
+    return GoalService(topic_clusterer=TopicClusterer(str(tmp_path), encoder=StubEncoder()))
 
 @pytest.fixture
 def schedule_service():
@@ -140,6 +153,19 @@ def test_summarization(summarizer):
     assert ro_bullets['type'] == 'bullet_points'
     assert len(ro_bullets['points']) > 0
 
+def test_shared_document_analysis(concept_extractor, difficulty_assessor, summarizer):
+    """Test that services give the same results from one shared parse"""
+    document = AnalyzedDocument.parse(SAMPLE_TEXT_EN, 'en')
+    assert document.sentence_texts
+    assert document.word_frequencies['learning'] > 1
+
+    assert concept_extractor.extract_concepts_from_document(document) == \
+        concept_extractor.extract_concepts(SAMPLE_TEXT_EN, 'en')
+    assert difficulty_assessor.assess_document(document) == \
+        difficulty_assessor.assess_difficulty(SAMPLE_TEXT_EN, 'en')
+    assert summarizer.generate_summary_from_document(document, summary_type='bullet_points') == \
+        summarizer.generate_summary(SAMPLE_TEXT_EN, 'en', summary_type='bullet_points')
+
 # Phase 2 Service Tests
 
 def test_goal_creation(goal_service):
@@ -202,6 +228,61 @@ def test_analytics_dashboard(analytics_service):
     assert 'study_time' in dashboard
     assert all(key in dashboard['study_time'] for key in ['total_time', 'average_daily_time', 'time_by_type'])
 
+class FakeConceptIndex:
+    """Related concepts of each main topic, as the concept index would return them"""
+
+    def __init__(self, related):
+        self.related = related
+
+    def related_concepts(self, term, user_id=None, limit=10):
+        return [{'key': label.lower(), 'label': label} for label in self.related.get(term, [])][:limit]
+
+class AngleEncoder:
+    """Embed each topic as a unit vector at a fixed angle"""
+
+    def __init__(self, angles):
+        self.angles = angles
+
+    def encode(self, texts):
+        radians = np.radians([self.angles[text] for text in texts])
+        return np.stack([np.cos(radians), np.sin(radians)], axis=1).astype(np.float32)
+
+def _progress(*names):
+    return [SimpleNamespace(concept_name=name, user_id=1) for name in names]
+
+def test_goal_clusters_map_to_suggested_topics(tmp_path):
+    """Test that each cluster is named after its most central topic and lists its topics and new related concepts"""
+    angles = {'mitosis': 0, 'meiosis': 12, 'cell division': 5, 'French Revolution': 90, 'Napoleon': 85,
+              'photosynthesis': 45}
+    index = FakeConceptIndex({'cell division': ['Mitosis', 'Spindle', 'Chromosome'],
+                              'French Revolution': ['Bastille', 'Spindle']})
+    service = GoalService(db_session=object(), concept_index=index, topic_clusterer=TopicClusterer(
+        str(tmp_path), threshold=0.95, encoder=AngleEncoder(angles)))
+
+    clusters = service._cluster_related_topics(
+        _progress('mitosis', 'French Revolution', 'meiosis', 'Napoleon', 'cell division', 'photosynthesis'), limit=2)
+
+    assert clusters == [
+        {'main_topic': 'cell division', 'prerequisites': [],
+         'related_topics': ['cell division', 'mitosis', 'meiosis', 'Spindle', 'Chromosome']},
+        {'main_topic': 'French Revolution', 'prerequisites': [],
+         'related_topics': ['French Revolution', 'Napoleon', 'Bastille']}
+    ]
+
+def test_goal_clusters_do_not_wait_for_the_encoder(tmp_path, monkeypatch):
+    """Test that topics are their own clusters until the encoder, loading in the background, is ready"""
+    from src.services import topic_clusterer
+    loading = []
+    monkeypatch.setattr(topic_clusterer.model_registry, 'is_loaded', lambda name: False)
+    monkeypatch.setattr(topic_clusterer.model_registry, 'load_in_background', loading.append)
+    service = GoalService(db_session=object(), concept_index=FakeConceptIndex({}),
+                          topic_clusterer=TopicClusterer(str(tmp_path)))
+
+    clusters = service._cluster_related_topics(_progress('mitosis', 'Napoleon'))
+
+    assert [cluster['main_topic'] for cluster in clusters] == ['mitosis', 'Napoleon']
+    assert loading == ['topic-embedding']
+
 def test_goal_progress_tracking(goal_service):
     """Test goal progress tracking and updates"""
     # Create a test goal
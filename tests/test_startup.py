@@ -0,0 +1,70 @@
+"""Tests for application startup time"""
+import os
+import subprocess
+import sys
+import types
+import pytest
+from src.services.startup import StartupMonitor, parse_import_times
+from src.services.model_registry import model_registry
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must only be imported once analysis work actually starts
+HEAVY_MODULES = ('transformers', 'torch', 'spacy', 'sklearn', 'nltk', 'src.services.analysis_pipeline')
+
+COLD_START_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+from src import create_app
+app = create_app()
+response = app.test_client().get('/api/health')
+print(json.dumps({
+    'seconds': time.perf_counter() - started,
+    'status': response.status_code,
+    'heavy': [name for name in sys.argv[1:] if name in sys.modules]
+}))
+"""
+
+def test_cold_start_within_budget(tmp_path):
+    """Test that a fresh process can serve the health check within the startup budget"""
+    import json
+    budget = float(os.environ.get('STARTUP_BUDGET_SECONDS', 5))
+    env = dict(os.environ, STARTUP_MODE='lazy', JOB_QUEUE_PATH=str(tmp_path / 'jobs.db'))
+    completed = subprocess.run(
+        [sys.executable, '-c', COLD_START_SCRIPT, *HEAVY_MODULES],
+        cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, timeout=120
+    )
+    assert completed.returncode == 0, completed.stderr
+    report = json.loads(completed.stdout.strip().splitlines()[-1])
+
+    assert report['status'] == 200
+    assert report['heavy'] == []
+    assert report['seconds'] < budget, f"Cold start took {report['seconds']:.2f}s (budget {budget}s)"
+
+def test_parse_import_times():
+    """Test parsing of python -X importtime output"""
+    output = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       120 |        120 |   flask.json\n"
+        "import time:      3000 |       5000 | flask\n"
+    )
+    modules = parse_import_times(output)
+
+    assert [m['module'] for m in modules] == ['flask.json', 'flask']
+    assert modules[1]['self_seconds'] == pytest.approx(0.003)
+    assert modules[1]['cumulative_seconds'] == pytest.approx(0.005)
+
+def test_warm_up_loads_models(monkeypatch):
+    """Test that warm-up loads the requested models and records its state"""
+    # Keep the real analysis stack out of this test; only the model loading is checked
+    pipeline_module = types.ModuleType('src.services.analysis_pipeline')
+    pipeline_module.get_pipeline = lambda: None
+    monkeypatch.setitem(sys.modules, 'src.services.analysis_pipeline', pipeline_module)
+    model_registry.register('test:warmup', lambda: object())
+    monitor = StartupMonitor()
+
+    monitor.warm_up(['test:warmup'])
+
+    assert monitor.warmup['state'] == 'finished'
+    assert model_registry.is_loaded('test:warmup')
+    model_registry.unload('test:warmup')
@@ -0,0 +1,98 @@
+"""Tests for hierarchical paragraph summaries"""
+import pytest
+from src.services import summarizer as summarizer_module
+from src.services.model_registry import model_registry
+from src.services.summarizer import Summarizer, SummaryCache
+
+class WordTokenizer:
+    """Stand-in tokenizer: one token per word, 100-token inputs"""
+    model_max_length = 100
+
+    def num_special_tokens_to_add(self):
+        return 2
+
+    def __call__(self, texts, add_special_tokens=False):
+        return {'input_ids': [text.split() for text in texts]}
+
+@pytest.fixture
+def fake_model(monkeypatch):
+    """Summarization model that keeps the first words of each input, recording its calls"""
+    calls = []
+
+    def summarize(chunks, max_length, min_length, **kwargs):
+        calls.append((len(chunks), max_length))
+        return [{'summary_text': ' '.join(chunk.split()[:20])} for chunk in chunks]
+
+    monkeypatch.setitem(model_registry._models, 'summarization:en', summarize)
+    monkeypatch.setitem(model_registry._models, 'summarization-tokenizer:en', WordTokenizer())
+    monkeypatch.setattr(summarizer_module, 'summary_cache', SummaryCache())
+    return calls
+
+def test_long_document_is_reduced_level_by_level(fake_model):
+    """Test that chunk summaries are summarized again until one pass gives the summary"""
+    sentences = [f"Sentence {n} explains how cells divide during mitosis." for n in range(200)]
+
+    summary = Summarizer()._generate_paragraph_summary(' '.join(sentences), 'en', max_length=60,
+                                                        sentences=sentences)
+
+    chunks = [level['chunks'] for level in summary['levels']]
+    assert chunks[0] == summary['chunking']['chunks'] > 1
+    assert chunks == sorted(chunks, reverse=True) and chunks[-1] == 1
+    assert len(summary['summary'].split()) <= 20
+    assert fake_model[-1] == (1, 60)
+
+def test_intermediate_levels_are_reused(fake_model):
+    """Test that asking for another length only reruns the final pass"""
+    sentences = [f"Sentence {n} explains how cells divide during mitosis." for n in range(200)]
+    summarizer = Summarizer()
+    summarizer._generate_paragraph_summary(' '.join(sentences), 'en', max_length=60, sentences=sentences)
+    fake_model.clear()
+
+    summarizer._generate_paragraph_summary(' '.join(sentences), 'en', max_length=30, sentences=sentences)
+
+    assert fake_model == [(1, 30)]
+
+def test_first_level_is_not_summarized_twice(fake_model, monkeypatch):
+    """Test that the reduction reuses the chunk summaries even when the cache keeps nothing"""
+    sentences = [f"Sentence {n} explains how cells divide during mitosis." for n in range(200)]
+    Summarizer()._generate_paragraph_summary(' '.join(sentences), 'en', max_length=60, sentences=sentences)
+    summarized = sum(count for count, _ in fake_model)
+    fake_model.clear()
+    monkeypatch.setattr(summarizer_module, 'summary_cache', SummaryCache(max_entries=1))
+
+    Summarizer()._generate_paragraph_summary(' '.join(sentences), 'en', max_length=60, sentences=sentences)
+
+    assert sum(count for count, _ in fake_model) == summarized
+
+def test_stream_yields_chunks_before_the_summary(fake_model, monkeypatch):
+    """Test that each chunk summary and the bullet points are streamed before the final summary"""
+    sentences = [f"Sentence {n} explains how cells divide during mitosis." for n in range(200)]
+    summarizer = Summarizer()
+    monkeypatch.setattr(summarizer, '_generate_bullet_points', lambda text, language: {'points': ['Cells divide']})
+    monkeypatch.setattr(summarizer_module, 'sent_tokenize', lambda text: sentences)
+
+    events = list(summarizer.iter_summary(' '.join(sentences), 'en', max_length=60))
+
+    names = [name for name, _ in events]
+    chunks = [data for name, data in events if name == 'chunk']
+    assert names[0] == 'chunking' and names[-1] == 'summary'
+    assert sorted(chunk['index'] for chunk in chunks) == list(range(events[0][1]['chunks']))
+    assert names.index('paragraph') > max(i for i, name in enumerate(names) if name == 'chunk')
+    assert events[-1][1]['bullet_points'] == {'points': ['Cells divide']}
+    assert events[-1][1]['paragraph'] == dict(events)['paragraph']
+
+@pytest.mark.parametrize('ranking', ['frequency', 'textrank'])
+def test_bullet_points_skip_repeated_sentences(ranking):
+    """Test that bullet points come from the document's sentences, each at most once"""
+    import spacy
+    from src.services.analyzed_document import AnalyzedDocument
+    nlp = spacy.blank('en')
+    nlp.add_pipe('sentencizer')
+    text = ("Cells divide by mitosis. Cells divide by mitosis. Mitosis produces two cells. "
+            "The nucleus holds the genome. It is raining today.")
+
+    points = Summarizer()._bullet_points_from_document(AnalyzedDocument(text, 'en', nlp(text)), num_points=3,
+                                                       ranking=ranking)['points']
+
+    assert len(points) == 3 == len(set(points))
+    assert 'Cells divide by mitosis.' in points
@@ -0,0 +1,78 @@
+"""Tests for single-pass term and definition matching"""
+import gc
+import re
+import time
+import weakref
+import pytest
+import spacy
+from src.services import term_matcher
+from src.services.term_matcher import TermMatcher, match_terms
+
+@pytest.fixture(scope='module')
+def nlp():
+    nlp = spacy.blank('en')
+    nlp.add_pipe('sentencizer')
+    return nlp
+
+def test_finds_terms_like_the_patterns_it_replaces(nlp):
+    """Test that capitalized, acronym and suffix terms match the former regular expressions"""
+    text = "The NASA team studied Biology and JavaScript. Its development required HTTP and USA support."
+
+    matches = TermMatcher(nlp.vocab).match(nlp(text))
+
+    assert matches['technical'] == re.findall(r'\b[A-Z][a-z]+(?:[A-Z][a-z]+)*\b', text)
+    assert matches['acronyms'] == re.findall(r'\b[A-Z]{2,}\b', text)
+    assert matches['suffix_terms'] == re.findall(r'\b\w+(?:ology|ization|isation|ment)\b', text)
+
+def test_one_definition_per_sentence(nlp):
+    """Test that each sentence's first linking phrase splits it into term and definition"""
+    text = ("A cell is the smallest unit of life. Osmosis is defined as the movement of water. "
+            "Entropy refers to disorder. This sentence has no definition")
+
+    definitions = TermMatcher(nlp.vocab).match(nlp(text))['definitions']
+
+    assert definitions == [
+        {'term': 'A cell', 'definition': 'the smallest unit of life.'},
+        {'term': 'Osmosis', 'definition': 'the movement of water.'},
+        {'term': 'Entropy', 'definition': 'disorder.'}
+    ]
+
+def test_romanian_definitions(nlp):
+    """Test that Romanian linking phrases are used for Romanian documents"""
+    text = "Mitoza este diviziunea nucleului celulei."
+
+    definitions = TermMatcher(nlp.vocab, 'ro').match(nlp(text))['definitions']
+
+    assert definitions == [{'term': 'Mitoza', 'definition': 'diviziunea nucleului celulei.'}]
+
+def test_pathological_input_is_linear(nlp):
+    """Test that text without sentence ends, which made the lazy definition regexes backtrack, stays fast"""
+    matcher = TermMatcher(nlp.vocab)
+    timings = []
+    for words in (20000, 80000):
+        text = ' '.join(['is', 'Term', 'means', 'x'] * (words // 4))
+        doc = nlp(text)
+        started = time.perf_counter()
+        matches = matcher.match(doc)
+        timings.append(time.perf_counter() - started)
+        assert matches['definitions'] == []
+
+    # Four times the text takes about four times as long, far from the sixteen of quadratic growth
+    assert timings[1] < 2
+    assert timings[1] < timings[0] * 10
+
+def test_matchers_are_released_with_their_pipeline():
+    """Test that a pipeline's matchers are reused and freed once the pipeline is unloaded"""
+    nlp = spacy.blank('en')
+    nlp.add_pipe('sentencizer')
+    assert match_terms(nlp("The NASA team"), 'en', nlp)['acronyms'] == ['NASA']
+    matcher = term_matcher._matchers[nlp]['en']
+    match_terms(nlp("Its HTTP support"), 'en', nlp)
+    assert term_matcher._matchers[nlp]['en'] is matcher
+
+    released = weakref.ref(nlp)
+    pipelines = len(term_matcher._matchers)
+    del nlp, matcher
+    gc.collect()
+    assert released() is None
+    assert len(term_matcher._matchers) == pipelines - 1
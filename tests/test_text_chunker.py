@@ -0,0 +1,43 @@
+"""Tests for token-aware sentence chunking"""
+import pytest
+from src.services.text_chunker import SentenceChunker
+
+def count_words(texts):
+    """Stand-in tokenizer: one token per word"""
+    return [len(text.split()) for text in texts]
+
+def sentence(n, words):
+    return ' '.join([f"s{n}"] * words) + '.'
+
+def test_packs_whole_sentences_up_to_budget():
+    """Test that chunks hold as many whole sentences as fit"""
+    chunker = SentenceChunker(count_words, max_tokens=10)
+    sentences = [sentence(1, 4), sentence(2, 4), sentence(3, 4), sentence(4, 2)]
+
+    chunks, stats = chunker.chunk(sentences)
+
+    assert chunks == [f"{sentences[0]} {sentences[1]}", f"{sentences[2]} {sentences[3]}"]
+    assert stats.to_dict()['chunks'] == 2
+    assert stats.to_dict()['fill_ratio'] == pytest.approx(0.7)
+    assert stats.split_sentences == 0
+
+def test_overlap_repeats_trailing_sentences():
+    """Test that each chunk starts with the previous chunk's last sentences"""
+    chunker = SentenceChunker(count_words, max_tokens=10, overlap_tokens=3)
+    sentences = [sentence(n, 3) for n in range(1, 6)]
+
+    chunks, stats = chunker.chunk(sentences)
+
+    assert chunks == [' '.join(sentences[0:3]), ' '.join(sentences[2:5])]
+    assert stats.overlap_tokens == 3
+
+def test_overlong_sentence_is_split_on_words():
+    """Test that only a sentence larger than the budget is cut"""
+    chunker = SentenceChunker(count_words, max_tokens=4)
+
+    chunks, stats = chunker.chunk([sentence(1, 9), sentence(2, 2)])
+
+    # The tail of the long sentence shares a chunk with the next one
+    assert [len(chunk.split()) for chunk in chunks] == [4, 4, 3]
+    assert stats.split_sentences == 1
+    assert stats.largest_chunk <= 4
@@ -0,0 +1,82 @@
+"""Tests for the incremental semantic topic clusterer"""
+import math
+import time
+
+import numpy as np
+
+from src.services.topic_clusterer import TopicClusterer
+
+
+class AngleEncoder:
+    """Embed each topic as a unit vector at a fixed angle, recording what was encoded"""
+
+    def __init__(self, angles):
+        self.angles = angles
+        self.encoded = []
+
+    def encode(self, texts):
+        self.encoded.extend(texts)
+        return np.array([[math.cos(math.radians(self.angles[text])), math.sin(math.radians(self.angles[text]))]
+                         for text in texts], dtype=np.float32)
+
+
+ANGLES = {'mitosis': 0, 'meiosis': 12, 'cell division': 5, 'French Revolution': 90, 'Napoleon': 85,
+          'photosynthesis': 45}
+
+
+def test_similar_topics_share_a_cluster(tmp_path):
+    """Topics close in meaning are grouped, largest group first and its most central topic first"""
+    clusterer = TopicClusterer(str(tmp_path), threshold=0.95, encoder=AngleEncoder(ANGLES))
+    clusters = clusterer.clusters(1, ['mitosis', 'French Revolution', 'meiosis', 'Napoleon', 'cell division',
+                                      'photosynthesis'])
+
+    assert clusters == [['cell division', 'mitosis', 'meiosis'], ['french revolution', 'napoleon'],
+                        ['photosynthesis']]
+
+
+def test_only_new_topics_are_embedded(tmp_path):
+    """The per-user cache survives new clusterer instances and only new topics are embedded"""
+    encoder = AngleEncoder(ANGLES)
+    TopicClusterer(str(tmp_path), threshold=0.95, encoder=encoder).clusters(1, ['mitosis', 'Napoleon'])
+    clusterer = TopicClusterer(str(tmp_path), threshold=0.95, encoder=encoder)
+
+    clusters = clusterer.clusters(1, ['mitosis', 'Napoleon', 'meiosis'])
+    assert encoder.encoded == ['mitosis', 'Napoleon', 'meiosis']
+    assert [sorted(cluster) for cluster in clusters] == [['meiosis', 'mitosis'], ['napoleon']]
+    assert clusterer.clusters(2, ['meiosis']) == [['meiosis']]
+    assert encoder.encoded[-1] == 'meiosis'
+
+    # A cache built at another threshold is rebuilt
+    TopicClusterer(str(tmp_path), threshold=0.5, encoder=encoder).clusters(1, ['mitosis'])
+    assert encoder.encoded[-1] == 'mitosis'
+
+
+def test_removed_topics_leave_their_clusters(tmp_path):
+    """Removing a topic moves its cluster's centroid, which can merge it into a neighbour"""
+    angles = {'alpha': 0, 'beta': 40, 'gamma': 22}
+    clusterer = TopicClusterer(str(tmp_path), threshold=0.9, encoder=AngleEncoder(angles))
+
+    clusters = clusterer.clusters(1, ['alpha', 'beta', 'gamma'])
+    assert [sorted(cluster) for cluster in clusters] == [['beta', 'gamma'], ['alpha']]
+    assert sorted(clusterer.clusters(1, ['alpha', 'gamma'])[0]) == ['alpha', 'gamma']
+    assert clusterer.clusters(1, []) == []
+
+
+def test_cached_clustering_is_fast_for_thousands_of_topics(tmp_path):
+    """Clustering an unchanged set of thousands of topics is a cache read"""
+    rng = np.random.default_rng(0)
+    topics = [f"topic {i}" for i in range(3000)]
+    centers = rng.normal(size=(40, 384))
+    vectors = {topic: centers[i % 40] + rng.normal(scale=0.3, size=384) for i, topic in enumerate(topics)}
+
+    class RandomEncoder:
+        def encode(self, texts):
+            return np.array([vectors[text] / np.linalg.norm(vectors[text]) for text in texts], dtype=np.float32)
+
+    clusterer = TopicClusterer(str(tmp_path), threshold=0.6, encoder=RandomEncoder())
+    first = clusterer.clusters(1, topics)
+    assert len(first) == 40
+
+    started = time.perf_counter()
+    assert clusterer.clusters(1, topics) == first
+    assert time.perf_counter() - started < 0.05
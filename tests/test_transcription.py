@@ -0,0 +1,87 @@
+"""Tests for segmented audio transcription"""
+import threading
+import wave
+import numpy as np
+import pytest
+from src.services.transcription import SAMPLE_RATE, TranscriptionBackend, Transcriber
+from src.services.workload_pools import WorkloadPool
+
+class FakeBackend(TranscriptionBackend):
+    """Backend that 'recognizes' a segment by its length and prefers Romanian"""
+    name = 'fake'
+
+    def __init__(self):
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def transcribe(self, pcm, language):
+        with self.lock:
+            self.calls.append(language)
+        seconds = len(pcm) / (2 * SAMPLE_RATE)
+        return f"{language} {seconds:.1f}s", 0.9 if language == 'ro' else 0.4
+
+def write_wav(path, pattern):
+    """Write 16 kHz mono audio of (seconds, is_speech) parts"""
+    parts = []
+    for seconds, speech in pattern:
+        t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+        parts.append(np.sin(2 * np.pi * 440 * t) * 10000 if speech else np.zeros_like(t))
+    with wave.open(str(path), 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes(np.concatenate(parts).astype(np.int16).tobytes())
+
+@pytest.fixture
+def recording(tmp_path):
+    path = tmp_path / 'lecture.wav'
+    write_wav(path, [(1, True), (1, False), (2, True), (1, False), (1.5, True), (0.5, False)])
+    return str(path)
+
+def test_segments_with_timestamps(recording):
+    """Test that speech between silences becomes ordered, timestamped segments"""
+    backend = FakeBackend()
+    transcriber = Transcriber(backend=backend, pool=WorkloadPool('audio', workers=3), max_segment_seconds=2.5, min_silence_ms=500)
+
+    result = transcriber.transcribe(recording, language='en')
+
+    assert [(round(s['start']), round(s['end'])) for s in result['segments']] == [(0, 1), (2, 4), (5, 6)]
+    assert [s['index'] for s in result['segments']] == [0, 1, 2]
+    assert result['language'] == 'en'
+    assert backend.calls == ['en'] * 3
+
+def test_language_detected_once(recording):
+    """Test that only the first segment is tried in every candidate language"""
+    backend = FakeBackend()
+    transcriber = Transcriber(backend=backend, max_segment_seconds=2.5, min_silence_ms=500)
+    streamed = []
+
+    result = transcriber.transcribe(recording, on_segment=streamed.append)
+
+    assert result['language'] == 'ro'
+    assert sorted(backend.calls) == ['en', 'ro', 'ro', 'ro']
+    assert streamed == result['segments']
+    assert result['transcription'].startswith('ro 1.0s')
+
+def test_speech_across_window_boundary(tmp_path):
+    """Test that speech is not cut where one read window ends and the next begins"""
+    path = tmp_path / 'long.wav'
+    write_wav(path, [(1, False), (3, True), (1, False)])
+    transcriber = Transcriber(backend=FakeBackend(), max_segment_seconds=10, min_silence_ms=500,
+                              window_seconds=2)
+
+    segments = transcriber.transcribe(str(path), language='en')['segments']
+
+    assert len(segments) == 1
+    assert segments[0]['start'] == pytest.approx(1, abs=0.1)
+    assert segments[0]['end'] == pytest.approx(4, abs=0.1)
+
+def test_long_speech_is_split(tmp_path):
+    """Test that speech without pauses is split at the maximum segment length"""
+    path = tmp_path / 'monologue.wav'
+    write_wav(path, [(5, True)])
+    transcriber = Transcriber(backend=FakeBackend(), max_segment_seconds=2, min_silence_ms=500)
+
+    segments = transcriber.transcribe(str(path), language='en')['segments']
+
+    assert [s['text'] for s in segments] == ['en 2.0s', 'en 2.0s', 'en 1.0s']
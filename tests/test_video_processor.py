@@ -0,0 +1,45 @@
+"""Tests for lecture video processing"""
+import numpy as np
+import pytest
+from src.services import video_processor as video_module
+from src.services.video_processor import VideoProcessor, detect_keyframes, dhash, hamming_distance
+
+def slide(seed, size=(180, 320)):
+    """A synthetic slide: a random grid of coarse blocks"""
+    blocks = np.random.default_rng(seed).integers(0, 256, (9, 16), dtype=np.uint8)
+    gray = np.kron(blocks, np.ones((size[0] // 9, size[1] // 16), dtype=np.uint8))
+    return np.stack([gray] * 3, axis=-1)
+
+def test_dhash_is_robust_to_small_changes():
+    """Test that near-identical frames hash close together and different slides far apart"""
+    frame = slide(1)
+    noisy = np.clip(frame.astype(np.int16) + np.random.default_rng(0).integers(-3, 4, frame.shape), 0, 255)
+
+    assert hamming_distance(dhash(frame), dhash(noisy.astype(np.uint8))) <= 4
+    assert hamming_distance(dhash(frame), dhash(slide(2))) > 10
+
+def test_detect_keyframes_skips_repeated_slides():
+    """Test that each distinct slide is kept once, even when shown again later"""
+    timeline = [slide(1)] * 3 + [slide(2)] * 3 + [slide(1)] * 3 + [slide(3)] * 2
+    frames = [(float(t), frame) for t, frame in enumerate(timeline)]
+
+    keyframes = list(detect_keyframes(frames, scene_threshold=0.05, hash_distance=6))
+
+    assert [k.time for k in keyframes] == [1.0, 4.0, 10.0]
+
+def test_process_video(tmp_path, monkeypatch):
+    """Test that a silent video yields one OCRed entry per distinct slide"""
+    moviepy = pytest.importorskip('moviepy.editor')
+    path = str(tmp_path / 'lecture.mp4')
+    timeline = [slide(1)] * 4 + [slide(2)] * 4 + [slide(1)] * 4
+    moviepy.ImageSequenceClip(timeline, fps=2).write_videofile(path, codec='libx264', audio=False, logger=None)
+    ocr_inputs = []
+    monkeypatch.setattr(video_module.page_ocr, 'iter_image_files',
+                        lambda paths: (ocr_inputs.append(p) or f"slide {i}" for i, p in enumerate(paths)))
+
+    result = VideoProcessor(sample_fps=2).process(path)
+
+    assert result['duration'] == pytest.approx(6, abs=0.5)
+    assert [s['text'] for s in result['slides']] == ['slide 0', 'slide 1']
+    assert len(ocr_inputs) == 2
+    assert result['transcription'] is None
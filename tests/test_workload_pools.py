@@ -0,0 +1,68 @@
+"""Tests for bounded file-processing pools"""
+import threading
+import time
+import pytest
+from src.services.workload_pools import PoolSaturated, WorkloadPool
+
+@pytest.fixture
+def pool():
+    """Two-worker pool with room for two queued tasks"""
+    instance = WorkloadPool('test', workers=2, max_queue=2)
+    yield instance
+    instance.shutdown()
+
+def test_concurrency_is_bounded(pool):
+    """Test that no more than ``workers`` tasks run at once"""
+    running = []
+    peak = []
+    lock = threading.Lock()
+
+    def task(n):
+        with lock:
+            running.append(n)
+            peak.append(len(running))
+        time.sleep(0.02)
+        with lock:
+            running.remove(n)
+        return n * n
+
+    futures = [pool.submit(task, n) for n in range(8)]
+
+    assert [future.result() for future in futures] == [n * n for n in range(8)]
+    assert max(peak) == 2
+    stats = pool.stats()
+    assert (stats['submitted'], stats['completed'], stats['queued'], stats['running']) == (8, 8, 0, 0)
+    assert stats['processing_seconds']['mean'] >= 0.02
+    assert stats['wait_seconds']['max'] >= 0.02
+
+def test_full_queue_rejects_or_blocks(pool):
+    """Test that a full queue turns away non-blocking work and holds blocking producers"""
+    release = threading.Event()
+    futures = [pool.submit(release.wait) for _ in range(4)]
+
+    assert pool.saturated
+    with pytest.raises(PoolSaturated) as error:
+        pool.submit(release.wait, block=False)
+    assert error.value.retry_after >= 1
+    with pytest.raises(PoolSaturated):
+        pool.check_capacity()
+
+    blocked = threading.Thread(target=lambda: futures.append(pool.submit(time.sleep, 0)))
+    blocked.start()
+    blocked.join(0.1)
+    assert blocked.is_alive()
+
+    release.set()
+    blocked.join(1)
+    assert not blocked.is_alive()
+    for future in futures:
+        future.result(1)
+    assert pool.stats()['rejected'] == 2
+
+def test_failures_are_propagated(pool):
+    """Test that a task's exception reaches the caller and is counted"""
+    future = pool.submit(int, 'not a number')
+
+    with pytest.raises(ValueError):
+        future.result()
+    assert pool.stats()['failed'] == 1